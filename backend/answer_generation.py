@@ -140,16 +140,49 @@ DEPARTMENT_SYNONYMS: dict[str, list[str]] = {
 }
 
 
+def _synonym_pattern(key: str) -> re.Pattern:
+    """Whole-word match for Latin-script keys ("ece" must not match "recent"); substring otherwise."""
+    if key.isascii():
+        return re.compile(r"(?<![a-z0-9])" + re.escape(key) + r"(?![a-z0-9])")
+    return re.compile(re.escape(key))
+
+
+# Longest key first, so removing "cse ai ml" from a query does not leave "ml" behind.
+_DEPARTMENT_PATTERNS: list[tuple[str, list[re.Pattern]]] = [
+    (dept, [_synonym_pattern(k) for k in sorted(keys, key=len, reverse=True)])
+    for dept, keys in DEPARTMENT_SYNONYMS.items()
+]
+
+# Words that do not narrow a department query down to a topic: "tell me about the CSE department" is an
+# overview, "what are CSE fees" is not.
+_DEPARTMENT_OVERVIEW_WORDS = frozenset(
+    "a an the of in on for at about me us tell give show explain describe what whats is are was how "
+    "overview details detail info information introduction intro summary please can you i want to know "
+    "department dept branch course program programme engineering and".split()
+)
+
+
 def _detect_department(normalized: str) -> str | None:
     if not normalized:
         return None
-    for dept, keys in DEPARTMENT_SYNONYMS.items():
-        for k in keys:
-            if k in normalized:
-                return dept
+    for dept, patterns in _DEPARTMENT_PATTERNS:
+        if any(p.search(normalized) for p in patterns):
+            return dept
     return None
 
 
+def _is_department_overview(normalized: str, dept: str) -> bool:
+    """
+    True if the query asks about dept as a whole: nothing left but the department and filler words.
+    Only Latin-script words are judged (regional-script queries are taken as overviews).
+    """
+    rest = normalized
+    for p in dict(_DEPARTMENT_PATTERNS)[dept]:
+        rest = p.sub(" ", rest)
+    words = re.findall(r"[a-z0-9]+", rest)
+    return all(w in _DEPARTMENT_OVERVIEW_WORDS for w in words)
+
+
 def _is_course_menu_query(normalized: str) -> bool:
     if not normalized:
         return False
@@ -184,7 +217,7 @@ def _normalize_text(text: str | None) -> str:
 def detect_intent(text: str) -> str:
     """
     Deterministic intent detection with priority:
-    1) DEPARTMENT_OVERVIEW (if a specific department is detected)
+    1) DEPARTMENT_OVERVIEW (a specific department is detected and the query is about it as a whole)
     2) COURSE_MENU (generic programs/branches query)
     3) COLLEGE_OVERVIEW (about the college)
     4) NORMAL_QUERY
@@ -192,7 +225,8 @@ def detect_intent(text: str) -> str:
     normalized = _normalize_text(text)
     if not normalized:
         return INTENT_NORMAL_QUERY
-    if _detect_department(normalized):
+    dept = _detect_department(normalized)
+    if dept and _is_department_overview(normalized, dept):
         return INTENT_DEPARTMENT_OVERVIEW
     if _is_course_menu_query(normalized):
         return INTENT_COURSE_MENU
@@ -223,12 +257,32 @@ def _fallback_reply(context: str) -> str:
 def build_overview_context() -> str:
     """
     Return overview-oriented RAG context, hard-capped at OVERVIEW_CONTEXT_MAX_TOKENS (1000).
-    Uses fixed canonical query; no DB schema changes.
+    Uses fixed canonical query; no DB schema changes. Not adaptive: an overview wants breadth.
     """
     return get_relevant_context(
         OVERVIEW_QUERY,
         top_k=OVERVIEW_TOP_K,
         max_tokens=OVERVIEW_CONTEXT_MAX_TOKENS,
+        adaptive=False,
+    )
+
+
+def build_department_context(query: str) -> str:
+    """
+    Context for DEPARTMENT_OVERVIEW ("tell me about ECE"): the department's chunks (metadata recorded
+    at ingest) are preferred, fused with the unfiltered top-k, and all of them are kept rather than an
+    adaptive cut. Anything else (no department, or a topic question) is retrieved like a normal query.
+    """
+    normalized = _normalize_text(query)
+    dept = _detect_department(normalized)
+    if dept is None or not _is_department_overview(normalized, dept):
+        return build_normal_context(query)
+    return get_relevant_context(
+        query,
+        top_k=OVERVIEW_TOP_K,
+        max_tokens=RAG_MAX_TOKENS,
+        adaptive=False,
+        prefer={"departments": [dept]},
     )
 
 
@@ -0,0 +1,257 @@
+"""Chunking of college_knowledge.txt, shared by the ingest script and the in-process index."""
+
+import hashlib
+import re
+import uuid
+from pathlib import Path
+from typing import Callable
+
+from config import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS, CHUNKER
+from tokens import count_tokens, exact_counts
+
+# Chunking (same as original ingest)
+MAX_CHUNK_CHARS = 700
+OVERLAP_CHARS = 80
+SECTION_SEP = "________________________________________"
+# Chunk ids are uuid5(CHUNK_ID_NAMESPACE, content hash): unchanged text keeps its id across ingests.
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c9a52-3b8e-5d0a-9c47-2e5b8f0d7a13")
+
+_PART_RE = re.compile(r"^PART\s+(\d+)\s*:\s*(.+)$")
+# Line prefixes that open a department block -> department name as used by
+# answer_generation.DEPARTMENT_SYNONYMS (the key retrieval filters on).
+DEPARTMENT_HEADINGS = [
+    ("Computer Science & Engineering (CSE)", "CSE"),
+    ("CSE (Artificial Intelligence & Machine Learning)", "CSE (AI & ML)"),
+    ("CSE (Data Science)", "CSE (Data Science)"),
+    ("Information Science & Engineering (ISE)", "ISE"),
+    ("Electronics & Communication Engineering (ECE)", "ECE"),
+    ("Civil Engineering", "Civil"),
+    ("Mechanical Engineering", "Mechanical"),
+    ("Master of Business Administration (MBA)", "MBA"),
+    ("Admission Requirements (MBA)", "MBA"),
+    ("MBA Entrance Exams", "MBA"),
+    ("Mathematics –", "Mathematics"),
+    ("Physics –", "Physics"),
+    ("Chemistry –", "Chemistry"),
+]
+
+
+def strip_comments(content: str) -> str:
+    """Remove leading comment lines (# or <!-- ... -->)."""
+    lines = []
+    in_comment = False
+    for line in content.splitlines():
+        s = line.strip()
+        if s.startswith("<!--"):
+            in_comment = True
+        if in_comment:
+            if "-->" in s:
+                in_comment = False
+            continue
+        if s.startswith("#") and not s.startswith("# "):
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def split_into_chunks(text: str) -> list[str]:
+    """
+    Split text into chunks: first by section separator, then by size with overlap.
+    Preserves meaningful boundaries (paragraphs) where possible.
+    """
+    normalized = text.replace("\r\n", "\n").strip()
+    sections = re.split(re.escape(SECTION_SEP), normalized)
+    sections = [s.strip() for s in sections if s.strip()]
+
+    chunks = []
+    for section in sections:
+        parts = re.split(r"\n\s*\n", section)
+        current = []
+        current_len = 0
+        for part in parts:
+            part = part.strip()
+            if not part:
+                continue
+            part_len = len(part) + (2 if current else 0)
+            if current_len + part_len <= MAX_CHUNK_CHARS and current:
+                current.append(part)
+                current_len += part_len
+            else:
+                if current:
+                    chunk_text = "\n\n".join(current)
+                    chunks.append(chunk_text)
+                    if len(chunk_text) > OVERLAP_CHARS:
+                        overlap = chunk_text[-OVERLAP_CHARS:].split("\n", 1)[-1]
+                        current = [overlap.strip()] if overlap.strip() else []
+                        current_len = len(current[0]) if current else 0
+                    else:
+                        current = []
+                        current_len = 0
+                if current:
+                    current.append(part)
+                    current_len = len("\n\n".join(current))
+                else:
+                    current = [part]
+                    current_len = len(part)
+        if current:
+            chunks.append("\n\n".join(current))
+    return [c for c in chunks if c.strip()]
+
+
+def _split_oversized(paragraph: str, count: Callable[[str], int], max_tokens: int) -> list[str]:
+    """Break a paragraph longer than max_tokens at line, then sentence boundaries (never mid-sentence)."""
+    if count(paragraph) <= max_tokens:
+        return [paragraph]
+    if "\n" in paragraph:
+        sep = "\n"
+        pieces = [p for line in paragraph.split("\n") for p in _split_oversized(line, count, max_tokens)]
+    else:
+        sep = " "
+        pieces = re.split(r"(?<=[.!?])\s+", paragraph)
+        if len(pieces) == 1:
+            return pieces
+    out, current = [], ""
+    for piece in pieces:
+        candidate = f"{current}{sep}{piece}" if current else piece
+        if current and count(candidate) > max_tokens:
+            out.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        out.append(current)
+    return out
+
+
+def _overlap_tail(chunk: str, count: Callable[[str], int], overlap_tokens: int) -> str:
+    """Trailing whole lines of chunk that fit in overlap_tokens (empty if the last line alone is too long)."""
+    tail = ""
+    for line in reversed(chunk.split("\n")):
+        candidate = f"{line}\n{tail}" if tail else line
+        if count(candidate.strip()) > overlap_tokens:
+            break
+        tail = candidate
+    return tail.strip()
+
+
+def split_into_token_chunks(
+    text: str,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    count: Callable[[str], int] = count_tokens,
+) -> list[str]:
+    """
+    Token-aware variant of split_into_chunks: same section and paragraph boundaries, but chunks are
+    packed up to max_tokens (measured on the joined text) and overlap by the trailing whole lines
+    that fit in overlap_tokens. Paragraphs longer than max_tokens are split at lines/sentences.
+    """
+    normalized = text.replace("\r\n", "\n").strip()
+    sections = [s.strip() for s in re.split(re.escape(SECTION_SEP), normalized) if s.strip()]
+    chunks = []
+    for section in sections:
+        parts = []
+        for part in re.split(r"\n\s*\n", section):
+            if part.strip():
+                parts.extend(_split_oversized(part.strip(), count, max_tokens))
+        current = ""
+        fresh = False  # current holds more than the overlap carried from the previous chunk
+        for part in parts:
+            candidate = f"{current}\n\n{part}" if current else part
+            if current and fresh and count(candidate) > max_tokens:
+                chunks.append(current)
+                overlap = _overlap_tail(current, count, overlap_tokens)
+                current = f"{overlap}\n\n{part}" if overlap else part
+            else:
+                current = candidate
+            fresh = True
+        if current and fresh:
+            chunks.append(current)
+    return [c for c in chunks if c.strip()]
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 of one chunk's text: the embedding cache key and the basis of its id."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_ids(chunks: list[str], seen: dict[str, int] | None = None) -> list[str]:
+    """
+    Stable ids derived from content (uuid5 of text_hash). A repeated text gets its occurrence number
+    mixed in, so ids stay unique; an edit changes only the ids of the chunks it touches. Pass the same
+    seen dict for consecutive batches of one corpus to get the ids of the whole list.
+    """
+    if seen is None:
+        seen = {}
+    ids = []
+    for chunk in chunks:
+        h = text_hash(chunk)
+        n = seen.get(h, 0)
+        seen[h] = n + 1
+        ids.append(str(uuid.uuid5(CHUNK_ID_NAMESPACE, h if n == 0 else f"{h}#{n}")))
+    return ids
+
+
+def _is_heading(line: str) -> bool:
+    """Short title line (e.g. "Campus Infrastructure"): no bullet, numbering or sentence punctuation."""
+    return (
+        0 < len(line) <= 60
+        and line[0].isalpha()
+        and line[0].isupper()
+        and not line.endswith((".", ":", ","))
+        and not re.match(r"^\d+\.", line)
+    )
+
+
+def chunk_metadata(chunks: list[str]) -> list[dict]:
+    """
+    Section metadata for each chunk, in document order: part number and title (from "PART n: ..."
+    lines), the last section heading seen, and the departments whose block the chunk covers.
+    State carries over from one chunk to the next, so a chunk continuing a section (or starting with
+    the ingest overlap of the previous one) inherits it.
+    """
+    part, part_title, section, department = None, None, None, None
+    out = []
+    for chunk in chunks:
+        departments = []
+        for line in (ln.strip() for ln in chunk.splitlines()):
+            m = _PART_RE.match(line)
+            if m:
+                part, part_title, section, department = int(m.group(1)), m.group(2).strip(), None, None
+                continue
+            dept = next((d for prefix, d in DEPARTMENT_HEADINGS if line.startswith(prefix)), None)
+            if dept is not None or _is_heading(line):
+                department = dept
+                if _is_heading(line):
+                    section = line
+            if department and department not in departments:
+                departments.append(department)
+        meta = {"part": part, "part_title": part_title, "section": section, "departments": departments}
+        out.append({k: v for k, v in meta.items() if v is not None})
+    return out
+
+
+def load_knowledge_chunks(path: str) -> list[str]:
+    """
+    Read a knowledge file, strip comments and split into chunks with the CHUNKER from config: by tokens
+    (CHUNK_MAX_TOKENS) or by characters. Raises OSError if unreadable, RuntimeError if the token chunker
+    cannot load the cl100k_base encoding (chunk ids and sizes would otherwise change with the environment).
+    """
+    content = strip_comments(Path(path).read_text(encoding="utf-8"))
+    if CHUNKER == "char":
+        return split_into_chunks(content)
+    if not exact_counts():
+        raise RuntimeError("CHUNKER=token needs tiktoken with the cl100k_base encoding (or set CHUNKER=char)")
+    return split_into_token_chunks(content)
+
+
+def load_knowledge_chunks_with_metadata(path: str) -> list[tuple[str, dict]]:
+    """
+    load_knowledge_chunks plus chunk_metadata and each chunk's token_count:
+    [(chunk, metadata)]. Raises OSError if unreadable, RuntimeError if CHUNKER=token cannot load
+    the cl100k_base encoding.
+    """
+    chunks = load_knowledge_chunks(path)
+    metadata = chunk_metadata(chunks)
+    for chunk, meta in zip(chunks, metadata):
+        meta["token_count"] = count_tokens(chunk)
+    return list(zip(chunks, metadata))
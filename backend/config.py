@@ -19,6 +19,37 @@ if not SARVAM_API_KEY:
     SARVAM_API_KEY = os.getenv("SARVAM_ASR_API_KEY", "") or os.getenv("SARVAM_TTS_API_KEY", "")
 # Sarvam STT language: "unknown" = auto-detect, or "hi", "en", etc. Empty = do not pass (API default).
 SARVAM_LANGUAGE_CODE = (os.getenv("SARVAM_LANGUAGE_CODE", "unknown").strip().lower() or None)
+# Sarvam STT endpoint for direct HTTP uploads (a proxy, or tools/stub_stt_server.py); empty = sarvamai SDK
+SARVAM_STT_URL = os.getenv("SARVAM_STT_URL", "").strip()
+STT_TIMEOUT_SEC = max(1.0, float(os.getenv("STT_TIMEOUT_SEC", "15")))
+# Upload encoding: "flac" (lossless), "opus" (OGG/Opus speech codec) or "wav" (raw PCM). Needs soundfile with
+# libsndfile FLAC/Opus support; otherwise, or if encoding fails, the WAV is uploaded as before.
+STT_UPLOAD_FORMAT = (os.getenv("STT_UPLOAD_FORMAT", "flac").strip().lower() or "flac")
+if STT_UPLOAD_FORMAT not in ("flac", "opus", "wav"):
+    STT_UPLOAD_FORMAT = "flac"
+# Streaming STT: cut the recording at pauses of STT_STREAM_PAUSE_MS once a segment has
+# STT_STREAM_MIN_SEGMENT_SEC of audio, and transcribe finished segments while the user is still talking
+STT_STREAMING = os.getenv("STT_STREAMING", "true").strip().lower() in ("1", "true", "yes")
+STT_STREAM_MIN_SEGMENT_SEC = max(0.5, float(os.getenv("STT_STREAM_MIN_SEGMENT_SEC", "2.0")))
+STT_STREAM_PAUSE_MS = max(60, int(os.getenv("STT_STREAM_PAUSE_MS", "300")))
+# STT engines ("sarvam" = Sarvam API, "local" = faster-whisper on CPU). STT_ENGINE is asked first; if it fails,
+# is unhealthy (repeated failures), or has not answered within STT_LATENCY_BUDGET_MS, STT_FALLBACK_ENGINE
+# (empty = none, the default) runs too and the first transcript wins. "local" is opt-in: it downloads and
+# loads a Whisper model.
+STT_ENGINE = (os.getenv("STT_ENGINE", "sarvam").strip().lower() or "sarvam")
+STT_FALLBACK_ENGINE = os.getenv("STT_FALLBACK_ENGINE", "").strip().lower()
+if STT_FALLBACK_ENGINE == STT_ENGINE:
+    STT_FALLBACK_ENGINE = ""
+STT_LATENCY_BUDGET_MS = max(0, int(os.getenv("STT_LATENCY_BUDGET_MS", "2500")))
+# Local engine: Whisper model name (downloaded once into STT_LOCAL_MODEL_DIR) or a CTranslate2 model directory.
+# "small" with int8 weights is sized for a 4-core N100; check RTF and memory with tools/bench_local_stt.py.
+STT_LOCAL_MODEL = os.getenv("STT_LOCAL_MODEL", "small").strip() or "small"
+STT_LOCAL_MODEL_DIR = os.getenv("STT_LOCAL_MODEL_DIR", str(BASE_DIR / "models" / "whisper"))
+STT_LOCAL_COMPUTE_TYPE = (os.getenv("STT_LOCAL_COMPUTE_TYPE", "int8").strip().lower() or "int8")
+STT_LOCAL_THREADS = int(os.getenv("STT_LOCAL_THREADS", "0"))  # 0 = library default
+STT_LOCAL_BEAM_SIZE = max(1, int(os.getenv("STT_LOCAL_BEAM_SIZE", "1")))
+# Load the local model at startup (otherwise on first use, i.e. when Sarvam first fails); opt-in
+STT_LOCAL_PRELOAD = os.getenv("STT_LOCAL_PRELOAD", "false").strip().lower() in ("1", "true", "yes")
 
 # Hardware Configuration
 CAMERA_INDEX = int(os.getenv("CAMERA_INDEX", "0"))
@@ -38,7 +69,74 @@ RAG_MAX_TOKENS = int(os.getenv("RAG_MAX_TOKENS", "6000"))
 # Must be a valid Groq chat model id; if API returns 404, set in .env (see https://console.groq.com/docs/models)
 RAG_MODEL = os.getenv("RAG_MODEL", "llama-3.1-8b-instant")
 COLLEGE_KNOWLEDGE_PATH = os.getenv("COLLEGE_KNOWLEDGE_PATH", str(BASE_DIR / "college_knowledge.txt"))
+# Optional directory of further sources (departmental documents, circulars, FAQs: *.txt / *.md, recursive) for ingest
+COLLEGE_KNOWLEDGE_DIR = os.getenv("COLLEGE_KNOWLEDGE_DIR", "").strip()
 RAG_TOP_K = int(os.getenv("RAG_TOP_K", "5"))
+# Chunker: "token" (CHUNK_MAX_TOKENS per chunk, CHUNK_OVERLAP_TOKENS overlap, cl100k_base; needs tiktoken
+# and its encoding file, and chunking fails rather than silently switching splitter) or "char" (legacy
+# character chunker: 700 chars, 80 overlap). Each chunk's token count is stored in its metadata.
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "180"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "20"))
+_default_chunker = "token" if CHUNK_MAX_TOKENS > 0 else "char"  # CHUNK_MAX_TOKENS=0 used to mean "char"
+CHUNKER = (os.getenv("CHUNKER", _default_chunker).strip().lower() or _default_chunker)
+if CHUNKER not in ("token", "char") or CHUNK_MAX_TOKENS <= 0:
+    CHUNKER = _default_chunker
+# Retrieval engine: "pgvector" (PostgreSQL) or "local" (in-process NumPy index, loaded from the DB or
+# built from COLLEGE_KNOWLEDGE_PATH). RAG_LOCAL_FALLBACK serves from the local index when PostgreSQL is down.
+RAG_ENGINE = (os.getenv("RAG_ENGINE", "pgvector").strip().lower() or "pgvector")
+if RAG_ENGINE not in ("pgvector", "local"):
+    RAG_ENGINE = "pgvector"
+RAG_LOCAL_FALLBACK = os.getenv("RAG_LOCAL_FALLBACK", "true").strip().lower() in ("1", "true", "yes")
+RAG_CORPUS_POLL_SEC = float(os.getenv("RAG_CORPUS_POLL_SEC", "30"))
+# Also wake on PostgreSQL NOTIFY from ingest, so a new corpus is picked up within a second instead of a poll interval
+RAG_CORPUS_NOTIFY = os.getenv("RAG_CORPUS_NOTIFY", "true").strip().lower() in ("1", "true", "yes")
+# Adaptive context sizing: of the top_k candidates keep at least RAG_MIN_K and at most RAG_MAX_K; after RAG_MIN_K
+# stop at the first chunk with cosine similarity < RAG_MIN_SIMILARITY or more than RAG_MAX_SCORE_GAP below the best.
+RAG_MIN_SIMILARITY = float(os.getenv("RAG_MIN_SIMILARITY", "0.75"))
+RAG_MAX_SCORE_GAP = float(os.getenv("RAG_MAX_SCORE_GAP", "0.08"))
+RAG_MIN_K = int(os.getenv("RAG_MIN_K", "1"))
+RAG_MAX_K = int(os.getenv("RAG_MAX_K", "8"))
+# Context assembly: RAG_CONTEXT_DEDUP strips text repeated between retrieved chunks (ingest overlap, shared
+# paragraphs). RAG_MMR re-selects the kept chunks from RAG_MMR_FETCH_K candidates by maximal marginal relevance
+# (RAG_MMR_LAMBDA: 1.0 = pure relevance, lower = more diverse).
+RAG_CONTEXT_DEDUP = os.getenv("RAG_CONTEXT_DEDUP", "true").strip().lower() in ("1", "true", "yes")
+RAG_MMR = os.getenv("RAG_MMR", "false").strip().lower() in ("1", "true", "yes")
+RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+RAG_MMR_FETCH_K = int(os.getenv("RAG_MMR_FETCH_K", "20"))
+# Retrieval mode: "vector" or "hybrid" (BM25 + vector, fused by reciprocal rank). In hybrid mode a decisive
+# lexical match (score, margin over runner-up and query-term coverage) is returned without embedding the query.
+RAG_RETRIEVAL_MODE = (os.getenv("RAG_RETRIEVAL_MODE", "hybrid").strip().lower() or "hybrid")
+if RAG_RETRIEVAL_MODE not in ("vector", "hybrid"):
+    RAG_RETRIEVAL_MODE = "hybrid"
+RAG_HYBRID_CANDIDATES = int(os.getenv("RAG_HYBRID_CANDIDATES", "20"))
+RAG_LEXICAL_FAST_PATH = os.getenv("RAG_LEXICAL_FAST_PATH", "true").strip().lower() in ("1", "true", "yes")
+RAG_LEXICAL_MIN_SCORE = float(os.getenv("RAG_LEXICAL_MIN_SCORE", "3.0"))
+RAG_LEXICAL_MIN_RATIO = float(os.getenv("RAG_LEXICAL_MIN_RATIO", "1.3"))
+RAG_LEXICAL_MIN_COVERAGE = float(os.getenv("RAG_LEXICAL_MIN_COVERAGE", "1.0"))
+# Memory-mapped corpus artifact written by ingest (embeddings + texts + manifest); loaded instantly at startup.
+# float32 is mapped without any copy; float16 halves disk/page cache but is upcast per query.
+RAG_ARTIFACT_DIR = os.getenv("RAG_ARTIFACT_DIR", str(BASE_DIR / "data" / "corpus_artifact"))
+RAG_ARTIFACT_DTYPE = (os.getenv("RAG_ARTIFACT_DTYPE", "float32").strip().lower() or "float32")
+if RAG_ARTIFACT_DTYPE not in ("float32", "float16"):
+    RAG_ARTIFACT_DTYPE = "float32"
+RAG_ARTIFACT_KEEP = int(os.getenv("RAG_ARTIFACT_KEEP", "2"))
+# Ingest embedding cache (SQLite, keyed by model + chunk content hash): only new chunk texts are embedded
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(BASE_DIR / "data" / "embedding_cache.sqlite"))
+# Embedding model and backend ("torch" = sentence-transformers, "onnx-int8" = ONNX Runtime int8 export).
+# The corpus records the model/dim it was ingested with; a mismatch disables RAG at startup.
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "BAAI/bge-base-en").strip() or "BAAI/bge-base-en"
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "768"))
+EMBEDDING_BACKEND = (os.getenv("EMBEDDING_BACKEND", "torch").strip().lower() or "torch")
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", str(BASE_DIR / "models" / "bge-base-en-onnx-int8"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # 0 = library default
+# Embedding micro-batcher: concurrent queries are collected for up to MAX_WAIT_MS and encoded together
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+# Ingest: chunks per model call (encode batch) when embedding the corpus
+INGEST_BATCH_SIZE = max(1, int(os.getenv("INGEST_BATCH_SIZE", "64")))
+# Chunking worker processes (0 = CPU count) and how many chunk batches may wait for the embedder
+INGEST_WORKERS = max(0, int(os.getenv("INGEST_WORKERS", "0")))
+INGEST_QUEUE_BATCHES = max(1, int(os.getenv("INGEST_QUEUE_BATCHES", "4")))
 
 # PostgreSQL + pgvector (RAG storage)
 POSTGRES_HOST = os.getenv("POSTGRES_HOST", "127.0.0.1")
@@ -46,6 +144,33 @@ POSTGRES_PORT = int(os.getenv("POSTGRES_PORT", "5432"))
 POSTGRES_DB = os.getenv("POSTGRES_DB", "clara_db")
 POSTGRES_USER = os.getenv("POSTGRES_USER", "clara_user")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "")
+# Connection pool (thread-safe; shared by request threads and asyncio.to_thread workers). MIN connections stay
+# open; up to MAX are opened under load and closed on return. Checkout waits up to TIMEOUT_SEC for a free one.
+# A connection idle longer than VALIDATE_IDLE_SEC is pinged (SELECT 1) before use; 0 = always, -1 = never.
+POSTGRES_POOL_MIN = max(1, int(os.getenv("POSTGRES_POOL_MIN", "2")))
+POSTGRES_POOL_MAX = max(POSTGRES_POOL_MIN, int(os.getenv("POSTGRES_POOL_MAX", "10")))
+POSTGRES_POOL_TIMEOUT_SEC = float(os.getenv("POSTGRES_POOL_TIMEOUT_SEC", "5"))
+POSTGRES_POOL_VALIDATE_IDLE_SEC = float(os.getenv("POSTGRES_POOL_VALIDATE_IDLE_SEC", "30"))
+# Unavailable server: connects give up after CONNECT_TIMEOUT_SEC (libpq minimum 2) and a background thread
+# retries with exponential backoff from RECONNECT_MIN_SEC to RECONNECT_MAX_SEC; callers never wait on it.
+POSTGRES_CONNECT_TIMEOUT_SEC = max(2, int(os.getenv("POSTGRES_CONNECT_TIMEOUT_SEC", "3")))
+POSTGRES_RECONNECT_MIN_SEC = max(0.1, float(os.getenv("POSTGRES_RECONNECT_MIN_SEC", "1")))
+POSTGRES_RECONNECT_MAX_SEC = max(POSTGRES_RECONNECT_MIN_SEC, float(os.getenv("POSTGRES_RECONNECT_MAX_SEC", "30")))
+# ANN index on college_knowledge.embedding (cosine ops, created by schema.py / ingest): "hnsw", "ivfflat" or
+# "none" (exact scan). EF_SEARCH / PROBES are the per-query recall-vs-latency knobs (set per transaction).
+PGVECTOR_INDEX = (os.getenv("PGVECTOR_INDEX", "hnsw").strip().lower() or "hnsw")
+if PGVECTOR_INDEX not in ("hnsw", "ivfflat", "none"):
+    PGVECTOR_INDEX = "hnsw"
+PGVECTOR_HNSW_M = int(os.getenv("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(os.getenv("PGVECTOR_HNSW_EF_CONSTRUCTION", "64"))
+PGVECTOR_HNSW_EF_SEARCH = int(os.getenv("PGVECTOR_HNSW_EF_SEARCH", "40"))
+PGVECTOR_IVFFLAT_LISTS = int(os.getenv("PGVECTOR_IVFFLAT_LISTS", "0"))  # 0 = sqrt(rows) at build time
+PGVECTOR_IVFFLAT_PROBES = int(os.getenv("PGVECTOR_IVFFLAT_PROBES", "10"))
+# Storage type of college_knowledge.embedding: "vector" (float32) or "halfvec" (float16: half the table and
+# index size). schema.py converts the column (and rebuilds the index) when this changes.
+PGVECTOR_STORAGE = (os.getenv("PGVECTOR_STORAGE", "vector").strip().lower() or "vector")
+if PGVECTOR_STORAGE not in ("vector", "halfvec"):
+    PGVECTOR_STORAGE = "vector"
 
 # State Machine Configuration
 INACTIVITY_TIMEOUT = float(os.getenv("INACTIVITY_TIMEOUT", "20.0"))
@@ -56,12 +181,30 @@ AUDIO_CHANNELS = int(os.getenv("AUDIO_CHANNELS", "1"))
 AUDIO_VAD_FRAME_MS = int(os.getenv("AUDIO_VAD_FRAME_MS", "20"))  # 10, 20, or 30 for webrtcvad
 AUDIO_SILENCE_STOP_MS = int(os.getenv("AUDIO_SILENCE_STOP_MS", "1500"))  # stop after this much silence
 AUDIO_SPEECH_TIMEOUT_MS = int(os.getenv("AUDIO_SPEECH_TIMEOUT_MS", "10000"))  # max wait for speech to start
-# Record mode: "fixed" = record N seconds (proves capture on PC mic); "vad" = VAD start/stop
-AUDIO_RECORD_MODE = (os.getenv("AUDIO_RECORD_MODE", "fixed").strip().lower() or "fixed")
-if AUDIO_RECORD_MODE not in ("fixed", "vad"):
-    AUDIO_RECORD_MODE = "fixed"
+# Record mode: "fixed" = record N seconds (proves capture on PC mic); "vad" = VAD start/stop after
+# AUDIO_SILENCE_STOP_MS of silence; "adaptive" = VAD with a noise-gated, adaptive end-of-speech window
+AUDIO_RECORD_MODE = (os.getenv("AUDIO_RECORD_MODE", "adaptive").strip().lower() or "adaptive")
+if AUDIO_RECORD_MODE not in ("fixed", "vad", "adaptive"):
+    AUDIO_RECORD_MODE = "adaptive"
+# webrtcvad aggressiveness 0 (keeps most audio as speech) .. 3 (most aggressive non-speech filtering)
+AUDIO_VAD_AGGRESSIVENESS = min(3, max(0, int(os.getenv("AUDIO_VAD_AGGRESSIVENESS", "2"))))
+# Adaptive mode: trailing-silence window bounds (short answers end after MIN, long turns get up to MAX)
+AUDIO_ENDPOINT_MIN_MS = max(100, int(os.getenv("AUDIO_ENDPOINT_MIN_MS", "400")))
+AUDIO_ENDPOINT_MAX_MS = max(AUDIO_ENDPOINT_MIN_MS, int(os.getenv("AUDIO_ENDPOINT_MAX_MS", "1200")))
 AUDIO_FIXED_RECORD_SECONDS = float(os.getenv("AUDIO_FIXED_RECORD_SECONDS", "4.0"))
 AUDIO_SILENT_RMS_THRESHOLD = float(os.getenv("AUDIO_SILENT_RMS_THRESHOLD", "0.001"))
+# Persistent capture: the input stream stays open and fills a ring buffer (seconds) between recordings;
+# each recording starts this many ms before the request, so the first syllable is not clipped.
+AUDIO_PREROLL_MS = max(0, int(os.getenv("AUDIO_PREROLL_MS", "300")))
+AUDIO_RING_SECONDS = max(2.0, float(os.getenv("AUDIO_RING_SECONDS", "10")))
+# Multi-channel input: record one channel (e.g. 0 = ReSpeaker 6-ch firmware's processed/beamformed output)
+# instead of the mean of all channels (-1). Upper bound on a VAD recording once speech has started.
+_capture_ch = os.getenv("AUDIO_CAPTURE_CHANNEL", "-1").strip()
+AUDIO_CAPTURE_CHANNEL = int(_capture_ch) if _capture_ch.lstrip("-").isdigit() else -1
+AUDIO_MAX_RECORD_SECONDS = max(1.0, float(os.getenv("AUDIO_MAX_RECORD_SECONDS", "15")))
+# Trim leading/trailing silence (webrtcvad speech span) before STT, keeping AUDIO_TRIM_PAD_MS around it
+AUDIO_TRIM_SILENCE = os.getenv("AUDIO_TRIM_SILENCE", "true").strip().lower() in ("1", "true", "yes")
+AUDIO_TRIM_PAD_MS = max(0, int(os.getenv("AUDIO_TRIM_PAD_MS", "200")))
 
 # Server Configuration
 HOST = os.getenv("HOST", "0.0.0.0")
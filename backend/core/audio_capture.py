@@ -0,0 +1,306 @@
+"""
+Persistent audio input: one always-open callback stream on the configured device, feeding a ring buffer.
+
+The device is resolved once and the index cached. The stream stays open between recordings, so
+starting a recording costs nothing and a session can begin AUDIO_PREROLL_MS in the past (the first
+syllable said while the mic button was being pressed is not lost). If the stream dies or stalls
+(device unplugged), the next read re-initializes PortAudio, re-resolves the device and reopens. When
+the configured device was missing and the default was used instead, sessions rescan now and then so
+a device plugged in later is picked up. Only one capture session can hold the device at a time.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import sounddevice as sd
+
+import metrics
+from config import (
+    AUDIO_CHANNELS,
+    AUDIO_INPUT_DEVICE_INDEX,
+    AUDIO_INPUT_DEVICE_NAME,
+    AUDIO_PREROLL_MS,
+    AUDIO_RING_SECONDS,
+    AUDIO_SAMPLE_RATE,
+)
+
+logger = logging.getLogger(__name__)
+
+# A stream that delivers nothing for this long is treated as dead (device gone) and reopened.
+_STALL_TIMEOUT_SEC = 1.0
+# While on the fallback device, look for the configured one at most this often.
+_RESCAN_INTERVAL_SEC = 30.0
+_BLOCK_MS = 10
+
+
+def resolve_input_device() -> Tuple[int, bool]:
+    """
+    Resolve input device index from config (explicit index, else name substring, else default).
+    Returns (index, fell_back): fell_back is True when a configured device was not found.
+    """
+    devices = sd.query_devices()
+    default_in = sd.default.device[0]
+    if default_in is None or default_in < 0:
+        default_in = 0
+
+    if AUDIO_INPUT_DEVICE_INDEX is not None:
+        if 0 <= AUDIO_INPUT_DEVICE_INDEX < len(devices) and devices[AUDIO_INPUT_DEVICE_INDEX].get("max_input_channels", 0) > 0:
+            logger.info("Using audio input device index %s: %s", AUDIO_INPUT_DEVICE_INDEX, devices[AUDIO_INPUT_DEVICE_INDEX].get("name", "?"))
+            return AUDIO_INPUT_DEVICE_INDEX, False
+        logger.warning("AUDIO_INPUT_DEVICE_INDEX=%s invalid or no input; using default %s", AUDIO_INPUT_DEVICE_INDEX, default_in)
+        return default_in, True
+
+    if AUDIO_INPUT_DEVICE_NAME:
+        name_lower = AUDIO_INPUT_DEVICE_NAME.lower()
+        for i, dev in enumerate(devices):
+            if dev.get("max_input_channels", 0) > 0 and name_lower in (dev.get("name") or "").lower():
+                logger.info("Using audio input device by name '%s': index %s, %s", AUDIO_INPUT_DEVICE_NAME, i, dev.get("name"))
+                return i, False
+        logger.warning("No input device name containing '%s'; using default %s", AUDIO_INPUT_DEVICE_NAME, default_in)
+        return default_in, True
+
+    logger.info("Using default audio input device index %s: %s", default_in, devices[default_in].get("name", "?") if default_in < len(devices) else "?")
+    return default_in, False
+
+
+class CaptureBusy(RuntimeError):
+    """Another capture session holds the device."""
+
+
+class AudioCaptureService:
+    """
+    Owns the input stream and its ring buffer. The PortAudio callback copies each block into the ring
+    and advances a monotonic frame counter; sessions read behind it. Thread-safe.
+    """
+
+    def __init__(self, preroll_ms: int = AUDIO_PREROLL_MS, ring_seconds: float = AUDIO_RING_SECONDS) -> None:
+        self.sample_rate = AUDIO_SAMPLE_RATE
+        self.preroll_frames = max(0, preroll_ms) * self.sample_rate // 1000
+        self.capacity = max(int(ring_seconds * self.sample_rate), self.preroll_frames + self.sample_rate)
+        self.device_id: Optional[int] = None
+        self.device_name = "?"
+        self.channels = 1
+        self._fell_back = False
+        self._resolved_at = 0.0
+        self._stream = None
+        self._ring: Optional[np.ndarray] = None
+        self._written = 0  # total frames written since the ring was (re)created
+        self._last_block = 0.0
+        self._dead = False
+        self._cond = threading.Condition()
+        self._open_lock = threading.Lock()
+        self._session_lock = threading.Lock()
+
+    # --- stream lifecycle ---
+
+    def _callback(self, indata, frames, time_info, status) -> None:
+        if status:
+            logger.debug("Input stream status: %s", status)
+        ring = self._ring
+        n = len(indata)  # one block (_BLOCK_MS), always far smaller than the ring
+        with self._cond:
+            pos = self._written % self.capacity
+            first = min(n, self.capacity - pos)
+            ring[pos : pos + first] = indata[:first]
+            if first < n:
+                ring[: n - first] = indata[first:]
+            self._written += n
+            self._last_block = time.monotonic()
+            self._cond.notify_all()
+
+    def _finished(self) -> None:
+        with self._cond:
+            self._dead = True
+            self._cond.notify_all()
+
+    def _open(self, rescan: bool = False) -> None:
+        """(Re)open the stream; rescan re-initializes PortAudio so device changes become visible."""
+        self._close_stream()
+        if rescan:
+            try:
+                sd._terminate()
+                sd._initialize()
+            except Exception as e:
+                logger.warning("PortAudio re-init failed: %s", e)
+        if rescan or self.device_id is None:
+            self.device_id, self._fell_back = resolve_input_device()
+            self._resolved_at = time.monotonic()
+        dev = sd.query_devices(self.device_id)
+        self.device_name = dev.get("name", "?")
+        self.channels = max(1, min(dev.get("max_input_channels", 1), max(1, AUDIO_CHANNELS)))
+        with self._cond:
+            self._ring = np.zeros((self.capacity, self.channels), dtype=np.int16)
+            self._written = 0
+            self._dead = False
+            self._last_block = time.monotonic()
+        stream = sd.InputStream(
+            device=self.device_id,
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype="int16",
+            blocksize=self.sample_rate * _BLOCK_MS // 1000,
+            callback=self._callback,
+            finished_callback=self._finished,
+        )
+        stream.start()
+        self._stream = stream
+        metrics.incr("audio.capture.opens")
+        logger.info(
+            "Audio capture open: device_id=%s name=%s channels=%s ring=%.1fs preroll=%sms",
+            self.device_id, self.device_name, self.channels, self.capacity / self.sample_rate,
+            self.preroll_frames * 1000 // self.sample_rate,
+        )
+
+    def _close_stream(self) -> None:
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.close(ignore_errors=True)
+            except Exception as e:
+                logger.debug("Input stream close failed: %s", e)
+
+    def ensure_open(self, rescan: bool = False) -> None:
+        """Open the stream if it is not open, dead or stalled. Raises on failure (no usable device)."""
+        with self._open_lock:
+            healthy = (
+                self._stream is not None
+                and not self._dead
+                and time.monotonic() - self._last_block < _STALL_TIMEOUT_SEC
+            )
+            if healthy and not rescan:
+                return
+            if self._stream is not None:
+                logger.warning("Audio input stream lost (device %s); reopening", self.device_id)
+                metrics.incr("audio.capture.reopens")
+                rescan = True
+            self._open(rescan=rescan)
+
+    def close(self) -> None:
+        with self._open_lock:
+            self._close_stream()
+
+    # --- sessions ---
+
+    @contextmanager
+    def session(self) -> Iterator["CaptureSession"]:
+        """Hold the device for one recording. Raises CaptureBusy if another session holds it."""
+        if not self._session_lock.acquire(blocking=False):
+            metrics.incr("audio.capture.busy")
+            raise CaptureBusy("audio input is in use by another session")
+        try:
+            rescan = self._fell_back and time.monotonic() - self._resolved_at >= _RESCAN_INTERVAL_SEC
+            self.ensure_open(rescan=rescan)
+            with self._cond:
+                start = max(0, self._written - self.preroll_frames)
+            yield CaptureSession(self, start)
+        finally:
+            self._session_lock.release()
+
+    def _read(
+        self, session: "CaptureSession", frames: int, timeout: float, out: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._written - session.pos < frames:
+                if self._dead:
+                    return None
+                remaining = min(deadline, self._last_block + _STALL_TIMEOUT_SEC) - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            if self._written - session.pos > self.capacity:
+                dropped = self._written - self.capacity - session.pos
+                logger.warning("Capture reader fell behind; dropped %s frames", dropped)
+                metrics.incr("audio.capture.overruns")
+                session.pos = self._written - self.capacity
+            pos = session.pos % self.capacity
+            first = min(frames, self.capacity - pos)
+            if out is None:
+                out = np.empty((frames, self.channels), dtype=np.int16)
+            out[:first] = self._ring[pos : pos + first]
+            if first < frames:
+                out[first:] = self._ring[: frames - first]
+            session.pos += frames
+            return out
+
+    def _history(self, session: "CaptureSession", frames: int) -> np.ndarray:
+        with self._cond:
+            end = session.start
+            begin = max(0, end - frames, self._written - self.capacity)
+            idx = np.arange(begin, end) % self.capacity
+            return self._ring[idx]
+
+
+class CaptureSession:
+    """A reader positioned in the ring buffer (pre-roll included). Valid inside service.session()."""
+
+    def __init__(self, service: AudioCaptureService, start: int) -> None:
+        self.service = service
+        self.start = start
+        self.pos = start
+        self.channels = service.channels
+        self.sample_rate = service.sample_rate
+
+    def read(self, frames: int, timeout: float = 2.0) -> Optional[np.ndarray]:
+        """
+        Next frames (frames, channels) int16, blocking until captured. Returns None if the stream
+        died or stalled (the session should end; the next session reopens the device).
+        """
+        block = self.service._read(self, frames, timeout)
+        if block is None:
+            metrics.incr("audio.capture.stalls")
+        return block
+
+    def history(self, frames: int) -> np.ndarray:
+        """
+        Up to frames (frames, channels) of audio captured before this session started (less right after
+        the stream opened). For calibration, e.g. the noise floor; allocates.
+        """
+        return self.service._history(self, frames)
+
+    def read_into(self, out: np.ndarray, timeout: float = 2.0) -> bool:
+        """
+        Like read, but copies into out, shape (frames, channels), or 1-D for a mono stream, instead of
+        allocating. False if the stream died or stalled.
+        """
+        if out.ndim == 1:
+            out = out.reshape(-1, 1)
+        if self.service._read(self, len(out), timeout, out=out) is None:
+            metrics.incr("audio.capture.stalls")
+            return False
+        return True
+
+
+_service: Optional[AudioCaptureService] = None
+_service_lock = threading.Lock()
+
+
+def get_capture_service() -> AudioCaptureService:
+    """Process-wide capture service (created on first use; the stream opens on first session)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AudioCaptureService()
+        return _service
+
+
+def start_capture_service() -> bool:
+    """Open the input stream ahead of the first recording (startup). Never raises."""
+    try:
+        get_capture_service().ensure_open()
+        return True
+    except Exception as e:
+        logger.warning("Audio capture not started: %s", e)
+        return False
+
+
+def stop_capture_service() -> None:
+    """Close the input stream (shutdown). Never raises."""
+    if _service is not None:
+        try:
+            _service.close()
+        except Exception as e:
+            logger.debug("Audio capture close failed: %s", e)
@@ -1,24 +1,42 @@
-"""Backend audio capture: device resolution, VAD, WAV output. For use via asyncio.to_thread(record_audio)."""
-import io
+"""Backend audio capture: VAD, WAV output. For use via asyncio.to_thread(record_audio).
+
+Audio comes from the persistent capture service (core.audio_capture), so a recording starts without
+opening the device and includes the pre-roll captured just before it. The per-frame VAD decisions
+mark the speech span, and with AUDIO_TRIM_SILENCE only that span (plus AUDIO_TRIM_PAD_MS each side)
+is uploaded, so STT is not paid for the wait before speech or the endpointing silence after it.
+Given a SegmentedTranscriber, record_audio also cuts the recording at pauses (STT_STREAM_PAUSE_MS,
+once a segment has STT_STREAM_MIN_SEGMENT_SEC) and submits each segment while capture continues.
+
+Each VAD frame is copied once, from the ring buffer into a preallocated mono int16 buffer (mixed down
+or a single selected channel), and webrtcvad reads it in place through a memoryview. The RMS is
+accumulated as frames arrive, and the WAV header is written into room reserved in front of the
+samples, so the result is one copy.
+"""
 import logging
 import struct
-from typing import Optional
+from typing import Optional, Tuple
 
 import numpy as np
-import sounddevice as sd
 import webrtcvad
 
+import metrics
+from core.audio_capture import CaptureBusy, CaptureSession, get_capture_service
+from core.endpointing import AdaptiveEndpointer, FixedSilenceEndpointer, energy_db, noise_floor_db
+from stt import SegmentedTranscriber
 from config import (
-    AUDIO_CHANNELS,
+    AUDIO_CAPTURE_CHANNEL,
+    AUDIO_MAX_RECORD_SECONDS,
     AUDIO_SAMPLE_RATE,
-    AUDIO_SILENCE_STOP_MS,
     AUDIO_SPEECH_TIMEOUT_MS,
+    AUDIO_VAD_AGGRESSIVENESS,
     AUDIO_VAD_FRAME_MS,
-    AUDIO_INPUT_DEVICE_NAME,
-    AUDIO_INPUT_DEVICE_INDEX,
     AUDIO_RECORD_MODE,
     AUDIO_FIXED_RECORD_SECONDS,
     AUDIO_SILENT_RMS_THRESHOLD,
+    AUDIO_TRIM_PAD_MS,
+    AUDIO_TRIM_SILENCE,
+    STT_STREAM_MIN_SEGMENT_SEC,
+    STT_STREAM_PAUSE_MS,
 )
 
 logger = logging.getLogger(__name__)
@@ -27,169 +45,349 @@ logger = logging.getLogger(__name__)
 _VAD_FRAME_MS = 10 if AUDIO_VAD_FRAME_MS <= 10 else (20 if AUDIO_VAD_FRAME_MS <= 20 else 30)
 SAMPLES_PER_FRAME = (AUDIO_SAMPLE_RATE * _VAD_FRAME_MS) // 1000
 BYTES_PER_FRAME = SAMPLES_PER_FRAME * 2  # int16
+WAV_HEADER_BYTES = 44
+# The running RMS folds in new samples once per this many (one numpy pass instead of one per frame).
+_RMS_SPAN_SAMPLES = AUDIO_SAMPLE_RATE
+# Speech span for trimming: only runs of at least this many speech frames count (isolated clicks don't).
+_MIN_SPEECH_RUN_FRAMES = max(1, 60 // _VAD_FRAME_MS)
+# Adaptive mode calibrates the noise floor on this much audio from before the recording.
+_CALIBRATION_MS = 1000
+
+_vad_takes_memoryview: Optional[bool] = None
+
+
+def _wav_header(n_samples: int) -> bytes:
+    """44-byte RIFF header for n_samples of mono 16-bit PCM at AUDIO_SAMPLE_RATE."""
+    return (
+        b"RIFF"
+        + struct.pack("<I", 36 + n_samples * 2)
+        + b"WAVEfmt "
+        + struct.pack("<IHHIIHH", 16, 1, 1, AUDIO_SAMPLE_RATE, AUDIO_SAMPLE_RATE * 2, 2, 16)
+        + b"data"
+        + struct.pack("<I", n_samples * 2)
+    )
+
+
+def _vad_accepts_memoryview(vad: "webrtcvad.Vad") -> bool:
+    """Whether this webrtcvad build takes buffer objects (older builds want bytes). Probed once."""
+    global _vad_takes_memoryview
+    if _vad_takes_memoryview is None:
+        try:
+            vad.is_speech(memoryview(bytearray(BYTES_PER_FRAME)), AUDIO_SAMPLE_RATE)
+            _vad_takes_memoryview = True
+        except TypeError:
+            logger.info("webrtcvad does not accept memoryview; passing bytes per frame")
+            _vad_takes_memoryview = False
+    return _vad_takes_memoryview
+
+
+class CaptureBuffer:
+    """
+    Preallocated mono int16 recording of up to max_samples, with WAV header room in front of it.
+
+    append_frame() pulls one VAD frame from a capture session straight into the buffer (mono input)
+    or through a fixed scratch block (multi-channel: one selected channel, or the integer mean of
+    all). Nothing is allocated per frame.
+    """
+
+    def __init__(self, max_samples: int, channels: int, channel: int = AUDIO_CAPTURE_CHANNEL) -> None:
+        self.max_samples = max_samples - max_samples % SAMPLES_PER_FRAME
+        self.channels = channels
+        self.channel = channel if 0 <= channel < channels else -1
+        self._raw = bytearray(WAV_HEADER_BYTES + self.max_samples * 2)
+        self._view = memoryview(self._raw)
+        self.samples = np.frombuffer(self._raw, dtype=np.int16, offset=WAV_HEADER_BYTES)
+        # frame i as a (SAMPLES_PER_FRAME, 1) view: the read target for a mono stream, no reshaping
+        self._frames = self.samples.reshape(-1, SAMPLES_PER_FRAME, 1)
+        self.n = 0
+        self._sum_sq = 0
+        self._sq_n = 0  # samples already in _sum_sq
+        self._sq = np.empty(_RMS_SPAN_SAMPLES, dtype=np.int32)
+        self._mix = np.empty(SAMPLES_PER_FRAME, dtype=np.int32)
+        self._block = np.empty((SAMPLES_PER_FRAME, channels), dtype=np.int16) if channels > 1 else None
+        self.speech_start: Optional[int] = None  # sample index span of speech runs seen so far
+        self.speech_end = 0
+        self._run_start = 0
+        self._run_len = 0
+        self.silence_frames = 0  # consecutive non-speech frames at the end
+
+    @property
+    def full(self) -> bool:
+        return self.n >= self.max_samples
+
+    def append_frame(self, session: CaptureSession, timeout: float = 2.0) -> bool:
+        """Read the next VAD frame from session into the buffer. False if full or the stream stalled."""
+        if self.full:
+            return False
+        dst = self._frames[self.n // SAMPLES_PER_FRAME]
+        if self._block is None:
+            if not session.read_into(dst, timeout):
+                return False
+        else:
+            if not session.read_into(self._block, timeout):
+                return False
+            if self.channel >= 0:
+                np.copyto(dst, self._block[:, self.channel : self.channel + 1])
+            else:
+                np.sum(self._block, axis=1, dtype=np.int32, out=self._mix)
+                np.floor_divide(self._mix, self.channels, out=dst[:, 0], casting="unsafe")
+        self.n += SAMPLES_PER_FRAME
+        if self.n - self._sq_n >= _RMS_SPAN_SAMPLES:
+            self._accumulate()
+        return True
+
+    def append_samples(self, mono: np.ndarray) -> int:
+        """Copy already-mono int16 samples in (whole frames only; tools and tests). Returns count."""
+        count = min(len(mono), self.max_samples - self.n)
+        count -= count % SAMPLES_PER_FRAME
+        for off in range(0, count, SAMPLES_PER_FRAME):
+            self.samples[self.n : self.n + SAMPLES_PER_FRAME] = mono[off : off + SAMPLES_PER_FRAME]
+            self.n += SAMPLES_PER_FRAME
+            if self.n - self._sq_n >= _RMS_SPAN_SAMPLES:
+                self._accumulate()
+        return count
+
+    def _accumulate(self) -> None:
+        """Fold the samples since the last call into the running sum of squares (one vectorized pass)."""
+        while self._sq_n < self.n:
+            span = self.samples[self._sq_n : min(self.n, self._sq_n + _RMS_SPAN_SAMPLES)]
+            sq = self._sq[: len(span)]
+            np.multiply(span, span, out=sq, dtype=np.int32)
+            self._sum_sq += int(sq.sum(dtype=np.int64))
+            self._sq_n += len(span)
+
+    def last_frame(self):
+        """The newest VAD frame, as webrtcvad input (memoryview into the buffer, or bytes if required)."""
+        start = WAV_HEADER_BYTES + (self.n - SAMPLES_PER_FRAME) * 2
+        frame = self._view[start : start + BYTES_PER_FRAME]
+        return frame if _vad_takes_memoryview is not False else bytes(frame)
+
+    def mark(self, is_speech: bool) -> None:
+        """Record the VAD decision for the newest frame (extends the speech span)."""
+        if not is_speech:
+            self._run_len = 0
+            self.silence_frames += 1
+            return
+        self.silence_frames = 0
+        if self._run_len == 0:
+            self._run_start = self.n - SAMPLES_PER_FRAME
+        self._run_len += 1
+        if self._run_len >= _MIN_SPEECH_RUN_FRAMES:
+            if self.speech_start is None:
+                self.speech_start = self._run_start
+            self.speech_end = self.n
+
+    def last_frame_db(self) -> float:
+        """Energy (dBFS) of the newest frame."""
+        frame = self.samples[self.n - SAMPLES_PER_FRAME : self.n]
+        sq = self._mix
+        np.multiply(frame, frame, out=sq, dtype=np.int32)
+        return energy_db(int(sq.sum(dtype=np.int64)) / SAMPLES_PER_FRAME)
+
+    def speech_bounds(self, pad_samples: int) -> Tuple[int, int]:
+        """(start, end) sample span of the speech plus pad; the whole buffer if no speech was marked."""
+        if self.speech_start is None:
+            return 0, self.n
+        return max(0, self.speech_start - pad_samples), min(self.n, self.speech_end + pad_samples)
+
+    def rms(self) -> float:
+        """RMS (normalized 0..1) of everything appended so far."""
+        self._accumulate()
+        return float(np.sqrt(self._sum_sq / self.n) / 32768.0) if self.n else 0.0
+
+    def segment_wav(self, start: int, end: int) -> bytes:
+        """Samples [start, end) as a WAV file without touching the buffer (header + one copy)."""
+        return _wav_header(end - start) + self._view[WAV_HEADER_BYTES + start * 2 : WAV_HEADER_BYTES + end * 2]
 
+    def wav(self, start: int = 0, end: Optional[int] = None) -> bytes:
+        """
+        Samples [start, end) as a WAV file: the header is written into the 44 bytes in front of start
+        (the reserved room, or discarded samples before it), then a single copy. Call once, last.
+        """
+        end = self.n if end is None else min(end, self.n)
+        if end <= start:
+            return b""
+        offset = start * 2  # byte offset of the header: WAV_HEADER_BYTES before sample start
+        self._view[offset : offset + WAV_HEADER_BYTES] = _wav_header(end - start)
+        return bytes(self._view[offset : WAV_HEADER_BYTES + end * 2])
 
-def _resolve_input_device() -> int:
-    """Resolve input device index from config (name substring or explicit index)."""
-    devices = sd.query_devices()
-    default_in = sd.default.device[0]
-    if default_in is None:
-        default_in = 0
 
-    if AUDIO_INPUT_DEVICE_INDEX is not None:
-        if 0 <= AUDIO_INPUT_DEVICE_INDEX < len(devices) and devices[AUDIO_INPUT_DEVICE_INDEX].get("max_input_channels", 0) > 0:
-            logger.info("Using audio input device index %s: %s", AUDIO_INPUT_DEVICE_INDEX, devices[AUDIO_INPUT_DEVICE_INDEX].get("name", "?"))
-            return AUDIO_INPUT_DEVICE_INDEX
-        logger.warning("AUDIO_INPUT_DEVICE_INDEX=%s invalid or no input; using default %s", AUDIO_INPUT_DEVICE_INDEX, default_in)
+def _max_samples(seconds: float) -> int:
+    return int(AUDIO_SAMPLE_RATE * seconds) + SAMPLES_PER_FRAME
 
-    if AUDIO_INPUT_DEVICE_NAME:
-        name_lower = AUDIO_INPUT_DEVICE_NAME.lower()
-        for i, dev in enumerate(devices):
-            if dev.get("max_input_channels", 0) > 0 and name_lower in (dev.get("name") or "").lower():
-                logger.info("Using audio input device by name '%s': index %s, %s", AUDIO_INPUT_DEVICE_NAME, i, dev.get("name"))
-                return i
-        logger.warning("No input device name containing '%s'; using default %s", AUDIO_INPUT_DEVICE_NAME, default_in)
 
-    logger.info("Using default audio input device index %s: %s", default_in, devices[default_in].get("name", "?") if default_in < len(devices) else "?")
-    return default_in
+class _Segmenter:
+    """Submits pause-delimited segments of a recording to a SegmentedTranscriber during capture."""
 
+    def __init__(self, buf: CaptureBuffer, stt: SegmentedTranscriber) -> None:
+        self.buf = buf
+        self.stt = stt
+        self.start: Optional[int] = None  # first sample of the segment being captured
+        self.min_samples = int(STT_STREAM_MIN_SEGMENT_SEC * AUDIO_SAMPLE_RATE)
+        self.pause_frames = max(1, STT_STREAM_PAUSE_MS // _VAD_FRAME_MS)
 
-def _frame_to_mono(frame: np.ndarray, channels: int) -> bytes:
-    """Convert (samples, channels) int16 to mono bytes."""
-    if channels <= 1:
-        return frame.tobytes()
-    mono = frame.mean(axis=1).astype(np.int16)
-    return mono.tobytes()
+    def check(self) -> None:
+        """After each marked frame: cut in the middle of a pause once the segment is long enough."""
+        buf = self.buf
+        if buf.speech_start is None:
+            return
+        if self.start is None:
+            self.start = buf.speech_bounds(_trim_pad_samples())[0] if AUDIO_TRIM_SILENCE else 0
+        if buf.silence_frames == self.pause_frames and buf.n - self.start >= self.min_samples:
+            cut = buf.n - buf.silence_frames * SAMPLES_PER_FRAME // 2
+            self.stt.submit(buf.segment_wav(self.start, cut))
+            self.start = cut
 
+    def final(self, start: int, end: int) -> Optional[bytes]:
+        """The last segment (up to the trimmed end), or None if no speech is left after the last cut."""
+        if self.stt.segments == 0 or self.start is None or self.buf.speech_end <= self.start:
+            return None
+        begin = max(start, self.start)
+        return self.buf.segment_wav(begin, end) if end > begin else None
 
-def _compute_rms(mono_bytes: bytes) -> float:
-    """Compute RMS (normalized 0..1) from mono int16 PCM."""
-    if len(mono_bytes) < 2:
-        return 0.0
-    arr = np.frombuffer(mono_bytes, dtype=np.int16)
-    return float(np.sqrt(np.mean(arr.astype(np.float64) ** 2)) / 32768.0)
 
+def _trim_pad_samples() -> int:
+    return AUDIO_SAMPLE_RATE * AUDIO_TRIM_PAD_MS // 1000
 
-def _record_fixed_duration(device_id: int, devices: list, channels: int) -> Optional[bytes]:
+
+def _finish(buf: CaptureBuffer, label: str, segmenter: Optional[_Segmenter] = None) -> Optional[bytes]:
+    """
+    WAV bytes of buf (trimmed to the speech span if enabled), or None if it is silent (MIC_SILENT).
+    With a segmenter, the rest of the recording after its last cut is submitted too.
+    """
+    rms = buf.rms()
+    logger.info("%s: %.2f s, RMS=%.6f", label, buf.n / AUDIO_SAMPLE_RATE, rms)
+    if buf.n >= SAMPLES_PER_FRAME and rms < AUDIO_SILENT_RMS_THRESHOLD:
+        logger.warning("MIC_SILENT: RMS %.6f below threshold %.6f", rms, AUDIO_SILENT_RMS_THRESHOLD)
+        return None
+    start, end = 0, buf.n
+    if AUDIO_TRIM_SILENCE:
+        start, end = buf.speech_bounds(_trim_pad_samples())
+        saved_s = (buf.n - (end - start)) / AUDIO_SAMPLE_RATE
+        metrics.observe("audio.trim.saved_sec", saved_s)
+        metrics.incr("audio.trim.saved_sec_total", saved_s)
+        if buf.speech_start is None:
+            metrics.incr("audio.trim.no_speech_span")
+        logger.info(
+            "Trimmed to speech %.2f-%.2f s of %.2f s (saved %.2f s)",
+            start / AUDIO_SAMPLE_RATE, end / AUDIO_SAMPLE_RATE, buf.n / AUDIO_SAMPLE_RATE, saved_s,
+        )
+    last = segmenter.final(start, end) if segmenter is not None else None
+    wav = buf.wav(start, end)
+    if segmenter is not None:
+        if segmenter.stt.segments == 0:
+            segmenter.stt.submit(wav)  # never cut: the recording is the only segment
+        elif last is not None:
+            segmenter.stt.submit(last)
+    return wav
+
+
+def _record_fixed_duration(
+    session: CaptureSession, channels: int, stt: Optional[SegmentedTranscriber] = None
+) -> Optional[bytes]:
     """Record exactly AUDIO_FIXED_RECORD_SECONDS; return WAV bytes or None if silent."""
     duration_s = max(0.5, min(30.0, AUDIO_FIXED_RECORD_SECONDS))
-    samples_total = int(AUDIO_SAMPLE_RATE * duration_s) * channels
-    rec = sd.rec(samples_total, samplerate=AUDIO_SAMPLE_RATE, channels=channels, dtype="int16", device=device_id)
-    sd.wait()
-    if channels > 1:
-        mono_arr = rec.mean(axis=1).astype(np.int16)
-    else:
-        mono_arr = rec.squeeze()
-    mono_bytes = mono_arr.tobytes()
-    rms = _compute_rms(mono_bytes)
-    logger.info("Fixed record: %.2f s, RMS=%.6f", duration_s, rms)
-    if rms < AUDIO_SILENT_RMS_THRESHOLD:
-        logger.warning("MIC_SILENT: RMS %.6f below threshold %.6f", rms, AUDIO_SILENT_RMS_THRESHOLD)
+    buf = CaptureBuffer(int(AUDIO_SAMPLE_RATE * duration_s), channels)
+    segmenter = _Segmenter(buf, stt) if stt is not None else None
+    # VAD only finds the span to keep and the pauses to cut at
+    vad = webrtcvad.Vad(AUDIO_VAD_AGGRESSIVENESS) if AUDIO_TRIM_SILENCE or segmenter else None
+    if vad is not None:
+        _vad_accepts_memoryview(vad)
+    while not buf.full:
+        if not buf.append_frame(session):
+            logger.warning("Fixed record: input stream stalled")
+            return None
+        if vad is not None:
+            buf.mark(vad.is_speech(buf.last_frame(), AUDIO_SAMPLE_RATE))
+        if segmenter is not None:
+            segmenter.check()
+    return _finish(buf, "Fixed record", segmenter)
+
+
+def _noise_floor(session: CaptureSession, channel: int) -> Optional[float]:
+    """Noise floor (dBFS) of the audio captured before the session, in VAD frames (None: no history)."""
+    history = session.history(int(AUDIO_SAMPLE_RATE * _CALIBRATION_MS / 1000))
+    n_frames = len(history) // SAMPLES_PER_FRAME
+    if n_frames == 0:
         return None
-    return _build_wav_from_mono_bytes(mono_bytes)
-
-
-def _build_wav_from_mono_bytes(mono: bytes) -> bytes:
-    """Build WAV from mono int16 PCM bytes."""
-    if len(mono) == 0:
-        return b""
-    n_frames = len(mono) // 2
-    buf = io.BytesIO()
-    buf.write(b"RIFF")
-    buf.write(struct.pack("<I", 36 + n_frames * 2))
-    buf.write(b"WAVEfmt ")
-    buf.write(struct.pack("<IHHIIHH", 16, 1, 1, AUDIO_SAMPLE_RATE, AUDIO_SAMPLE_RATE * 2, 2, 16))
-    buf.write(b"data")
-    buf.write(struct.pack("<I", n_frames * 2))
-    buf.write(mono)
-    return buf.getvalue()
-
-
-def record_audio() -> Optional[bytes]:
+    history = history[: n_frames * SAMPLES_PER_FRAME].astype(np.float64)
+    mono = history[:, channel] if 0 <= channel < history.shape[1] else history.mean(axis=1)
+    mean_squares = (mono.reshape(n_frames, SAMPLES_PER_FRAME) ** 2).mean(axis=1)
+    return noise_floor_db([energy_db(ms) for ms in mean_squares])
+
+
+def _record_vad(
+    session: CaptureSession, channels: int, adaptive: bool, stt: Optional[SegmentedTranscriber] = None
+) -> Optional[bytes]:
+    """
+    Record until the endpointer detects the end of speech (fixed AUDIO_SILENCE_STOP_MS window, or the
+    adaptive one) or AUDIO_MAX_RECORD_SECONDS of speech; None on speech timeout, stall or silence.
     """
-    Record from configured input. Mode "fixed": record N seconds; mode "vad": VAD start/stop.
-    Returns WAV bytes (16 kHz mono int16) or None on timeout/error/silent.
+    vad = webrtcvad.Vad(AUDIO_VAD_AGGRESSIVENESS)
+    _vad_accepts_memoryview(vad)
+    speech_timeout_frames = max(1, (AUDIO_SPEECH_TIMEOUT_MS + _VAD_FRAME_MS - 1) // _VAD_FRAME_MS)
+    buf = CaptureBuffer(_max_samples(AUDIO_SPEECH_TIMEOUT_MS / 1000.0 + AUDIO_MAX_RECORD_SECONDS), channels)
+    if adaptive:
+        floor_db = _noise_floor(session, buf.channel)
+        endpointer = AdaptiveEndpointer(_VAD_FRAME_MS, floor_db)
+        logger.info("Adaptive endpointing: noise floor %s dBFS", "%.1f" % floor_db if floor_db is not None else "n/a")
+    else:
+        endpointer = FixedSilenceEndpointer(_VAD_FRAME_MS)
+    segmenter = _Segmenter(buf, stt) if stt is not None else None
+    frames_without_speech = 0
+    started_at = 0
+
+    while True:
+        if not buf.append_frame(session):
+            if buf.full:
+                logger.info("Max record duration reached (%.1f s)", AUDIO_MAX_RECORD_SECONDS)
+                return _finish(buf, "VAD record", segmenter)
+            logger.warning("VAD record: input stream stalled")
+            return None
+        vad_speech = vad.is_speech(buf.last_frame(), AUDIO_SAMPLE_RATE)
+        was_started = endpointer.speech_started
+        stop = endpointer.update(vad_speech, buf.last_frame_db() if adaptive else 0.0)
+        buf.mark(endpointer.last_speech)
+        if endpointer.speech_started and not was_started:
+            started_at = buf.n
+            logger.info("Speech detected start")
+        if stop:
+            logger.info("Stop condition reached (%s)", endpointer.reason)
+            if started_at:
+                metrics.observe("audio.endpoint.speech_sec", (buf.n - started_at) / AUDIO_SAMPLE_RATE)
+            return _finish(buf, "VAD record", segmenter)
+        if segmenter is not None:
+            segmenter.check()
+        if not endpointer.speech_started:
+            frames_without_speech += 1
+            if frames_without_speech >= speech_timeout_frames:
+                logger.warning("No speech detected within timeout (%s ms)", AUDIO_SPEECH_TIMEOUT_MS)
+                return None
+
+
+def record_audio(stt: Optional[SegmentedTranscriber] = None) -> Optional[bytes]:
+    """
+    Record from configured input. Mode "fixed": record N seconds; mode "vad": VAD start/stop;
+    mode "adaptive": VAD start, adaptive end-of-speech (core.endpointing).
+    Returns WAV bytes (16 kHz mono int16) or None on timeout/error/silent, or if another recording
+    holds the mic. With stt, the recording is also submitted to it in segments as it is captured (the
+    caller then takes the transcript from stt.finish(), or calls stt.cancel() on None).
     Intended to be run in asyncio.to_thread() so the event loop is not blocked.
     """
     try:
-        device_id = _resolve_input_device()
-        devices = sd.query_devices()
-        dev = devices[device_id] if device_id < len(devices) else {}
-        dev_name = dev.get("name", "?")
-        max_ch = min(dev.get("max_input_channels", 1), max(1, AUDIO_CHANNELS))
-        channels = max(1, max_ch)
-        logger.info("record_audio: device_id=%s name=%s channels=%s mode=%s", device_id, dev_name, channels, AUDIO_RECORD_MODE)
-
-        if AUDIO_RECORD_MODE == "fixed":
-            return _record_fixed_duration(device_id, devices, channels)
-
-        # VAD mode
-        vad = webrtcvad.Vad(2)  # aggressiveness 0–3
-        silence_frames_to_stop = (AUDIO_SILENCE_STOP_MS + _VAD_FRAME_MS - 1) // _VAD_FRAME_MS
-        speech_timeout_frames = max(1, (AUDIO_SPEECH_TIMEOUT_MS + _VAD_FRAME_MS - 1) // _VAD_FRAME_MS)
-        block_size = (AUDIO_SAMPLE_RATE * _VAD_FRAME_MS) // 1000
-        accumulated: list[bytes] = []
-        consecutive_silence = 0
-        speech_started = False
-        frames_without_speech = 0
-
-        with sd.InputStream(
-            device=device_id,
-            samplerate=AUDIO_SAMPLE_RATE,
-            channels=channels,
-            dtype="int16",
-            blocksize=block_size,
-        ) as stream:
-            while True:
-                frame, overflowed = stream.read(block_size)
-                if overflowed:
-                    logger.warning("InputStream overflow")
-                raw_mono = _frame_to_mono(frame, channels)
-                if len(raw_mono) < BYTES_PER_FRAME:
-                    continue
-                for off in range(0, len(raw_mono) - BYTES_PER_FRAME + 1, BYTES_PER_FRAME):
-                    vad_frame = raw_mono[off : off + BYTES_PER_FRAME]
-                    if vad.is_speech(vad_frame, AUDIO_SAMPLE_RATE):
-                        if not speech_started:
-                            speech_started = True
-                            logger.info("Speech detected start")
-                        consecutive_silence = 0
-                    else:
-                        consecutive_silence += 1
-                        if speech_started and consecutive_silence >= silence_frames_to_stop:
-                            logger.info("Stop condition reached (silence frames %s)", consecutive_silence)
-                            accumulated.append(raw_mono[:off])
-                            wav = _build_wav_from_chunks(accumulated)
-                            mono = b"".join(accumulated)
-                            if len(mono) >= BYTES_PER_FRAME and _compute_rms(mono) < AUDIO_SILENT_RMS_THRESHOLD:
-                                logger.warning("MIC_SILENT: VAD segment RMS below threshold")
-                                return None
-                            return wav
-                accumulated.append(raw_mono)
-                if not speech_started:
-                    frames_without_speech += 1
-                    if frames_without_speech >= speech_timeout_frames:
-                        logger.warning("No speech detected within timeout (%s ms)", AUDIO_SPEECH_TIMEOUT_MS)
-                        return None
-                else:
-                    frames_without_speech = 0
+        service = get_capture_service()
+        with service.session() as session:
+            channels = session.channels
+            logger.info(
+                "record_audio: device_id=%s name=%s channels=%s mode=%s",
+                service.device_id, service.device_name, channels, AUDIO_RECORD_MODE,
+            )
+            if AUDIO_RECORD_MODE == "fixed":
+                return _record_fixed_duration(session, channels, stt)
+            return _record_vad(session, channels, AUDIO_RECORD_MODE == "adaptive", stt)
+    except CaptureBusy:
+        logger.warning("MIC_BUSY: another recording is in progress")
+        return None
     except Exception as e:
         logger.exception("Recording failed: %s", e)
         return None
-
-
-def _build_wav_from_chunks(chunks: list[bytes]) -> bytes:
-    """Build mono 16-bit WAV from list of mono PCM chunks."""
-    mono = b"".join(chunks)
-    if len(mono) == 0:
-        return b""
-    n_frames = len(mono) // 2
-    buf = io.BytesIO()
-    buf.write(b"RIFF")
-    buf.write(struct.pack("<I", 36 + n_frames * 2))
-    buf.write(b"WAVEfmt ")
-    buf.write(struct.pack("<IHHIIHH", 16, 1, 1, AUDIO_SAMPLE_RATE, AUDIO_SAMPLE_RATE * 2, 2, 16))
-    buf.write(b"data")
-    buf.write(struct.pack("<I", n_frames * 2))
-    buf.write(mono)
-    return buf.getvalue()
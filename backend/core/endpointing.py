@@ -0,0 +1,176 @@
+"""
+End-of-utterance detection for VAD recording, one decision per VAD frame (no audio I/O here).
+
+FixedSilenceEndpointer is the classic rule: stop after AUDIO_SILENCE_STOP_MS of non-speech once speech
+has started. AdaptiveEndpointer ends capture as soon as the user has plausibly stopped:
+
+- Noise floor: calibrated from audio captured just before the recording (the capture ring buffer),
+  then tracked on frames webrtcvad calls non-speech until speech starts. A webrtcvad "speech" frame
+  only counts if it is also _SPEECH_MARGIN_DB above the floor, so steady background noise (fans, a
+  crowd) cannot keep the recording open.
+- Trailing-silence window: starts at AUDIO_ENDPOINT_MIN_MS for a short answer and grows towards
+  AUDIO_ENDPOINT_MAX_MS as the utterance gets longer (longer turns have longer thinking pauses). It is
+  scaled by the speech rate seen so far (segments per second: slow speakers get more time), and never
+  shorter than 1.25x the longest pause the user has already made and resumed after.
+- False starts: speech must last _START_MS to start the utterance, and a blip shorter than
+  _MIN_UTTERANCE_MS does not end the recording; waiting for speech resumes instead.
+- Hard limit: AUDIO_MAX_RECORD_SECONDS of speech.
+"""
+import math
+from typing import Optional, Sequence
+
+from config import (
+    AUDIO_ENDPOINT_MAX_MS,
+    AUDIO_ENDPOINT_MIN_MS,
+    AUDIO_MAX_RECORD_SECONDS,
+    AUDIO_SILENCE_STOP_MS,
+)
+
+# Frame energies are in dBFS (0 = full scale); digital silence is clamped to this.
+_MIN_DB = -100.0
+_SPEECH_MARGIN_DB = 6.0
+_NOISE_PERCENTILE = 20  # calibration: this percentile of frame energies is the floor
+_NOISE_TRACK = 0.05  # per non-speech frame, before speech starts (EMA weight)
+# The window reaches AUDIO_ENDPOINT_MAX_MS after this much speech.
+_WINDOW_RAMP_MS = 4000
+# Speech segments (runs after a gap of >= _SEGMENT_GAP_MS) per second of utterance at a "normal" pace
+# (webrtcvad's hangover merges most words, so segments are closer to phrases than syllables).
+_NOMINAL_SEGMENTS_PER_SEC = 2.0
+_SEGMENT_GAP_MS = 100
+_RATE_FACTOR_MIN, _RATE_FACTOR_MAX = 0.75, 1.5
+_PAUSE_FACTOR = 1.25
+# Speech starts after this much consecutive (gated) speech; an "utterance" with less voiced audio than
+# _MIN_UTTERANCE_MS when the window expires was a blip, and waiting for speech resumes.
+_START_MS = 60
+_MIN_UTTERANCE_MS = 150
+
+
+def energy_db(mean_square: float) -> float:
+    """dBFS of an int16 frame's mean square."""
+    if mean_square <= 0:
+        return _MIN_DB
+    return max(_MIN_DB, 10.0 * math.log10(mean_square / (32768.0 * 32768.0)))
+
+
+def noise_floor_db(frame_energies_db: Sequence[float]) -> Optional[float]:
+    """Noise floor from frame energies (dBFS): a low percentile, so speech in the history is ignored."""
+    if not frame_energies_db:
+        return None
+    ordered = sorted(frame_energies_db)
+    return ordered[min(len(ordered) - 1, len(ordered) * _NOISE_PERCENTILE // 100)]
+
+
+class FixedSilenceEndpointer:
+    """Stop after silence_ms of non-speech once speech started (the "vad" record mode)."""
+
+    def __init__(self, frame_ms: int, silence_ms: int = AUDIO_SILENCE_STOP_MS) -> None:
+        self.frame_ms = frame_ms
+        self.silence_frames = max(1, (silence_ms + frame_ms - 1) // frame_ms)
+        self.max_speech_frames = int(AUDIO_MAX_RECORD_SECONDS * 1000) // frame_ms
+        self.speech_started = False
+        self.speech_frames = 0
+        self._silence = 0
+        self.last_speech = False  # decision for the latest frame (after any gating)
+        self.reason = ""
+
+    def is_speech(self, vad_speech: bool, frame_db: float) -> bool:
+        return vad_speech
+
+    def update(self, vad_speech: bool, frame_db: float = 0.0) -> bool:
+        """Feed one frame; True when recording should stop."""
+        self.last_speech = self.is_speech(vad_speech, frame_db)
+        if self.last_speech:
+            self.speech_started = True
+            self._silence = 0
+        else:
+            self._silence += 1
+        if not self.speech_started:
+            return False
+        self.speech_frames += 1
+        if self._silence >= self.silence_frames:
+            self.reason = f"silence {self._silence * self.frame_ms} ms"
+            return True
+        if self.speech_frames >= self.max_speech_frames:
+            self.reason = "max duration"
+            return True
+        return False
+
+
+class AdaptiveEndpointer(FixedSilenceEndpointer):
+    """Noise-gated speech, trailing-silence window adapted to utterance length and speech rate."""
+
+    def __init__(
+        self,
+        frame_ms: int,
+        floor_db: Optional[float] = None,
+        min_ms: int = AUDIO_ENDPOINT_MIN_MS,
+        max_ms: int = AUDIO_ENDPOINT_MAX_MS,
+    ) -> None:
+        super().__init__(frame_ms, max_ms)
+        self.floor_db = floor_db
+        self.min_ms = min_ms
+        self.max_ms = max(min_ms, max_ms)
+        self.start_frames = max(1, _START_MS // frame_ms)
+        self._reset()
+
+    def _reset(self) -> None:
+        self.speech_started = False
+        self.speech_frames = 0
+        self.voiced_frames = 0
+        self.segments = 0
+        self.longest_pause_ms = 0
+        self._run = 0
+        self._silence = 0
+
+    def is_speech(self, vad_speech: bool, frame_db: float) -> bool:
+        """webrtcvad's decision, kept only if the frame is clearly above the noise floor (once known)."""
+        if not vad_speech:
+            if not self.speech_started:
+                if self.floor_db is None:
+                    self.floor_db = frame_db
+                else:
+                    self.floor_db += _NOISE_TRACK * (frame_db - self.floor_db)
+            return False
+        return self.floor_db is None or frame_db >= self.floor_db + _SPEECH_MARGIN_DB
+
+    def window_ms(self) -> float:
+        """Current trailing-silence window."""
+        speech_ms = self.voiced_frames * self.frame_ms
+        base = self.min_ms + (self.max_ms - self.min_ms) * min(1.0, speech_ms / _WINDOW_RAMP_MS)
+        spoken_s = (self.speech_frames - self._silence) * self.frame_ms / 1000.0  # up to the last speech
+        if spoken_s >= 1.0 and self.segments:
+            rate = self.segments / spoken_s
+            base *= min(_RATE_FACTOR_MAX, max(_RATE_FACTOR_MIN, _NOMINAL_SEGMENTS_PER_SEC / rate))
+        base = max(base, _PAUSE_FACTOR * self.longest_pause_ms)
+        return min(self.max_ms, max(self.min_ms, base))
+
+    def update(self, vad_speech: bool, frame_db: float = 0.0) -> bool:
+        """Feed one frame; True when recording should stop."""
+        self.last_speech = self.is_speech(vad_speech, frame_db)
+        if not self.speech_started:
+            self._run = self._run + 1 if self.last_speech else 0
+            if self._run >= self.start_frames:
+                self.speech_started = True
+                self.speech_frames = self.voiced_frames = self._run
+                self.segments = 1
+            return False
+        if self.last_speech:
+            if self._silence * self.frame_ms >= _SEGMENT_GAP_MS:
+                self.segments += 1
+            self.longest_pause_ms = max(self.longest_pause_ms, self._silence * self.frame_ms)
+            self.voiced_frames += 1
+            self._silence = 0
+        else:
+            self._silence += 1
+        self.speech_frames += 1
+        window = self.window_ms()
+        if self._silence * self.frame_ms >= window:
+            if self.voiced_frames * self.frame_ms < _MIN_UTTERANCE_MS:
+                self._reset()
+                return False
+            self.reason = f"silence {self._silence * self.frame_ms} ms (window {window:.0f} ms)"
+            return True
+        if self.speech_frames >= self.max_speech_frames:
+            self.reason = "max duration"
+            return True
+        return False
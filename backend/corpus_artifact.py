@@ -0,0 +1,268 @@
+"""
+Versioned on-disk corpus artifact written by ingest (ArtifactWriter) and memory-mapped by the backend.
+
+Layout under RAG_ARTIFACT_DIR:
+    CURRENT                  name of the active version directory (replaced atomically)
+    <version>/manifest.json  model name, dim, dtype, count, content hash
+    <version>/embeddings.npy (n, dim) normalized float32/float16 matrix
+    <version>/texts.npy      uint8 blob of all chunk texts (UTF-8, concatenated)
+    <version>/offsets.npy    int64 (n + 1) byte offsets into texts.npy
+    <version>/ids.npy        fixed-width unicode chunk ids
+    <version>/metadata.json  per-chunk metadata (section, part, departments), optional
+
+Everything is opened with np.load(mmap_mode="r"): loading costs no copy, and worker processes
+on the same host share one set of page-cache pages.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from array import array
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+METADATA_FILE = "metadata.json"
+
+
+class ContentHash:
+    """Incremental content_hash(): update() with consecutive batches of texts, then hexdigest()."""
+
+    def __init__(self) -> None:
+        self._h = hashlib.sha256()
+
+    def update(self, texts: Sequence[str]) -> "ContentHash":
+        for t in texts:
+            self._h.update(t.encode("utf-8"))
+            self._h.update(b"\x00")
+        return self
+
+    def hexdigest(self) -> str:
+        return self._h.hexdigest()
+
+
+def content_hash(texts: Sequence[str]) -> str:
+    """SHA-256 over the ordered chunk texts; identifies a corpus build independent of row ids."""
+    return ContentHash().update(texts).hexdigest()
+
+
+class TextBlob:
+    """Read-only sequence of chunk texts decoded on access from a memory-mapped UTF-8 blob."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray) -> None:
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return max(0, len(self._offsets) - 1)
+
+    def __getitem__(self, i: int) -> str:
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class ArtifactWriter:
+    """
+    Write a new artifact version in batches: append() rows as they are produced, prepare() once all are
+    in, then commit() (or abort()). Embeddings, texts and metadata are spooled to files in a hidden
+    temporary directory, so memory holds one batch plus the ids and offsets; prepare() turns the spools
+    into the .npy files and manifest without loading them, and commit() only moves the finished directory
+    into place and points CURRENT at it. Split this way, ingest can do the slow part before its database
+    commit and publish after it. Readers never see the version before commit(). Raises on I/O errors.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        model_name: str,
+        dim: int,
+        dtype: str = "float32",
+        keep: int = 2,
+        with_metadata: bool = True,
+    ) -> None:
+        self.base = Path(root)
+        self.base.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.keep = keep
+        self.count = 0
+        self._ids: List[str] = []
+        self._offsets = array("q", [0])
+        self._hash = ContentHash()
+        self._prepared = False
+        self._tmp = Path(tempfile.mkdtemp(prefix=".tmp-build-", dir=self.base))
+        self._matrix_f = open(self._tmp / "embeddings.raw", "wb")
+        self._texts_f = open(self._tmp / "texts.raw", "wb")
+        self._meta_f = open(self._tmp / METADATA_FILE, "w", encoding="utf-8") if with_metadata else None
+        if self._meta_f is not None:
+            self._meta_f.write("[")
+
+    def append(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadata: Optional[Sequence[Optional[dict]]] = None,
+    ) -> None:
+        if len(ids) != len(texts) or len(texts) != len(embeddings):
+            raise ValueError("ids, texts and embeddings must have the same length")
+        if not texts:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(texts), self.dim)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._matrix_f.write((matrix / norms).astype(self.dtype).tobytes())
+        for t in texts:
+            b = t.encode("utf-8")
+            self._texts_f.write(b)
+            self._offsets.append(self._offsets[-1] + len(b))
+        if self._meta_f is not None:
+            for m in metadata if metadata is not None else [None] * len(texts):
+                self._meta_f.write(("," if self.count else "") + json.dumps(m, ensure_ascii=False))
+                self.count += 1
+        else:
+            self.count += len(texts)
+        self._ids.extend(str(i) for i in ids)
+        self._hash.update(texts)
+
+    def prepare(self) -> None:
+        """Write the .npy files and manifest into the temporary directory; nothing is published yet."""
+        if self._prepared:
+            return
+        chash = self._hash.hexdigest()
+        tmp = self._tmp
+        self._close()
+        if self._meta_f is not None:
+            with open(tmp / METADATA_FILE, "a", encoding="utf-8") as f:
+                f.write("]")
+        _spool_to_npy(tmp / "embeddings.raw", tmp / "embeddings.npy", self.dtype, (self.count, self.dim))
+        _spool_to_npy(tmp / "texts.raw", tmp / "texts.npy", np.dtype(np.uint8), (self._offsets[-1],))
+        np.save(tmp / "offsets.npy", np.frombuffer(self._offsets, dtype=np.int64))
+        np.save(tmp / "ids.npy", np.asarray(self._ids, dtype=str))
+        manifest = {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "model_name": self.model_name,
+            "dim": self.dim,
+            "dtype": str(self.dtype),
+            "count": self.count,
+            "content_hash": chash,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        (tmp / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        self._prepared = True
+
+    def commit(self) -> str:
+        """
+        Publish the version (prepare() first if needed): move it into place and point CURRENT at it;
+        older versions beyond `keep` are removed. Returns its name.
+        """
+        self.prepare()
+        chash = self._hash.hexdigest()
+        tmp = self._tmp
+        base = self.base
+        stem = f"{time.strftime('%Y%m%d%H%M%S')}-{chash[:12]}"
+        version, n = stem, 0
+        while (base / version).exists():
+            n += 1
+            version = f"{stem}-{n}"
+        os.replace(tmp, base / version)
+
+        pointer_tmp = base / f".{CURRENT_FILE}.tmp"
+        pointer_tmp.write_text(version, encoding="utf-8")
+        os.replace(pointer_tmp, base / CURRENT_FILE)
+
+        versions = sorted(p for p in base.iterdir() if p.is_dir() and not p.name.startswith("."))
+        for old in versions[: max(0, len(versions) - max(1, self.keep))]:
+            if old.name != version:
+                shutil.rmtree(old, ignore_errors=True)
+        return version
+
+    def abort(self) -> None:
+        """Drop the unpublished version (prepared or not)."""
+        self._close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+    def _close(self) -> None:
+        for f in (self._matrix_f, self._texts_f, self._meta_f):
+            if f is not None and not f.closed:
+                f.close()
+
+
+def _spool_to_npy(raw: Path, out: Path, dtype: np.dtype, shape: tuple) -> None:
+    """Prefix a raw C-order spool file with an .npy header, copying it in chunks."""
+    with open(out, "wb") as dst:
+        header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": shape}
+        np.lib.format.write_array_header_1_0(dst, header)
+        with open(raw, "rb") as src:
+            shutil.copyfileobj(src, dst, 1 << 20)
+    raw.unlink()
+
+
+def _current_dir(root: str) -> Optional[Path]:
+    pointer = Path(root) / CURRENT_FILE
+    try:
+        name = pointer.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    path = Path(root) / name
+    return path if name and path.is_dir() else None
+
+
+def read_manifest(root: str) -> Optional[dict]:
+    """Return the manifest of the CURRENT version, or None if there is no readable artifact."""
+    path = _current_dir(root)
+    if path is None:
+        return None
+    try:
+        manifest = json.loads((path / MANIFEST_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.warning("Corpus artifact manifest unreadable in %s: %s", path, e)
+        return None
+    if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def load_artifact(root: str) -> Optional[VectorIndex]:
+    """
+    Memory-map the CURRENT artifact as a VectorIndex (version = content hash).
+    Returns None if missing or inconsistent. Never raises.
+    """
+    path = _current_dir(root)
+    manifest = read_manifest(root)
+    if path is None or manifest is None:
+        return None
+    try:
+        matrix = np.load(path / "embeddings.npy", mmap_mode="r")
+        blob = np.load(path / "texts.npy", mmap_mode="r")
+        offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        ids = np.load(path / "ids.npy", mmap_mode="r")
+        texts = TextBlob(blob, offsets)
+        metadata = None
+        if (path / METADATA_FILE).is_file():
+            metadata = json.loads((path / METADATA_FILE).read_text(encoding="utf-8"))
+        if matrix.shape != (manifest["count"], manifest["dim"]) or len(texts) != manifest["count"]:
+            logger.warning("Corpus artifact %s does not match its manifest; ignoring", path)
+            return None
+        return VectorIndex(
+            ids, texts, matrix, version=manifest["content_hash"], normalized=True, metadata=metadata
+        )
+    except Exception as e:
+        logger.warning("Corpus artifact load failed (%s): %s", path, e)
+        return None
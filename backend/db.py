@@ -3,75 +3,259 @@
 import logging
 import threading
 import time
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
+import metrics
 from config import (
+    PGVECTOR_HNSW_EF_SEARCH,
+    PGVECTOR_IVFFLAT_PROBES,
+    PGVECTOR_STORAGE,
+    POSTGRES_CONNECT_TIMEOUT_SEC,
     POSTGRES_DB,
     POSTGRES_HOST,
+    POSTGRES_RECONNECT_MAX_SEC,
+    POSTGRES_RECONNECT_MIN_SEC,
     POSTGRES_PASSWORD,
+    POSTGRES_POOL_MAX,
+    POSTGRES_POOL_MIN,
+    POSTGRES_POOL_TIMEOUT_SEC,
+    POSTGRES_POOL_VALIDATE_IDLE_SEC,
     POSTGRES_PORT,
     POSTGRES_USER,
 )
 
 logger = logging.getLogger(__name__)
 
-# Sentinel when pool init failed; backend continues without DB. Never raise on init.
-_POOL_FAILED = object()
-_POOL_RETRY_INTERVAL_SEC = 10.0
-_last_pool_failure_time: Optional[float] = None
+# Pool state, never raised to callers: "connecting" until the first attempt, then "up" or "down".
+# While down, a background thread reconnects with exponential backoff and callers get "unavailable"
+# immediately instead of waiting on a connect.
+_pool: Optional[Any] = None
 _pool_lock = threading.Lock()
+_pool_state = "connecting"
+_pool_state_since = time.time()
+_pool_last_error: Optional[str] = None
+_reconnect_thread: Optional[threading.Thread] = None
 
-_pool: Optional[Any] = None
 
+class ReconnectBackoff:
+    """
+    Reconnect schedule shared by the psycopg2 pool here and the async pool in tools/async_db.py: the delay
+    before the next attempt starts at POSTGRES_RECONNECT_MIN_SEC and doubles up to
+    POSTGRES_RECONNECT_MAX_SEC. Not locked; each user serializes its own attempts.
+    """
 
-def _get_pool():
+    def __init__(self, min_sec: float = POSTGRES_RECONNECT_MIN_SEC, max_sec: float = POSTGRES_RECONNECT_MAX_SEC):
+        self.min_sec = min_sec
+        self.max_sec = max_sec
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new outage (or end one): no attempts yet, next delay is the minimum."""
+        self.attempts = 0
+        self.next_retry_at: Optional[float] = None
+        self._delay = self.min_sec
+
+    def schedule(self) -> float:
+        """Schedule the next attempt after a failure; returns the delay and sets next_retry_at."""
+        delay = self._delay
+        self._delay = min(self._delay * 2, self.max_sec)
+        self.next_retry_at = time.time() + delay
+        return delay
+
+    def due(self) -> bool:
+        """True if no attempt is scheduled or its time has come."""
+        return self.next_retry_at is None or time.time() >= self.next_retry_at
+
+
+_backoff = ReconnectBackoff()
+
+# Query parameters are cast to the column type (vector or halfvec) so the cosine index applies;
+# stored embeddings are read back as float32 vectors either way.
+_VECTOR_PARAM = f"CAST(%s AS {PGVECTOR_STORAGE})"
+_EMBEDDING_READ = "embedding::vector"
+
+
+def _create_pool():
     """
-    Lazy pool creation. On first success returns pool. On failure: do NOT raise,
-    set _pool = _POOL_FAILED, log, return None. Retry every POOL_RETRY_INTERVAL_SEC
-    on subsequent calls when pool is failed.
+    Build the thread-safe pool: psycopg2's ThreadedConnectionPool (SimpleConnectionPool is not safe across
+    threads) with a bounded wait for a free connection, validation of stale connections on checkout, and the
+    pgvector types registered once per connection when it is opened rather than on every checkout.
+    Raises on failure (e.g. server down, vector extension missing).
     """
-    global _pool, _last_pool_failure_time
-    with _pool_lock:
-        if _pool is not None and _pool is not _POOL_FAILED:
-            return _pool
-        if _pool is _POOL_FAILED:
-            now = time.time()
-            if _last_pool_failure_time is not None and (now - _last_pool_failure_time) < _POOL_RETRY_INTERVAL_SEC:
-                return None
-        try:
-            import psycopg2.pool as pg2pool
-            from pgvector.psycopg2 import register_vector
+    import psycopg2.extensions as pg2ext
+    import psycopg2.pool as pg2pool
+    from pgvector.psycopg2 import register_vector
 
-            pool = pg2pool.SimpleConnectionPool(
-                minconn=1,
-                maxconn=5,
-                host=POSTGRES_HOST,
-                port=POSTGRES_PORT,
-                dbname=POSTGRES_DB,
-                user=POSTGRES_USER,
-                password=POSTGRES_PASSWORD or None,
-            )
-            conn = pool.getconn()
+    class VectorConnection(pg2ext.connection):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.origin_pool = None  # set on checkout; put_connection returns the connection there
+            register_vector(self)
+            self.rollback()  # end the transaction the type lookup opened
+
+    class VectorConnectionPool(pg2pool.ThreadedConnectionPool):
+        def __init__(self, minconn, maxconn, timeout, validate_idle, **kwargs):
+            self._slots = threading.BoundedSemaphore(maxconn)
+            self._timeout = timeout
+            self._validate_idle = validate_idle
+            self._returned_at = {}
+            super().__init__(minconn, maxconn, connection_factory=VectorConnection, **kwargs)
+
+        def _usable(self, conn) -> bool:
+            if conn.closed:
+                return False
+            idle = time.monotonic() - self._returned_at.pop(id(conn), 0.0)
+            if self._validate_idle < 0 or idle < self._validate_idle:
+                return True
             try:
-                register_vector(conn)
-            finally:
-                pool.putconn(conn)
+                cur = conn.cursor()
+                cur.execute("SELECT 1")
+                cur.close()
+                conn.rollback()
+                return True
+            except Exception:
+                return False
+
+        def getconn(self, key=None):
+            if not self._slots.acquire(timeout=self._timeout):
+                raise pg2pool.PoolError(f"no free connection within {self._timeout:.1f}s (max {self.maxconn})")
+            try:
+                for _ in range(self.maxconn + 1):
+                    conn = super().getconn(key)
+                    if self._usable(conn):
+                        conn.origin_pool = self
+                        return conn
+                    logger.info("Discarding stale PostgreSQL connection")
+                    super().putconn(conn, close=True)
+                raise pg2pool.PoolError("no usable connection")
+            except Exception:
+                self._slots.release()
+                raise
+
+        def putconn(self, conn=None, key=None, close=False):
+            self._returned_at[id(conn)] = time.monotonic()
+            super().putconn(conn, key, close)
+            if conn.closed:
+                self._returned_at.pop(id(conn), None)
+            self._slots.release()
+
+    return VectorConnectionPool(
+        POSTGRES_POOL_MIN,
+        POSTGRES_POOL_MAX,
+        POSTGRES_POOL_TIMEOUT_SEC,
+        POSTGRES_POOL_VALIDATE_IDLE_SEC,
+        host=POSTGRES_HOST,
+        port=POSTGRES_PORT,
+        dbname=POSTGRES_DB,
+        user=POSTGRES_USER,
+        password=POSTGRES_PASSWORD or None,
+        connect_timeout=POSTGRES_CONNECT_TIMEOUT_SEC,
+    )
+
+
+def _set_state(state: str, error: Optional[str] = None) -> None:
+    """Record a pool state transition (logged, counted in metrics as db.pool.<state>). Call with _pool_lock held."""
+    global _pool_state, _pool_state_since, _pool_last_error
+    _pool_last_error = error
+    if state == _pool_state:
+        return
+    logger.info("PostgreSQL pool: %s -> %s", _pool_state, state)
+    _pool_state, _pool_state_since = state, time.time()
+    metrics.incr(f"db.pool.{state}")
+
+
+def _reconnect_loop() -> None:
+    """Background reconnect: retry pool creation with exponential backoff (_backoff) until it succeeds."""
+    global _pool, _reconnect_thread
+    while True:
+        time.sleep(_backoff.schedule())
+        _backoff.attempts += 1
+        metrics.incr("db.pool.reconnect_attempts")
+        try:
+            pool = _create_pool()
+        except Exception as e:
+            with _pool_lock:
+                _set_state("down", str(e).strip())
+            logger.debug("PostgreSQL reconnect attempt %d failed: %s", _backoff.attempts, e)
+            continue
+        with _pool_lock:
             _pool = pool
-            _last_pool_failure_time = None
+            _reconnect_thread = None
+            _backoff.next_retry_at = None
+            _set_state("up")
+        logger.info("PostgreSQL reconnected after %d attempt(s).", _backoff.attempts)
+        return
+
+
+def _mark_down(error: Exception, failed_pool: Optional[Any] = None) -> None:
+    """
+    Drop the pool after a connection-level failure and start the background reconnect (at most one
+    thread). Connections still checked out are closed with the pool; their callers fail soft.
+    failed_pool: the pool the failure came from; ignored if it has already been replaced.
+    """
+    global _pool, _reconnect_thread
+    with _pool_lock:
+        if failed_pool is not None and _pool is not failed_pool:
+            return
+        pool, _pool = _pool, None
+        _set_state("down", str(error).strip())
+        if _reconnect_thread is None:
+            _backoff.reset()
+            _reconnect_thread = threading.Thread(target=_reconnect_loop, name="db-reconnect", daemon=True)
+            _reconnect_thread.start()
+    if pool is not None:
+        try:
+            pool.closeall()
+        except Exception:
+            pass
+
+
+def _get_pool():
+    """
+    Return the pool, or None while PostgreSQL is unavailable. Never raises and never waits on a connect
+    except once: the first call creates the pool inline (bounded by POSTGRES_CONNECT_TIMEOUT_SEC) so
+    scripts can use the DB straight away. Concurrent callers during that attempt, and all callers while
+    down, get None immediately; the background reconnect restores the pool.
+    """
+    global _pool
+    pool = _pool
+    if pool is not None or _pool_state != "connecting":
+        return pool
+    if not _pool_lock.acquire(blocking=False):
+        return None
+    try:
+        if _pool is not None or _pool_state != "connecting":
+            return _pool
+        try:
+            _pool = _create_pool()
+            _set_state("up")
             return _pool
         except Exception as e:
             logger.warning("PostgreSQL pool init failed: %s", e, exc_info=True)
             logger.warning("PostgreSQL unavailable. Running in LLM-only fallback mode.")
-            _pool = _POOL_FAILED
-            _last_pool_failure_time = time.time()
-            return None
+            failure = e
+    finally:
+        _pool_lock.release()
+    _mark_down(failure)
+    return None
 
 
 def is_db_available() -> bool:
-    """Return True if pool is initialized and usable. Triggers lazy init/retry."""
+    """Return True if pool is initialized and usable. Triggers the first connect; never blocks after it."""
     return _get_pool() is not None
 
 
+def pool_status() -> dict:
+    """Pool state for /health: state (connecting / up / down), since, last error and reconnect progress."""
+    status = {"state": _pool_state, "since": round(_pool_state_since, 3)}
+    if _pool_state == "down":
+        status["last_error"] = _pool_last_error
+        status["reconnect_attempts"] = _backoff.attempts
+        if _backoff.next_retry_at is not None:
+            status["next_retry_in_sec"] = round(max(0.0, _backoff.next_retry_at - time.time()), 1)
+    return status
+
+
 def log_db_status() -> None:
     """
     Log DB host, port, user, db name and whether pool was created successfully.
@@ -92,25 +276,40 @@ def log_db_status() -> None:
 
 
 def get_connection():
-    """Get a connection from the pool. Raises RuntimeError if pool unavailable."""
+    """
+    Get a connection from the pool (waits up to POSTGRES_POOL_TIMEOUT_SEC when all are in use).
+    Raises RuntimeError if pool unavailable. Always return it with put_connection.
+    """
     pool = _get_pool()
     if pool is None:
-        raise RuntimeError("PostgreSQL not available (pool init failed)")
+        raise RuntimeError("PostgreSQL not available")
     try:
-        from pgvector.psycopg2 import register_vector
-        conn = pool.getconn()
-        register_vector(conn)
-        return conn
+        return pool.getconn()
     except Exception as e:
         logger.debug("DB get_connection failed: %s", e)
+        import psycopg2
+
+        if isinstance(e, psycopg2.OperationalError):
+            # Opening a connection failed: the server is gone. Reconnect in the background.
+            _mark_down(e, pool)
         raise
 
 
 def put_connection(conn: Any) -> None:
-    """Return a connection to the pool."""
-    if _pool is not None and _pool is not _POOL_FAILED and conn is not None:
+    """
+    Return a connection to the pool it was checked out from. If that pool has been closed meanwhile
+    (dropped by _mark_down, possibly already replaced), the connection is closed instead.
+    """
+    if conn is None:
+        return
+    pool = getattr(conn, "origin_pool", None)
+    try:
+        if pool is None or pool.closed:
+            raise RuntimeError("connection pool closed")
+        pool.putconn(conn)
+    except Exception:
         try:
-            _pool.putconn(conn)
+            conn.close()
         except Exception:
             pass
 
@@ -160,9 +359,24 @@ def get_document_count() -> int:
         return 0
 
 
-def get_similar_contents(embedding: List[float], top_k: int) -> List[str]:
+def get_similar_chunks(
+    embedding: List[float],
+    top_k: int,
+    with_embeddings: bool = False,
+    filters: Optional[dict] = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    exact: bool = False,
+) -> List[tuple]:
     """
-    Return top_k content strings from college_knowledge by cosine similarity.
+    Return up to top_k (id, content, distance, token_count) rows from college_knowledge, nearest first.
+    distance is cosine distance (<=>, matching the vector_cosine_ops index): similarity = 1 - distance.
+    token_count is the chunk's token count recorded at ingest (metadata), None for older corpora.
+    with_embeddings=True appends each row's stored embedding: (id, content, distance, token_count, embedding).
+    filters restricts the search to rows whose metadata contains it (metadata @> filters, e.g.
+    {"departments": ["ECE"]}); served by the GIN index idx_college_metadata, then ranked exactly.
+    ef_search (HNSW) / probes (IVFFlat) override PGVECTOR_HNSW_EF_SEARCH / PGVECTOR_IVFFLAT_PROBES
+    for this query only; exact=True bypasses the ANN index (sequential scan, for recall checks).
     Returns empty list on any error or if DB unavailable.
     """
     if not embedding or top_k <= 0:
@@ -172,18 +386,38 @@ def get_similar_contents(embedding: List[float], top_k: int) -> List[str]:
         return []
     conn = None
     try:
-        from pgvector.psycopg2 import register_vector
         from pgvector import Vector
+        from psycopg2.extras import Json
 
         conn = get_connection()
         cur = conn.cursor()
+        # Transaction-local settings: they end with this query's transaction.
         cur.execute(
-            "SELECT content FROM college_knowledge ORDER BY embedding <-> %s LIMIT %s",
-            (Vector(embedding), top_k),
+            "SELECT set_config('hnsw.ef_search', %s, true), set_config('ivfflat.probes', %s, true)",
+            (
+                str(ef_search or PGVECTOR_HNSW_EF_SEARCH),
+                str(probes or PGVECTOR_IVFFLAT_PROBES),
+            ),
+        )
+        if exact or filters:
+            # An ANN index scan would filter after the approximate top-k and can return too few rows.
+            cur.execute("SELECT set_config('enable_indexscan', 'off', true)")
+        query_vec = Vector(embedding)
+        extra = f", {_EMBEDDING_READ}" if with_embeddings else ""
+        where, params = "", [query_vec]
+        if filters:
+            where = " WHERE metadata @> %s"
+            params.append(Json(filters))
+        cur.execute(
+            f"SELECT id, content, embedding <=> {_VECTOR_PARAM} AS distance, "
+            f"(metadata->>'token_count')::int{extra} FROM college_knowledge{where} "
+            f"ORDER BY embedding <=> {_VECTOR_PARAM} LIMIT %s",
+            (*params, query_vec, top_k),
         )
         rows = cur.fetchall()
+        conn.commit()
         cur.close()
-        return [r[0] for r in rows if r[0] is not None]
+        return [(str(r[0]), r[1], float(r[2])) + tuple(r[3:]) for r in rows if r[1] is not None]
     except Exception as e:
         if conn:
             try:
@@ -197,57 +431,371 @@ def get_similar_contents(embedding: List[float], top_k: int) -> List[str]:
             put_connection(conn)
 
 
-def truncate_college_knowledge() -> bool:
-    """Truncate college_knowledge table. Returns True on success."""
+def get_similar_contents(embedding: List[float], top_k: int) -> List[str]:
+    """
+    Return top_k content strings from college_knowledge by cosine similarity.
+    Returns empty list on any error or if DB unavailable.
+    """
+    return [row[1] for row in get_similar_chunks(embedding, top_k)]
+
+
+def _insert_rows(
+    cur, rows: List[tuple], upsert: bool = False, page_size: int = 500, table: str = "college_knowledge"
+) -> None:
+    """Multi-row INSERT of (id, content, embedding, metadata) rows; upsert=True replaces rows with the same id."""
+    from pgvector import Vector
+    from psycopg2.extras import Json, execute_values
+
+    conflict = (
+        " ON CONFLICT (id) DO UPDATE SET content = EXCLUDED.content, embedding = EXCLUDED.embedding, "
+        "metadata = EXCLUDED.metadata"
+        if upsert
+        else ""
+    )
+    execute_values(
+        cur,
+        f"INSERT INTO {table} (id, content, embedding, metadata) VALUES %s{conflict}",
+        [
+            (doc_id, content, Vector(embedding), Json(metadata) if metadata is not None else None)
+            for doc_id, content, embedding, metadata in rows
+        ],
+        template=f"(%s, %s, {_VECTOR_PARAM}, %s)",
+        page_size=page_size,
+    )
+
+
+_SHADOW_TABLE = "college_knowledge_shadow"
+
+
+class CorpusWriter:
+    """
+    Streamed corpus write for ingest: add() batches of (id, content, embedding, metadata) rows as they
+    are embedded, then commit() (or abort()). Readers see nothing until commit().
+
+    full=True replaces the whole corpus without downtime: rows go into a shadow table, and commit()
+    builds its indexes there, then in one short transaction drops college_knowledge, renames the shadow
+    into place, records info (the corpus version pointer, e.g. content_hash) and NOTIFYs CORPUS_CHANNEL.
+    full=False upserts rows into college_knowledge inside one open transaction; commit() deletes
+    removed ids, rewrites metadata of rows whose text is unchanged and records info in it, so the new
+    version becomes visible all at once.
+
+    Holds one pooled connection from begin() to commit()/abort(). Methods return False on error after
+    rolling back (the live table is untouched); they never raise.
+    """
+
+    def __init__(self, full: bool, page_size: int = 500) -> None:
+        self.full = full
+        self.page_size = page_size
+        self.count = 0
+        self._conn = None
+        self._table = _SHADOW_TABLE if full else "college_knowledge"
+
+    def begin(self) -> bool:
+        if not is_db_available():
+            return False
+        try:
+            self._conn = get_connection()
+            if self.full:
+                cur = self._conn.cursor()
+                cur.execute(f"DROP TABLE IF EXISTS {_SHADOW_TABLE}")
+                # Same columns, types (vector/halfvec) and defaults; indexes are built after the load.
+                cur.execute(
+                    f"CREATE TABLE {_SHADOW_TABLE} (LIKE college_knowledge INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                )
+                cur.close()
+            return True
+        except Exception as e:
+            self._fail("Corpus write setup failed", e)
+            return False
+
+    def add(self, rows: List[tuple]) -> bool:
+        if self._conn is None:
+            return False
+        if not rows:
+            return True
+        try:
+            cur = self._conn.cursor()
+            _insert_rows(cur, rows, upsert=not self.full, page_size=self.page_size, table=self._table)
+            cur.close()
+            self.count += len(rows)
+            return True
+        except Exception as e:
+            self._fail("Corpus batch write failed", e)
+            return False
+
+    def commit(
+        self,
+        delete_ids: Optional[List[str]] = None,
+        metadata_updates: Optional[Dict[str, dict]] = None,
+        info: Optional[dict] = None,
+    ) -> bool:
+        if self._conn is None:
+            return False
+        try:
+            cur = self._conn.cursor()
+            if self.full:
+                self._swap_in_shadow(cur)
+            else:
+                self._apply_changes(cur, delete_ids, metadata_updates)
+            _publish_corpus_info(cur, info)
+            self._conn.commit()
+            cur.close()
+            put_connection(self._conn)
+            self._conn = None
+            return True
+        except Exception as e:
+            self._fail("Corpus swap failed" if self.full else "Incremental corpus update failed", e)
+            return False
+
+    def abort(self) -> None:
+        if self._conn is not None:
+            self._fail("", None)
+
+    def _swap_in_shadow(self, cur) -> None:
+        from config import PGVECTOR_INDEX
+        from schema import METADATA_INDEX_NAME, VECTOR_INDEX_NAME, vector_index_sql
+
+        cur.execute(f"ALTER TABLE {_SHADOW_TABLE} ADD CONSTRAINT {_SHADOW_TABLE}_pkey PRIMARY KEY (id)")
+        cur.execute(
+            f"CREATE INDEX {METADATA_INDEX_NAME}_shadow ON {_SHADOW_TABLE} USING GIN (metadata jsonb_path_ops)"
+        )
+        sql = vector_index_sql(
+            PGVECTOR_INDEX, self.count, PGVECTOR_STORAGE, _SHADOW_TABLE, f"{VECTOR_INDEX_NAME}_shadow"
+        )
+        if sql:
+            cur.execute(sql)
+        cur.execute(f"ANALYZE {_SHADOW_TABLE}")
+        self._conn.commit()
+
+        cur.execute("DROP TABLE college_knowledge")
+        cur.execute(f"ALTER TABLE {_SHADOW_TABLE} RENAME TO college_knowledge")
+        cur.execute(f"ALTER TABLE college_knowledge RENAME CONSTRAINT {_SHADOW_TABLE}_pkey TO college_knowledge_pkey")
+        cur.execute(f"ALTER INDEX {METADATA_INDEX_NAME}_shadow RENAME TO {METADATA_INDEX_NAME}")
+        if sql:
+            cur.execute(f"ALTER INDEX {VECTOR_INDEX_NAME}_shadow RENAME TO {VECTOR_INDEX_NAME}")
+
+    @staticmethod
+    def _apply_changes(cur, delete_ids: Optional[List[str]], metadata_updates: Optional[Dict[str, dict]]) -> None:
+        from psycopg2.extras import Json, execute_values
+
+        if delete_ids:
+            cur.execute("DELETE FROM college_knowledge WHERE id = ANY(%s::uuid[])", (list(delete_ids),))
+        if metadata_updates:
+            execute_values(
+                cur,
+                "UPDATE college_knowledge AS t SET metadata = v.metadata::jsonb "
+                "FROM (VALUES %s) AS v(id, metadata) WHERE t.id = v.id::uuid",
+                [(doc_id, Json(meta)) for doc_id, meta in metadata_updates.items()],
+            )
+
+    def _fail(self, what: str, error: Optional[Exception]) -> None:
+        """Roll back, drop the shadow table and release the connection."""
+        conn, self._conn = self._conn, None
+        if error is not None:
+            logger.warning("%s: %s", what, error)
+        if conn is None:
+            return
+        try:
+            conn.rollback()
+            if self.full:
+                conn.cursor().execute(f"DROP TABLE IF EXISTS {_SHADOW_TABLE}")
+                conn.commit()
+        except Exception:
+            pass
+        put_connection(conn)
+
+
+def get_chunk_metadata_by_id() -> Optional[Dict[str, Optional[dict]]]:
+    """Return {id: metadata} for every row of college_knowledge (ingest diff). None on error or if DB unavailable."""
     if not is_db_available():
-        return False
+        return None
+    rows = run_query("SELECT id, metadata FROM college_knowledge", fetch=True)
+    if rows is None:
+        return None
+    return {str(r[0]): r[1] for r in rows}
+
+
+def get_chunk_embeddings(ids: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Return {id: embedding} (numpy arrays) for the given college_knowledge ids; ids without a row are
+    absent. None on error or if DB unavailable.
+    """
+    if not is_db_available():
+        return None
+    if not ids:
+        return {}
+    rows = run_query(
+        f"SELECT id, {_EMBEDDING_READ} FROM college_knowledge WHERE id = ANY(%s::uuid[])",
+        (list(ids),),
+        fetch=True,
+    )
+    if rows is None:
+        return None
+    return {str(r[0]): r[1] for r in rows if r[1] is not None}
+
+
+# NOTIFY channel for corpus changes; the payload is the new content hash.
+CORPUS_CHANNEL = "college_knowledge_version"
+
+_CORPUS_INFO_DDL = (
+    "CREATE TABLE IF NOT EXISTS college_knowledge_info ("
+    "key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at TIMESTAMP DEFAULT NOW())"
+)
+
+
+def get_corpus_info() -> dict:
+    """
+    Return corpus metadata recorded at ingest (embedding_model, embedding_dim, embedding_backend, ...)
+    as a dict of strings. Empty dict if the table is missing, empty, or DB unavailable.
+    """
+    if not is_db_available():
+        return {}
     conn = None
     try:
         conn = get_connection()
         cur = conn.cursor()
-        cur.execute("TRUNCATE college_knowledge")
-        conn.commit()
+        cur.execute("SELECT to_regclass('college_knowledge_info')")
+        if cur.fetchone()[0] is None:
+            cur.close()
+            return {}
+        cur.execute("SELECT key, value FROM college_knowledge_info")
+        rows = cur.fetchall()
         cur.close()
-        return True
+        return {k: v for k, v in rows}
     except Exception as e:
         if conn:
             try:
                 conn.rollback()
             except Exception:
                 pass
-        logger.warning("DB truncate failed: %s", e)
-        return False
+        logger.warning("DB corpus info read failed: %s", e)
+        return {}
     finally:
         if conn:
             put_connection(conn)
 
 
-def insert_college_chunk(doc_id: str, content: str, embedding: List[float]) -> bool:
-    """Insert one row into college_knowledge. Returns True on success, False on error."""
+def _upsert_corpus_info(cur, info: dict) -> None:
+    cur.execute(_CORPUS_INFO_DDL)
+    for key, value in info.items():
+        cur.execute(
+            "INSERT INTO college_knowledge_info (key, value, updated_at) VALUES (%s, %s, NOW()) "
+            "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = NOW()",
+            (key, str(value)),
+        )
+
+
+def _publish_corpus_info(cur, info: Optional[dict]) -> None:
+    """Record corpus info in the caller's transaction and NOTIFY listeners (delivered on commit)."""
+    if not info:
+        return
+    _upsert_corpus_info(cur, info)
+    cur.execute("SELECT pg_notify(%s, %s)", (CORPUS_CHANNEL, str(info.get("content_hash", ""))))
+
+
+def get_stored_embedding_dim() -> Optional[int]:
+    """Return the dimension of stored embeddings (from one row), or None if empty/unavailable."""
+    rows = run_query(f"SELECT vector_dims({_EMBEDDING_READ}) FROM college_knowledge WHERE embedding IS NOT NULL LIMIT 1", fetch=True)
+    if not rows:
+        return None
+    try:
+        return int(rows[0][0])
+    except (IndexError, TypeError, ValueError):
+        return None
+
+
+def get_all_chunks() -> List[tuple]:
+    """
+    Return all (id, content, embedding, metadata) rows from college_knowledge, for building the
+    in-process index. Embedding is a numpy array (pgvector adapter), metadata a dict or None.
+    Returns empty list on any error or if DB unavailable.
+    """
+    if not is_db_available():
+        return []
+    rows = run_query(
+        f"SELECT id, content, {_EMBEDDING_READ}, metadata FROM college_knowledge "
+        "WHERE embedding IS NOT NULL ORDER BY id",
+        fetch=True,
+    )
+    return [(str(r[0]), r[1], r[2], r[3]) for r in rows or [] if r[1] is not None]
+
+
+_listen_conn: Optional[Any] = None
+# Longest single select() in wait_for_corpus_change, i.e. how late it notices a stop request.
+_LISTEN_SLICE_SEC = 0.5
+
+
+def _idle(timeout: float, stop: Optional[threading.Event]) -> None:
+    """Sleep timeout seconds, or until stop is set."""
+    if stop is None:
+        time.sleep(timeout)
+    else:
+        stop.wait(timeout)
+
+
+def wait_for_corpus_change(timeout: float, stop: Optional[threading.Event] = None) -> bool:
+    """
+    Block up to timeout seconds for a NOTIFY on CORPUS_CHANNEL (sent when ingest commits a new corpus).
+    Uses one dedicated autocommit connection outside the pool. Returns True if notified; on timeout,
+    while PostgreSQL is unavailable (after sleeping the timeout), or as soon as stop is set, False.
+    The socket is polled in slices of _LISTEN_SLICE_SEC so a worker thread blocked here exits promptly
+    at shutdown. Never raises.
+    """
+    global _listen_conn
     if not is_db_available():
+        _idle(timeout, stop)
         return False
-    conn = None
     try:
-        from pgvector.psycopg2 import register_vector
-        from pgvector import Vector
+        import select
 
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO college_knowledge (id, content, embedding, metadata) VALUES (%s, %s, %s, %s)",
-            (doc_id, content, Vector(embedding), None),
-        )
-        conn.commit()
-        cur.close()
-        return True
+        import psycopg2
+
+        if _listen_conn is None or _listen_conn.closed:
+            _listen_conn = psycopg2.connect(
+                host=POSTGRES_HOST,
+                port=POSTGRES_PORT,
+                dbname=POSTGRES_DB,
+                user=POSTGRES_USER,
+                password=POSTGRES_PASSWORD or None,
+                connect_timeout=POSTGRES_CONNECT_TIMEOUT_SEC,
+            )
+            _listen_conn.autocommit = True
+            _listen_conn.cursor().execute(f"LISTEN {CORPUS_CHANNEL}")
+        deadline = time.monotonic() + timeout
+        while not _listen_conn.notifies:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (stop is not None and stop.is_set()):
+                return False
+            if select.select([_listen_conn], [], [], min(remaining, _LISTEN_SLICE_SEC)) != ([], [], []):
+                _listen_conn.poll()
+        notified = bool(_listen_conn.notifies)
+        _listen_conn.notifies.clear()
+        return notified
     except Exception as e:
-        if conn:
+        logger.debug("Corpus LISTEN failed: %s", e)
+        if _listen_conn is not None:
             try:
-                conn.rollback()
+                _listen_conn.close()
             except Exception:
                 pass
-        logger.warning("Insert failed: %s", e)
+        _listen_conn = None
+        _idle(timeout, stop)
         return False
-    finally:
-        if conn:
-            put_connection(conn)
+
+
+def get_corpus_version() -> Optional[str]:
+    """
+    Return the content hash recorded by ingest in college_knowledge_info, or (for corpora ingested
+    before it was recorded) a cheap fingerprint of row count + latest created_at.
+    Changes whenever ingest rewrites the table. None if DB unavailable or on error.
+    """
+    if not is_db_available():
+        return None
+    recorded = get_corpus_info().get("content_hash")
+    if recorded:
+        return recorded
+    rows = run_query("SELECT COUNT(*), MAX(created_at) FROM college_knowledge", fetch=True)
+    if not rows:
+        return None
+    count, latest = rows[0]
+    return f"{count}:{latest.isoformat() if latest is not None else ''}"
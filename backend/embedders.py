@@ -0,0 +1,146 @@
+"""
+Pluggable embedding backends behind rag.generate_embedding.
+
+- "torch": sentence-transformers on PyTorch (reference quality, heavy on RAM).
+- "onnx-int8": ONNX Runtime with a dynamically int8-quantized export of the same model
+  (CPU-only kiosks). Produce the export with tools/export_onnx_embedder.py.
+
+Select with EMBEDDING_BACKEND in .env. All backends return L2-normalized float32 rows.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Type
+
+import numpy as np
+
+from config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_DIM,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_ONNX_DIR,
+    EMBEDDING_THREADS,
+)
+
+logger = logging.getLogger(__name__)
+
+ONNX_MODEL_FILE = "model_int8.onnx"
+ONNX_TOKENIZER_FILE = "tokenizer.json"
+ONNX_MANIFEST_FILE = "embedder.json"
+
+
+class Embedder:
+    """Embedding backend interface. encode() returns an (n, dim) float32, L2-normalized array."""
+
+    backend = ""
+
+    def __init__(self, model_name: str, dim: int) -> None:
+        self.model_name = model_name
+        self.dim = dim
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+def _l2_normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (mat / norms).astype(np.float32, copy=False)
+
+
+class TorchEmbedder(Embedder):
+    """sentence-transformers model on PyTorch."""
+
+    backend = "torch"
+
+    def __init__(self, model_name: str, dim: int) -> None:
+        super().__init__(model_name, dim)
+        from sentence_transformers import SentenceTransformer
+
+        if EMBEDDING_THREADS > 0:
+            import torch
+
+            torch.set_num_threads(EMBEDDING_THREADS)
+        self._model = SentenceTransformer(model_name)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vecs = self._model.encode(texts, normalize_embeddings=True, batch_size=max(1, len(texts)))
+        return np.asarray(vecs, dtype=np.float32)
+
+
+class OnnxInt8Embedder(Embedder):
+    """
+    ONNX Runtime (CPUExecutionProvider) on an int8-quantized export. Reads the export
+    directory written by tools/export_onnx_embedder.py: model, tokenizer.json and embedder.json
+    (model name, dim, pooling, max_length).
+    """
+
+    backend = "onnx-int8"
+
+    def __init__(self, model_name: str, dim: int, onnx_dir: str = EMBEDDING_ONNX_DIR) -> None:
+        super().__init__(model_name, dim)
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        root = Path(onnx_dir)
+        manifest = json.loads((root / ONNX_MANIFEST_FILE).read_text(encoding="utf-8"))
+        if manifest.get("model_name") != model_name or int(manifest.get("dim", 0)) != dim:
+            raise ValueError(
+                f"ONNX export in {root} is {manifest.get('model_name')}/{manifest.get('dim')}, "
+                f"expected {model_name}/{dim}"
+            )
+        self._pooling = manifest.get("pooling", "cls")
+        self._tokenizer = Tokenizer.from_file(str(root / ONNX_TOKENIZER_FILE))
+        self._tokenizer.enable_truncation(max_length=int(manifest.get("max_length", 512)))
+        self._tokenizer.enable_padding()
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if EMBEDDING_THREADS > 0:
+            opts.intra_op_num_threads = EMBEDDING_THREADS
+        self._session = ort.InferenceSession(
+            str(root / manifest.get("model_file", ONNX_MODEL_FILE)),
+            sess_options=opts,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self._session.run(None, feeds)[0]
+        if self._pooling == "mean":
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        else:
+            pooled = hidden[:, 0]
+        return _l2_normalize(pooled)
+
+
+EMBEDDER_BACKENDS: Dict[str, Type[Embedder]] = {
+    TorchEmbedder.backend: TorchEmbedder,
+    OnnxInt8Embedder.backend: OnnxInt8Embedder,
+}
+
+
+def register_embedder(name: str, cls: Type[Embedder]) -> None:
+    """Register an additional backend under name (selectable via EMBEDDING_BACKEND)."""
+    EMBEDDER_BACKENDS[name] = cls
+
+
+def create_embedder(
+    backend: str = EMBEDDING_BACKEND,
+    model_name: str = EMBEDDING_MODEL_NAME,
+    dim: int = EMBEDDING_DIM,
+) -> Embedder:
+    """Instantiate the configured backend. Raises ValueError for an unknown backend name."""
+    cls = EMBEDDER_BACKENDS.get(backend)
+    if cls is None:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; choose from {sorted(EMBEDDER_BACKENDS)}")
+    logger.info("Loading embedder backend=%s model=%s dim=%d", backend, model_name, dim)
+    return cls(model_name, dim)
@@ -0,0 +1,124 @@
+"""Micro-batching embedding worker: coalesces concurrent encode requests into one model call."""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class EmbeddingBatcher:
+    """
+    Background worker that collects embedding requests for up to max_wait_ms (or until
+    max_batch_size texts are queued), encodes them with a single encode_fn call and resolves
+    each request's Future with its own vector.
+
+    encode_fn receives a list of texts and must return one vector per text, in order.
+    Only the worker thread calls encode_fn, one batch at a time; if the model is also used outside
+    the batcher, encode_fn must serialize those calls itself (rag._encode_batch holds a lock).
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], Sequence[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        name: str = "embedding-batcher",
+    ) -> None:
+        self._encode_fn = encode_fn
+        self._max_batch_size = max(1, int(max_batch_size))
+        self._max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._name = name
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+
+    def start(self) -> None:
+        """Start the worker thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Ask the worker to finish queued requests and exit."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def submit(self, text: str) -> "Future[List[float]]":
+        """Queue text for embedding; returns a Future resolved with the vector (list of floats)."""
+        self.start()
+        fut: "Future[List[float]]" = Future()
+        self._queue.put((text, fut))
+        return fut
+
+    def encode(self, text: str, timeout: Optional[float] = None) -> List[float]:
+        """Blocking helper: submit and wait for the vector. Re-raises encode errors."""
+        return self.submit(text).result(timeout)
+
+    def stats(self) -> dict:
+        """Return batch counters (batches, items, largest_batch, avg_batch)."""
+        batches = self._batches
+        return {
+            "batches": batches,
+            "items": self._items,
+            "largest_batch": self._largest_batch,
+            "avg_batch": (self._items / batches) if batches else 0.0,
+        }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stopping = True
+                    break
+                batch.append(nxt)
+            self._process(batch)
+
+    def _process(self, batch: list) -> None:
+        live = [(text, fut) for text, fut in batch if fut.set_running_or_notify_cancel()]
+        if not live:
+            return
+        texts = [text for text, _ in live]
+        try:
+            vectors = self._encode_fn(texts)
+        except Exception as e:
+            logger.warning("Embedding batch of %d failed: %s", len(texts), e)
+            for _, fut in live:
+                fut.set_exception(e)
+            return
+        if len(vectors) != len(live):
+            err = RuntimeError(f"encode_fn returned {len(vectors)} vectors for {len(live)} texts")
+            for _, fut in live:
+                fut.set_exception(err)
+            return
+        self._batches += 1
+        self._items += len(live)
+        self._largest_batch = max(self._largest_batch, len(live))
+        for (_, fut), vec in zip(live, vectors):
+            fut.set_result(vec.tolist() if hasattr(vec, "tolist") else list(vec))
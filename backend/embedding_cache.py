@@ -0,0 +1,66 @@
+"""
+On-disk embedding cache for ingest (SQLite): chunk embeddings keyed by (model, backend,
+chunking.text_hash), so an unchanged chunk is never embedded twice by the same embedder, whatever its
+position in the file, and switching EMBEDDING_BACKEND (torch <-> onnx-int8) never serves the other
+backend's vectors. Vectors are stored as raw float32 bytes. Single-process use (the ingest script).
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS embeddings ("
+    "model TEXT NOT NULL, backend TEXT NOT NULL, hash TEXT NOT NULL, "
+    "dim INTEGER NOT NULL, vector BLOB NOT NULL, PRIMARY KEY (model, backend, hash))"
+)
+_LOOKUP_BATCH = 500  # stay under SQLite's bound-parameter limit
+
+
+class EmbeddingCache:
+    """Embeddings by (model, backend, hash) in a SQLite file. Use as a context manager or call close()."""
+
+    def __init__(self, path: str, model: str, backend: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.model = model
+        self.backend = backend
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def get_many(self, hashes: Sequence[str], dim: int) -> Dict[str, np.ndarray]:
+        """Cached vectors for the given hashes (entries with another dimension are ignored)."""
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        for i in range(0, len(unique), _LOOKUP_BATCH):
+            batch = unique[i : i + _LOOKUP_BATCH]
+            rows = self._conn.execute(
+                f"SELECT hash, vector FROM embeddings WHERE model = ? AND backend = ? AND dim = ? "
+                f"AND hash IN ({','.join('?' * len(batch))})",
+                (self.model, self.backend, dim, *batch),
+            )
+            for h, blob in rows:
+                found[h] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, hashes: Sequence[str], vectors: List[np.ndarray]) -> None:
+        """Store vectors (one transaction)."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, backend, hash, dim, vector) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (self.model, self.backend, h, len(v), np.asarray(v, dtype=np.float32).tobytes())
+                    for h, v in zip(hashes, vectors)
+                ],
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "EmbeddingCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
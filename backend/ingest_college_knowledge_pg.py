@@ -1,125 +1,250 @@
 """
-Ingest college_knowledge.txt into PostgreSQL (pgvector): chunk, embed locally, and store.
-Run once after schema init or when college_knowledge.txt is updated.
-
-Usage (from project root): python -m backend.ingest_college_knowledge_pg
+Ingest college_knowledge.txt, plus any *.txt / *.md under COLLEGE_KNOWLEDGE_DIR (departmental documents,
+circulars, FAQs), into PostgreSQL (pgvector): chunk, embed locally, and store. Run once after schema init
+or when a source changes. Files are chunked in parallel worker processes and streamed to the embedder
+(ingest_pipeline.py); each chunk records its source file in metadata.
+
+Incremental by default: chunk ids are derived from content (chunking.chunk_ids), so the table is
+diffed against the sources as they are chunked and only added chunks are embedded (embedding cache at
+EMBEDDING_CACHE_PATH, keyed by model and backend). Each embedded batch is written straight out, so
+memory stays flat: upserts go into one open transaction that also applies the deletes. --full streams
+everything into a shadow table that is swapped in atomically. Either way the new content_hash (the corpus version) is recorded in the
+same transaction and announced with NOTIFY, so running backends switch over without a restart.
+
+Usage (from project root): python -m backend.ingest_college_knowledge_pg [--full] [--source-dir DIR] [--workers N]
 Or from backend dir: python ingest_college_knowledge_pg.py
 """
 
-import re
+import argparse
 import sys
-import uuid
+import time
 from pathlib import Path
 
+import numpy as np
+
 # Ensure backend is on path when run as script or -m
 _BACKEND_DIR = Path(__file__).resolve().parent
 if str(_BACKEND_DIR) not in sys.path:
     sys.path.insert(0, str(_BACKEND_DIR))
 
-from config import COLLEGE_KNOWLEDGE_PATH
-from db import insert_college_chunk, truncate_college_knowledge
-from rag import generate_embedding
-
-# Chunking (same as original ingest)
-MAX_CHUNK_CHARS = 700
-OVERLAP_CHARS = 80
-SECTION_SEP = "________________________________________"
-
-
-def _strip_comments(content: str) -> str:
-    """Remove leading comment lines (# or <!-- ... -->)."""
-    lines = []
-    in_comment = False
-    for line in content.splitlines():
-        s = line.strip()
-        if s.startswith("<!--"):
-            in_comment = True
-        if in_comment:
-            if "-->" in s:
-                in_comment = False
-            continue
-        if s.startswith("#") and not s.startswith("# "):
-            continue
-        lines.append(line)
-    return "\n".join(lines)
-
-
-def _split_into_chunks(text: str) -> list[str]:
+from chunking import chunk_ids, text_hash
+from config import (
+    COLLEGE_KNOWLEDGE_DIR,
+    COLLEGE_KNOWLEDGE_PATH,
+    EMBEDDING_BACKEND,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_DIM,
+    EMBEDDING_MODEL_NAME,
+    INGEST_BATCH_SIZE,
+    INGEST_QUEUE_BATCHES,
+    INGEST_WORKERS,
+    RAG_ARTIFACT_DIR,
+    RAG_ARTIFACT_DTYPE,
+    RAG_ARTIFACT_KEEP,
+)
+from corpus_artifact import ArtifactWriter, ContentHash
+from db import CorpusWriter, get_chunk_embeddings, get_chunk_metadata_by_id, get_corpus_info
+from embedding_cache import EmbeddingCache
+from ingest_pipeline import discover_sources, iter_chunk_batches
+from schema import apply_migrations, ensure_vector_index, ensure_vector_storage
+from rag import generate_embeddings
+
+
+def _embed_with_cache(cache: EmbeddingCache, chunks: list[str], hashes: list[str]) -> tuple:
+    """Embeddings for one batch as an (n, dim) array, embedding only texts missing from the cache. Returns (matrix, n embedded)."""
+    cached = cache.get_many(hashes, EMBEDDING_DIM)
+    missing = list(dict.fromkeys(h for h in hashes if h not in cached))
+    if missing:
+        text_by_hash = dict(zip(hashes, chunks))
+        vectors = generate_embeddings([text_by_hash[h] for h in missing], batch_size=INGEST_BATCH_SIZE)
+        cache.put_many(missing, list(vectors))
+        cached.update(zip(missing, vectors))
+    return np.vstack([cached[h] for h in hashes]).astype(np.float32, copy=False), len(missing)
+
+
+def _batch_embeddings(cache: EmbeddingCache, texts: list[str], ids: list[str], existing: dict, full: bool) -> tuple:
     """
-    Split text into chunks: first by section separator, then by size with overlap.
-    Preserves meaningful boundaries (paragraphs) where possible.
+    Embeddings for one batch, in order. Only chunks that are new to the table (all of them with full)
+    are embedded (through the cache); unchanged ones reuse the vector stored in PostgreSQL.
+    Returns (matrix, n embedded, n needing an embedding).
     """
-    normalized = text.replace("\r\n", "\n").strip()
-    sections = re.split(re.escape(SECTION_SEP), normalized)
-    sections = [s.strip() for s in sections if s.strip()]
-
-    chunks = []
-    for section in sections:
-        parts = re.split(r"\n\s*\n", section)
-        current = []
-        current_len = 0
-        for part in parts:
-            part = part.strip()
-            if not part:
-                continue
-            part_len = len(part) + (2 if current else 0)
-            if current_len + part_len <= MAX_CHUNK_CHARS and current:
-                current.append(part)
-                current_len += part_len
-            else:
-                if current:
-                    chunk_text = "\n\n".join(current)
-                    chunks.append(chunk_text)
-                    if len(chunk_text) > OVERLAP_CHARS:
-                        overlap = chunk_text[-OVERLAP_CHARS:].split("\n", 1)[-1]
-                        current = [overlap.strip()] if overlap.strip() else []
-                        current_len = len(current[0]) if current else 0
-                    else:
-                        current = []
-                        current_len = 0
-                if current:
-                    current.append(part)
-                    current_len = len("\n\n".join(current))
-                else:
-                    current = [part]
-                    current_len = len(part)
-        if current:
-            chunks.append("\n\n".join(current))
-    return [c for c in chunks if c.strip()]
+    reuse = [doc_id for doc_id in ids if not full and doc_id in existing]
+    stored = get_chunk_embeddings(reuse) if reuse else {}
+    if stored is None:
+        raise RuntimeError("could not read stored embeddings from college_knowledge")
+    matrix = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    fresh = []
+    for i, doc_id in enumerate(ids):
+        if doc_id in stored:
+            matrix[i] = stored[doc_id]
+        else:
+            fresh.append(i)
+    embedded = 0
+    if fresh:
+        fresh_texts = [texts[i] for i in fresh]
+        matrix[fresh], embedded = _embed_with_cache(cache, fresh_texts, [text_hash(t) for t in fresh_texts])
+    return matrix, embedded, len(fresh)
 
 
 def main() -> None:
-    path = Path(COLLEGE_KNOWLEDGE_PATH)
-    if not path.is_file():
-        print(f"Error: College knowledge file not found: {path}")
+    parser = argparse.ArgumentParser(description="Ingest the college knowledge sources into PostgreSQL (pgvector).")
+    parser.add_argument("--full", action="store_true", help="re-embed and reload every chunk (replaces the table)")
+    parser.add_argument("--source-dir", default=COLLEGE_KNOWLEDGE_DIR, help="directory of extra *.txt / *.md sources")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="chunking processes (0 = CPU count)")
+    args = parser.parse_args()
+
+    sources = discover_sources(COLLEGE_KNOWLEDGE_PATH, args.source_dir)
+    if not sources:
+        print(f"Error: No knowledge sources found ({COLLEGE_KNOWLEDGE_PATH}, {args.source_dir or 'no source dir'})")
         sys.exit(1)
 
-    content = path.read_text(encoding="utf-8")
-    content = _strip_comments(content)
-    chunks = _split_into_chunks(content)
-    if not chunks:
-        print("Error: No chunks produced. Check file content.")
+    if not apply_migrations() or not ensure_vector_storage():
+        print("Error: Could not apply schema migrations. Check PostgreSQL.")
+        sys.exit(1)
+    existing = get_chunk_metadata_by_id()
+    if existing is None:
+        print("Error: Could not read college_knowledge. Check PostgreSQL.")
         sys.exit(1)
 
-    if not truncate_college_knowledge():
-        print("Error: Could not truncate college_knowledge table. Check PostgreSQL.")
+    # Stored vectors are only reusable if they come from the same model and backend.
+    recorded = get_corpus_info()
+    recorded_embedder = (recorded.get("embedding_model"), recorded.get("embedding_backend") or EMBEDDING_BACKEND)
+    full = args.full or (bool(existing) and recorded_embedder != (EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND))
+    if full and not args.full:
+        print(
+            f"Embedder changed ({'/'.join(map(str, recorded_embedder))} -> {EMBEDDING_MODEL_NAME}/{EMBEDDING_BACKEND}): "
+            "full re-ingest."
+        )
+
+    # Files are chunked in worker processes (same chunker as the in-process index; metadata carries
+    # token_count and source). Each batch gets its content ids as it arrives, is diffed against the
+    # table right away so only added chunks are embedded (cache misses only), and is then written out:
+    # rows to the database (shadow table or open transaction), vectors and texts to the artifact.
+    # Only ids and the metadata diff are kept across batches.
+    writer = CorpusWriter(full)
+    if not writer.begin():
+        print("Error: Could not start writing college_knowledge. Check PostgreSQL.")
+        sys.exit(1)
+    # Artifact alongside: prepared before the database commit and published right after it, so when the
+    # NOTIFY for the new version arrives the backend can map it instead of reading every row back from
+    # PostgreSQL, and a failed commit never leaves a published artifact behind.
+    artifact = ArtifactWriter(
+        RAG_ARTIFACT_DIR, EMBEDDING_MODEL_NAME, EMBEDDING_DIM, dtype=RAG_ARTIFACT_DTYPE, keep=RAG_ARTIFACT_KEEP
+    )
+    t_start = time.perf_counter()
+    stats, new_ids, changed_meta = [], set(), {}
+    chash = ContentHash()
+    seen: dict = {}
+    added = embedded = needed = 0
+    embed_s = load_s = 0.0
+    try:
+        with EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND) as cache:
+            for batch in iter_chunk_batches(sources, INGEST_BATCH_SIZE, args.workers, INGEST_QUEUE_BATCHES, stats):
+                texts = [c for c, _ in batch]
+                metas = [m for _, m in batch]
+                ids = chunk_ids(texts, seen)
+                t0 = time.perf_counter()
+                matrix, n, fresh = _batch_embeddings(cache, texts, ids, existing, full)
+                embed_s += time.perf_counter() - t0
+                embedded += n
+                needed += fresh
+
+                rows = [r for r in zip(ids, texts, matrix, metas) if full or r[0] not in existing]
+                t0 = time.perf_counter()
+                if not writer.add(rows):
+                    raise RuntimeError("could not write chunks to college_knowledge")
+                load_s += time.perf_counter() - t0
+                added += len(rows)
+                if artifact is not None:
+                    try:
+                        artifact.append(ids, texts, matrix, metas)
+                    except Exception as e:
+                        print(f"Warning: Could not write corpus artifact: {e}")
+                        artifact.abort()
+                        artifact = None
+                if not full:
+                    changed_meta.update(
+                        (doc_id, meta) for doc_id, meta in zip(ids, metas)
+                        if doc_id in existing and existing[doc_id] != meta
+                    )
+                new_ids.update(ids)
+                chash.update(texts)
+    except Exception as e:
+        writer.abort()
+        if artifact is not None:
+            artifact.abort()
+        print(f"Error: Ingest failed: {e}")
+        sys.exit(1)
+    pipeline_s = time.perf_counter() - t_start
+    failed = [st for st in stats if st.error]
+    for st in failed:
+        print(f"Error: Could not read {st.source}: {st.error}")
+    total = sum(st.chunks for st in stats)
+    if failed or not total:
+        # Ingesting without a source would delete its chunks from the table.
+        writer.abort()
+        if artifact is not None:
+            artifact.abort()
+        if not failed:
+            print("Error: No chunks produced. Check file content.")
         sys.exit(1)
 
-    inserted = 0
-    for chunk in chunks:
-        doc_id = str(uuid.uuid4())
+    total_bytes = sum(st.bytes for st in stats)
+    for st in stats:
+        print(f"  {st.source}: {st.chunks} chunks, {st.tokens} tokens, {st.bytes / 1024:.1f} KiB, chunked in {st.chunk_ms:.0f} ms")
+    print(
+        f"Sources: {len(stats)} files, {total_bytes / 1024:.1f} KiB -> {total} chunks in {pipeline_s:.2f}s "
+        f"({total / max(pipeline_s, 1e-9):.0f} chunks/s, {total_bytes / 1048576 / max(pipeline_s, 1e-9):.2f} MiB/s)"
+    )
+
+    # Written in the same transaction as the rows: content_hash is the version pointer the backend follows.
+    info = {
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "embedding_dim": EMBEDDING_DIM,
+        "embedding_backend": EMBEDDING_BACKEND,
+        "content_hash": chash.hexdigest(),
+    }
+    if artifact is not None:
         try:
-            embedding = generate_embedding(chunk)
+            artifact.prepare()
         except Exception as e:
-            print(f"Error: Embedding failed: {e}")
-            sys.exit(1)
-        if insert_college_chunk(doc_id, chunk, embedding):
-            inserted += 1
-        else:
-            print(f"Error: Insert failed for chunk {inserted + 1}")
-            sys.exit(1)
-
-    print(f"Ingested {inserted} chunks from {path} into PostgreSQL (college_knowledge).")
+            artifact.abort()
+            artifact = None
+            print(f"Warning: Could not write corpus artifact: {e}")
+
+    removed = list(existing) if full else [doc_id for doc_id in existing if doc_id not in new_ids]
+    t0 = time.perf_counter()
+    if not writer.commit(removed, changed_meta, info):
+        if artifact is not None:
+            artifact.abort()
+        print("Error: Could not write chunks to college_knowledge. Check PostgreSQL.")
+        sys.exit(1)
+    load_s += time.perf_counter() - t0
+    if artifact is not None:
+        try:
+            version = artifact.commit()
+            print(f"Wrote corpus artifact {version} ({RAG_ARTIFACT_DTYPE}) to {RAG_ARTIFACT_DIR}")
+        except Exception as e:
+            artifact.abort()
+            print(f"Warning: Could not write corpus artifact: {e}")
+    print(
+        f"Chunks: {added} added, {len(removed)} removed, {total - added} unchanged "
+        f"({len(changed_meta)} with new metadata){' [full]' if full else ''}"
+    )
+    print(
+        f"Embedded {embedded} new chunk texts ({needed - embedded} from the cache) in {embed_s:.2f}s"
+        + (f" ({embedded / max(embed_s, 1e-9):.0f} chunks/s, batch {INGEST_BATCH_SIZE})" if embedded else "")
+        + f"; database write {load_s:.2f}s"
+        + (f" ({added / max(load_s, 1e-9):.0f} rows/s)" if added else "")
+    )
+
+    if not ensure_vector_index():
+        print("Warning: Could not build the vector index (searches will scan the table).")
+
+    print(
+        f"Ingested {total} chunks from {len(sources)} source(s) into PostgreSQL (college_knowledge) "
+        f"in {time.perf_counter() - t_start:.2f}s."
+    )
 
 
 if __name__ == "__main__":
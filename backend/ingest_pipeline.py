@@ -0,0 +1,150 @@
+"""
+Streaming multi-source ingest: discover knowledge files, read and chunk them in worker processes,
+and hand chunks to the embedder in bounded batches.
+
+Files are chunked in parallel (ProcessPoolExecutor) but results are consumed in discovery order, so
+the corpus order, and with it chunk ids and the content hash, does not depend on scheduling. A
+producer thread slices chunked files into batches and blocks on a bounded queue when the embedder
+falls behind; only a few files per worker are submitted ahead of it. At most queue_batches batches
+wait in memory, plus the chunked files in flight.
+Every chunk's metadata records its source file ("source") and position in it ("source_chunk").
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from chunking import load_knowledge_chunks_with_metadata
+
+SOURCE_SUFFIXES = (".txt", ".md")
+# Files submitted to the chunking pool ahead of the consumer, per worker.
+_FILES_AHEAD_PER_WORKER = 2
+
+
+@dataclass
+class SourceStats:
+    """Per-file provenance and chunking cost."""
+
+    source: str
+    bytes: int
+    chunks: int
+    tokens: int
+    chunk_ms: float
+    error: Optional[str] = None
+
+
+def discover_sources(path: str, directory: str = "") -> List[Tuple[str, str]]:
+    """
+    (absolute path, source name) of every file to ingest: path (if it exists), then *.txt / *.md under
+    directory (recursive, sorted). Source names are relative to directory (the file name for path).
+    """
+    found: List[Tuple[str, str]] = []
+    seen = set()
+    if path and Path(path).is_file():
+        p = Path(path).resolve()
+        found.append((str(p), p.name))
+        seen.add(p)
+    if directory and Path(directory).is_dir():
+        root = Path(directory).resolve()
+        for p in sorted(root.rglob("*")):
+            if p.is_file() and p.suffix.lower() in SOURCE_SUFFIXES and p.resolve() not in seen:
+                found.append((str(p.resolve()), p.relative_to(root).as_posix()))
+                seen.add(p.resolve())
+    return found
+
+
+def _chunk_source(item: Tuple[str, str]) -> Tuple[List[Tuple[str, dict]], SourceStats]:
+    """Worker: chunk one file and stamp provenance into each chunk's metadata. Never raises."""
+    path, source = item
+    t0 = time.perf_counter()
+    try:
+        annotated = load_knowledge_chunks_with_metadata(path)
+    except Exception as e:
+        return [], SourceStats(source, 0, 0, 0, (time.perf_counter() - t0) * 1000.0, error=str(e))
+    for i, (_, meta) in enumerate(annotated):
+        meta["source"] = source
+        meta["source_chunk"] = i
+    stats = SourceStats(
+        source,
+        os.path.getsize(path),
+        len(annotated),
+        sum(meta.get("token_count", 0) for _, meta in annotated),
+        (time.perf_counter() - t0) * 1000.0,
+    )
+    return annotated, stats
+
+
+def _bounded_map(pool: ProcessPoolExecutor, sources: List[Tuple[str, str]], ahead: int):
+    """pool.map(_chunk_source, sources) in order, with at most `ahead` files submitted but not yet consumed."""
+    pending: deque = deque()
+    todo = iter(sources)
+    for item in todo:
+        pending.append(pool.submit(_chunk_source, item))
+        if len(pending) >= ahead:
+            break
+    while pending:
+        result = pending.popleft().result()
+        item = next(todo, None)
+        if item is not None:
+            pending.append(pool.submit(_chunk_source, item))
+        yield result
+
+
+def iter_chunk_batches(
+    sources: List[Tuple[str, str]],
+    batch_size: int,
+    workers: int = 0,
+    queue_batches: int = 4,
+    stats: Optional[List[SourceStats]] = None,
+) -> Iterator[List[Tuple[str, dict]]]:
+    """
+    Yield lists of up to batch_size (chunk, metadata) in corpus order while later files are still being
+    chunked. workers: chunking processes (0 = CPU count; 1 = in this process). Per-file SourceStats are
+    appended to stats as files finish. Re-raises a producer failure in the consumer.
+    """
+    workers = workers or os.cpu_count() or 1
+    out: "queue.Queue" = queue.Queue(maxsize=max(1, queue_batches))
+    done = object()
+    failure: List[BaseException] = []
+
+    def produce() -> None:
+        try:
+            if workers > 1 and len(sources) > 1:
+                n = min(workers, len(sources))
+                with ProcessPoolExecutor(max_workers=n) as pool:
+                    _forward(_bounded_map(pool, sources, n * _FILES_AHEAD_PER_WORKER))
+            else:
+                _forward(map(_chunk_source, sources))
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            out.put(done)
+
+    def _forward(results) -> None:
+        pending: List[Tuple[str, dict]] = []
+        for annotated, file_stats in results:
+            if stats is not None:
+                stats.append(file_stats)
+            pending.extend(annotated)
+            while len(pending) >= batch_size:
+                out.put(pending[:batch_size])
+                pending = pending[batch_size:]
+        if pending:
+            out.put(pending)
+
+    producer = threading.Thread(target=produce, name="ingest-chunker", daemon=True)
+    producer.start()
+    while True:
+        item = out.get()
+        if item is done:
+            break
+        yield item
+    producer.join()
+    if failure:
+        raise failure[0]
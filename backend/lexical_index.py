@@ -0,0 +1,117 @@
+"""BM25 inverted index over the college knowledge chunks (lexical fast path and hybrid retrieval)."""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Question words and fillers that carry no lookup signal for kiosk queries.
+STOPWORDS = frozenset(
+    "a an and are about at be by can do does for from give how i in is it me of on or please "
+    "show svit tell the this to what when where which who why with you your college".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords; trailing plural 's' stripped (fees -> fee)."""
+    out = []
+    for tok in _TOKEN_RE.findall((text or "").lower()):
+        if tok in STOPWORDS:
+            continue
+        if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        out.append(tok)
+    return out
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of texts. Per-term postings hold precomputed BM25 weights, so a
+    query is a handful of vectorized adds into one score array: microseconds for this corpus.
+    """
+
+    def __init__(
+        self,
+        texts: Sequence[str],
+        ids: Optional[Sequence[str]] = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+        version: str = "",
+    ) -> None:
+        self.texts = list(texts)
+        self.ids = [str(i) for i in ids] if ids is not None else [str(i) for i in range(len(self.texts))]
+        self.version = version
+        n = len(self.texts)
+        doc_tokens = [tokenize(t) for t in self.texts]
+        doc_len = np.array([len(toks) for toks in doc_tokens], dtype=np.float32)
+        avgdl = float(doc_len.mean()) if n and doc_len.mean() > 0 else 1.0
+        tfs: Dict[str, Dict[int, int]] = {}
+        for i, toks in enumerate(doc_tokens):
+            for tok in toks:
+                tfs.setdefault(tok, {}).setdefault(i, 0)
+                tfs[tok][i] += 1
+        self._doc_terms = [set(toks) for toks in doc_tokens]
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, by_doc in tfs.items():
+            docs = np.fromiter(by_doc.keys(), dtype=np.int32, count=len(by_doc))
+            tf = np.fromiter(by_doc.values(), dtype=np.float32, count=len(by_doc))
+            idf = np.log(1.0 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = k1 * (1.0 - b + b * doc_len[docs] / avgdl)
+            self._postings[term] = (docs, (idf * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32))
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """Return up to top_k (doc index, BM25 score) with score > 0, best first."""
+        n = len(self.texts)
+        terms = set(tokenize(query))
+        if n == 0 or top_k <= 0 or not terms:
+            return []
+        scores = np.zeros(n, dtype=np.float32)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+        k = min(top_k, n)
+        idx = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        return [(int(i), float(scores[i])) for i in idx if scores[i] > 0]
+
+    def coverage(self, query: str, doc: int) -> float:
+        """Fraction of the query's distinct terms that occur in doc (0..1)."""
+        terms = set(tokenize(query))
+        if not terms:
+            return 0.0
+        return len(terms & self._doc_terms[doc]) / len(terms)
+
+    def is_decisive(
+        self,
+        query: str,
+        hits: List[Tuple[int, float]],
+        min_score: float,
+        min_ratio: float,
+        min_coverage: float,
+    ) -> bool:
+        """
+        True when the top lexical hit clearly wins: score >= min_score, at least min_ratio times the
+        runner-up, and it contains at least min_coverage of the query terms.
+        """
+        if not hits:
+            return False
+        top = hits[0][1]
+        second = hits[1][1] if len(hits) > 1 else 0.0
+        if top < min_score or (second > 0 and top < min_ratio * second):
+            return False
+        return self.coverage(query, hits[0][0]) >= min_coverage
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], top_k: int, k: int = 60) -> List[str]:
+    """Fuse ranked lists of keys (best first) by reciprocal rank: sum 1 / (k + rank)."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return [key for key, _ in sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:top_k]]
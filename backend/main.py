@@ -6,6 +6,7 @@ import logging
 import os
 import sys
 import tempfile
+import threading
 import uuid
 from contextlib import asynccontextmanager
 from pathlib import Path
@@ -22,24 +23,40 @@ from config import (
     HOST,
     PORT,
     FRONTEND_URL,
+    RAG_CORPUS_NOTIFY,
+    RAG_CORPUS_POLL_SEC,
+    RAG_ENGINE,
+    RAG_LOCAL_FALLBACK,
     RAG_MODEL,
+    RAG_RETRIEVAL_MODE,
     RAG_TOP_K,
     SARVAM_API_KEY,
+    STT_LOCAL_PRELOAD,
+    STT_STREAMING,
     TARGET_LANGUAGE_CODES,
     LANGUAGE_NAME_TO_CODE_KEY,
 )
 from greetings import GREETINGS
-from db import log_db_status
-from rag import get_relevant_context, get_rag_document_count
+from db import log_db_status, pool_status, wait_for_corpus_change
+import metrics
+from rag import (
+    check_corpus_compatibility,
+    get_relevant_context,
+    get_rag_document_count,
+    sync_corpus_version,
+)
 from answer_generation import (
     INTENT_COLLEGE_OVERVIEW,
+    INTENT_DEPARTMENT_OVERVIEW,
     detect_intent,
     build_overview_context,
+    build_department_context,
     build_normal_context,
     generate_reply,
 )
+from core.audio_capture import start_capture_service, stop_capture_service
 from core.audio_pipeline import record_audio
-from stt import wav_to_transcript
+from stt import SegmentedTranscriber, preload_stt_engines, wav_to_transcript
 
 logger = logging.getLogger(__name__)
 
@@ -142,6 +159,8 @@ async def process_user_text_and_reply(session: dict, text: str, websocket: WebSo
         intent = detect_intent(text)
         if intent == INTENT_COLLEGE_OVERVIEW:
             context = build_overview_context()
+        elif intent == INTENT_DEPARTMENT_OVERVIEW:
+            context = build_department_context(text)
         else:
             context = build_normal_context(text)
         if context.strip():
@@ -224,11 +243,33 @@ async def process_user_text_and_reply(session: dict, text: str, websocket: WebSo
             pass
 
 
+async def _corpus_watch_loop(stop: threading.Event) -> None:
+    """
+    Follow the corpus version published by ingest: re-check the embedder and keep the in-process index
+    current, without a restart. Wakes on NOTIFY (RAG_CORPUS_NOTIFY) or every RAG_CORPUS_POLL_SEC.
+    Runs until stop is set (which also releases a worker thread blocked waiting for NOTIFY).
+    """
+    interval = max(1.0, RAG_CORPUS_POLL_SEC)
+    while not stop.is_set():
+        try:
+            await asyncio.to_thread(sync_corpus_version)
+        except Exception as e:
+            logger.warning("RAG: corpus sync error: %s", e)
+        if RAG_CORPUS_NOTIFY:
+            if await asyncio.to_thread(wait_for_corpus_change, interval, stop):
+                logger.info("RAG: corpus change notified")
+        else:
+            await asyncio.sleep(interval)
+
+
 @asynccontextmanager
 async def lifespan(app: object):
     """Startup: health check logging (DB, model, port, RAG config). Do not stop server if DB fails."""
     logger.info("Environment loaded; port=%s", PORT)
-    logger.info("RAG config: model=%s top_k=%s", RAG_MODEL, RAG_TOP_K)
+    logger.info(
+        "RAG config: model=%s top_k=%s engine=%s local_fallback=%s mode=%s",
+        RAG_MODEL, RAG_TOP_K, RAG_ENGINE, RAG_LOCAL_FALLBACK, RAG_RETRIEVAL_MODE,
+    )
     try:
         log_db_status()
         n = get_rag_document_count()
@@ -236,9 +277,21 @@ async def lifespan(app: object):
             logger.warning("RAG: college_knowledge table is empty. Run: python -m backend.ingest_college_knowledge_pg")
         else:
             logger.info("RAG: college_knowledge has %s documents.", n)
+            check_corpus_compatibility()
     except Exception as e:
         logger.warning("RAG: could not check database: %s. Running in LLM-only fallback mode.", e)
+    corpus_stop = threading.Event()
+    corpus_task = asyncio.create_task(_corpus_watch_loop(corpus_stop))
+    if await asyncio.to_thread(start_capture_service):
+        logger.info("Audio capture stream open (pre-roll ring buffer running)")
+    # Local STT model loads in the background (a first use waits for it); startup is not delayed.
+    stt_preload = asyncio.create_task(asyncio.to_thread(preload_stt_engines)) if STT_LOCAL_PRELOAD else None
     yield
+    if stt_preload is not None and not stt_preload.done():
+        stt_preload.cancel()
+    corpus_stop.set()
+    corpus_task.cancel()
+    await asyncio.to_thread(stop_capture_service)
 
 
 app = FastAPI(title="CLARA Backend", lifespan=lifespan)
@@ -266,7 +319,14 @@ def root():
 
 @app.get("/health")
 def health():
-    return {"status": "healthy"}
+    """Liveness plus PostgreSQL pool state (the backend stays up in LLM-only mode while the DB is down)."""
+    return {"status": "healthy", "database": pool_status()}
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Per-process counters and timings (RAG latency, lexical fast path hits, DB pool transitions, ...)."""
+    return metrics.snapshot()
 
 
 VALID_LANGUAGES = frozenset(LANGUAGE_NAME_TO_CODE_KEY.keys())
@@ -384,20 +444,26 @@ async def websocket_clara(websocket: WebSocket):
                     try:
                         await websocket.send_json({"state": 5, "payload": _safe_payload(messages=msgs, is_processing=True)})
                         wav_bytes = None
+                        stt = SegmentedTranscriber() if STT_STREAMING else None
                         try:
-                            wav_bytes = await asyncio.to_thread(record_audio)
+                            wav_bytes = await asyncio.to_thread(record_audio, stt)
                         except Exception as e:
                             logger.error("Backend recording failed: %s", e, exc_info=True)
                         if not wav_bytes:
+                            if stt is not None:
+                                stt.cancel()
                             await websocket.send_json({
                                 "state": 5,
                                 "payload": _safe_payload(messages=msgs, is_processing=False, error="No speech heard.", errorCode="MIC_CAPTURE_FAILED"),
                             })
                         else:
                             try:
-                                transcript = wav_to_transcript(wav_bytes)
+                                if stt is not None:
+                                    transcript = await asyncio.to_thread(stt.finish)
+                                else:
+                                    transcript = await asyncio.to_thread(wav_to_transcript, wav_bytes)
                             except Exception as e:
-                                logger.error("Sarvam STT failed: %s", e, exc_info=True)
+                                logger.error("STT failed: %s", e, exc_info=True)
                                 await websocket.send_json({
                                     "state": 5,
                                     "payload": _safe_payload(messages=msgs, is_processing=False, error="Speech recognition failed. Please try again.", errorCode="STT_FAILED"),
@@ -0,0 +1,38 @@
+"""In-process counters and timings (per worker process), served as JSON at /metrics."""
+
+import threading
+from typing import Dict
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_timings: Dict[str, Dict[str, float]] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    """Add value to counter name."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, value: float) -> None:
+    """Record one observation (e.g. latency in ms): keeps count, sum, min, max and last."""
+    with _lock:
+        t = _timings.get(name)
+        if t is None:
+            _timings[name] = {"count": 1, "sum": value, "min": value, "max": value, "last": value}
+            return
+        t["count"] += 1
+        t["sum"] += value
+        t["min"] = min(t["min"], value)
+        t["max"] = max(t["max"], value)
+        t["last"] = value
+
+
+def snapshot() -> dict:
+    """Return a copy of all counters and timings (timings include avg)."""
+    with _lock:
+        timings = {
+            name: dict(t, avg=(t["sum"] / t["count"]) if t["count"] else 0.0)
+            for name, t in _timings.items()
+        }
+        return {"counters": dict(_counters), "timings": timings}
@@ -1,43 +1,536 @@
-"""RAG retrieval: PostgreSQL + pgvector and local embeddings for college knowledge."""
+"""RAG retrieval: PostgreSQL + pgvector (or the in-process index) and local embeddings for college knowledge."""
 
 import logging
 import threading
-from typing import List
+import time
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Optional, Tuple
 
-from config import RAG_MAX_TOKENS, RAG_TOP_K
+import numpy as np
 
-from db import get_document_count, get_similar_contents, is_db_available
+from config import (
+    COLLEGE_KNOWLEDGE_PATH,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_MAX_SIZE,
+    EMBEDDING_BATCH_MAX_WAIT_MS,
+    EMBEDDING_DIM,
+    EMBEDDING_MODEL_NAME,
+    INGEST_BATCH_SIZE,
+    RAG_ARTIFACT_DIR,
+    RAG_CONTEXT_DEDUP,
+    RAG_ENGINE,
+    RAG_HYBRID_CANDIDATES,
+    RAG_LEXICAL_FAST_PATH,
+    RAG_LEXICAL_MIN_COVERAGE,
+    RAG_LEXICAL_MIN_RATIO,
+    RAG_LEXICAL_MIN_SCORE,
+    RAG_LOCAL_FALLBACK,
+    RAG_MAX_K,
+    RAG_MAX_SCORE_GAP,
+    RAG_MAX_TOKENS,
+    RAG_MIN_K,
+    RAG_MIN_SIMILARITY,
+    RAG_MMR,
+    RAG_MMR_FETCH_K,
+    RAG_MMR_LAMBDA,
+    RAG_RETRIEVAL_MODE,
+    RAG_TOP_K,
+)
+
+import metrics
+from chunking import OVERLAP_CHARS, load_knowledge_chunks_with_metadata
+from corpus_artifact import content_hash, load_artifact, read_manifest
+from db import (
+    get_all_chunks,
+    get_corpus_info,
+    get_corpus_version,
+    get_document_count,
+    get_similar_chunks,
+    get_stored_embedding_dim,
+    is_db_available,
+)
+from embedders import Embedder, create_embedder
+from embedding_batcher import EmbeddingBatcher
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from tokens import count_tokens, truncate_tokens
+from vector_index import VectorIndex
 
 logger = logging.getLogger(__name__)
 
 _embedding_model = None
 _embedding_lock = threading.Lock()
+# Serializes model calls: the query batcher's worker, corpus sync and ingest all share the model
+# (HF tokenizers and torch modules are not safe to call concurrently).
+_encode_lock = threading.Lock()
+_embedding_batcher = None
+_batcher_lock = threading.Lock()
+# Set by check_corpus_compatibility() when the corpus was embedded with another model/dim.
+_corpus_mismatch: Optional[str] = None
+# In-process index (RAG_ENGINE=local, or fallback when PostgreSQL is down). Swapped atomically on refresh.
+_local_index: Optional[VectorIndex] = None
+_lexical_index: Optional[BM25Index] = None
+_local_index_lock = threading.Lock()
+# Last corpus version seen by sync_corpus_version().
+_seen_corpus_version: Optional[str] = None
+
+
+class RetrievedChunk(NamedTuple):
+    """
+    One retrieval hit. score is cosine similarity, or None for chunks found only lexically.
+    embedding is the chunk's normalized vector when the source provides it (used by MMR).
+    token_count is the count recorded at ingest (None for corpora ingested before it was).
+    """
 
-EMBEDDING_MODEL_NAME = "BAAI/bge-base-en"
-EMBEDDING_DIM = 768
+    id: str
+    content: str
+    score: Optional[float]
+    embedding: Optional[np.ndarray] = None
+    token_count: Optional[int] = None
 
 
-def _get_embedding_model():
-    """Lazy-load the sentence-transformers model once. Thread-safe."""
+def _get_embedding_model() -> Embedder:
+    """Lazy-load the configured embedder backend once (see embedders.py). Thread-safe."""
     global _embedding_model
     with _embedding_lock:
         if _embedding_model is None:
-            from sentence_transformers import SentenceTransformer
-            _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+            _embedding_model = create_embedder()
         return _embedding_model
 
 
+def _encode_batch(texts: List[str]):
+    """Encode a batch of texts in one model call (normalized, one row per text). The only caller of encode."""
+    model = _get_embedding_model()
+    with _encode_lock:
+        return model.encode(texts)
+
+
+def _get_embedding_batcher() -> EmbeddingBatcher:
+    """Lazy-create the shared micro-batching worker. Thread-safe."""
+    global _embedding_batcher
+    with _batcher_lock:
+        if _embedding_batcher is None:
+            _embedding_batcher = EmbeddingBatcher(
+                _encode_batch,
+                max_batch_size=EMBEDDING_BATCH_MAX_SIZE,
+                max_wait_ms=EMBEDDING_BATCH_MAX_WAIT_MS,
+            )
+            _embedding_batcher.start()
+        return _embedding_batcher
+
+
 def generate_embedding(text: str) -> List[float]:
     """
-    Generate 768-dim embedding for text using local BAAI/bge-base-en.
-    Fully local; no network. Thread-safe. Raises on failure.
+    Generate EMBEDDING_DIM embedding for text with the configured local embedder.
+    Fully local; no network. Thread-safe: concurrent callers are coalesced into one
+    batched encode by the background worker. Raises on failure.
     """
     if not text or not text.strip():
         raise ValueError("empty text")
-    model = _get_embedding_model()
-    with _embedding_lock:
-        vec = model.encode(text.strip(), normalize_embeddings=True)
-    return vec.tolist()
+    return _get_embedding_batcher().encode(text.strip())
+
+
+def generate_embeddings(texts: List[str], batch_size: int = INGEST_BATCH_SIZE) -> np.ndarray:
+    """
+    Embed many texts (ingest) with direct model calls of batch_size texts each, bypassing the
+    query micro-batcher. Returns an (n, EMBEDDING_DIM) float32 array. Raises on failure.
+    """
+    if any(not t or not t.strip() for t in texts):
+        raise ValueError("empty text")
+    batches = [_encode_batch([t.strip() for t in texts[i : i + batch_size]]) for i in range(0, len(texts), batch_size)]
+    return np.vstack(batches).astype(np.float32, copy=False) if batches else np.zeros((0, EMBEDDING_DIM), np.float32)
+
+
+def check_corpus_compatibility() -> bool:
+    """
+    Compare the model/dim recorded at ingest with the configured embedder. On a model or
+    dimension mismatch, stop using pgvector rows (and the DB-loaded local index) and return False.
+    A different backend of the same model (e.g. torch vs onnx-int8) is only logged.
+    Returns True when compatible or when nothing can be checked (DB down, legacy corpus).
+    """
+    global _corpus_mismatch
+    if not is_db_available():
+        return True
+    info = get_corpus_info()
+    model = info.get("embedding_model")
+    dim = info.get("embedding_dim")
+    if model is None:
+        stored_dim = get_stored_embedding_dim()
+        if stored_dim is not None and stored_dim != EMBEDDING_DIM:
+            _corpus_mismatch = f"stored vectors are {stored_dim}-dim, embedder is {EMBEDDING_DIM}-dim"
+        else:
+            logger.warning("RAG: corpus has no embedding model record; re-run ingest to record it")
+            _corpus_mismatch = None
+    elif model != EMBEDDING_MODEL_NAME or str(dim) != str(EMBEDDING_DIM):
+        _corpus_mismatch = (
+            f"corpus ingested with {model} ({dim}-dim), configured {EMBEDDING_MODEL_NAME} ({EMBEDDING_DIM}-dim)"
+        )
+    else:
+        _corpus_mismatch = None
+        backend = info.get("embedding_backend")
+        if backend and backend != EMBEDDING_BACKEND:
+            logger.warning(
+                "RAG: corpus embedded with backend=%s, queries use backend=%s (same model; minor score drift)",
+                backend,
+                EMBEDDING_BACKEND,
+            )
+    if _corpus_mismatch:
+        logger.error("RAG disabled: %s. Re-run ingest with the configured embedder.", _corpus_mismatch)
+        return False
+    return True
+
+
+def _build_index_from_file() -> Optional[VectorIndex]:
+    """Chunk and embed COLLEGE_KNOWLEDGE_PATH with the configured embedder. None on any error."""
+    try:
+        annotated = load_knowledge_chunks_with_metadata(COLLEGE_KNOWLEDGE_PATH)
+    except (OSError, RuntimeError) as e:
+        logger.warning("RAG: local index: cannot chunk %s: %s", COLLEGE_KNOWLEDGE_PATH, e)
+        return None
+    if not annotated:
+        return None
+    chunks = [c for c, _ in annotated]
+    try:
+        vectors = []
+        for i in range(0, len(chunks), EMBEDDING_BATCH_MAX_SIZE):
+            # Lock per batch: queries from the batcher worker get the model in between.
+            vectors.extend(_encode_batch(chunks[i : i + EMBEDDING_BATCH_MAX_SIZE]))
+    except Exception as e:
+        logger.warning("RAG: local index: embedding %s failed: %s", COLLEGE_KNOWLEDGE_PATH, e, exc_info=True)
+        return None
+    rows = [(f"file-{i}", c, v, meta) for i, ((c, meta), v) in enumerate(zip(annotated, vectors))]
+    return VectorIndex.from_rows(rows, version=content_hash(chunks))
+
+
+def _artifact_matches_embedder(manifest: dict) -> bool:
+    return manifest.get("model_name") == EMBEDDING_MODEL_NAME and int(manifest.get("dim", 0)) == EMBEDDING_DIM
+
+
+def _install_index(index: VectorIndex, source: str) -> None:
+    """Swap in a new local index (and the BM25 index over the same chunks in hybrid mode)."""
+    global _local_index, _lexical_index
+    lexical = None
+    if RAG_RETRIEVAL_MODE == "hybrid":
+        lexical = BM25Index(index.texts, ids=index.ids, version=index.version)
+    _local_index = index
+    _lexical_index = lexical
+    logger.info("RAG: local index from %s (%d chunks, version=%s)", source, len(index), index.version[:12])
+
+
+def sync_corpus_version() -> bool:
+    """
+    Pick up a corpus version published by ingest (content hash in college_knowledge_info): re-check the
+    embedder compatibility, then reload the in-process index if it is used. Returns True if the
+    version changed since the last call. Never raises.
+    """
+    global _seen_corpus_version
+    try:
+        version = get_corpus_version() if is_db_available() else None
+        changed = version is not None and version != _seen_corpus_version
+        if changed:
+            if _seen_corpus_version is not None:
+                logger.info("RAG: corpus version %s -> %s", _seen_corpus_version[:12], version[:12])
+                metrics.incr("rag.corpus_version_changes")
+            _seen_corpus_version = version
+            check_corpus_compatibility()
+        if uses_local_corpus():
+            refresh_local_index()
+        return changed
+    except Exception as e:
+        logger.warning("RAG: corpus version check failed: %s", e)
+        return False
+
+
+def uses_local_corpus() -> bool:
+    """True if the configuration needs the in-process corpus (local engine, fallback or hybrid mode)."""
+    return RAG_ENGINE == "local" or RAG_LOCAL_FALLBACK or RAG_RETRIEVAL_MODE == "hybrid"
+
+
+def refresh_local_index() -> bool:
+    """
+    Keep the in-process index in step with the corpus version. Sources, cheapest first:
+    1) the memory-mapped artifact written by ingest (if its content hash matches the DB, or the DB is down);
+    2) all rows from PostgreSQL; 3) embedding COLLEGE_KNOWLEDGE_PATH (only if nothing is loaded yet).
+    Returns True if a new index was installed. Never raises.
+    """
+    with _local_index_lock:
+        current = _local_index
+        current_version = current.version if current is not None else None
+        try:
+            db_version = None
+            if is_db_available() and not _corpus_mismatch:
+                db_version = get_corpus_version()
+            if db_version and db_version == current_version:
+                return False
+
+            manifest = read_manifest(RAG_ARTIFACT_DIR)
+            if manifest and _artifact_matches_embedder(manifest) and db_version in (None, manifest["content_hash"]):
+                if manifest["content_hash"] == current_version:
+                    return False
+                index = load_artifact(RAG_ARTIFACT_DIR)
+                if index is not None:
+                    _install_index(index, "memory-mapped artifact")
+                    return True
+
+            rows = get_all_chunks() if db_version else []
+            if rows:
+                _install_index(VectorIndex.from_rows(rows, version=db_version), "PostgreSQL")
+                return True
+            if current is not None:
+                return False
+            index = _build_index_from_file()
+            if index is None:
+                return False
+            _install_index(index, COLLEGE_KNOWLEDGE_PATH)
+            return True
+        except Exception as e:
+            logger.warning("RAG: local index refresh failed: %s", e, exc_info=True)
+            return False
+
+
+def _token_count(index: VectorIndex, row: int) -> Optional[int]:
+    meta = index.metadata[row] if index.metadata is not None else None
+    return meta.get("token_count") if meta else None
+
+
+def _search_local(query_embedding: List[float], top_k: int, filters: Optional[dict] = None) -> List[RetrievedChunk]:
+    index = _local_index
+    if index is None or len(index) == 0:
+        return []
+    return [
+        RetrievedChunk(str(index.ids[row]), index.texts[row], score, index.matrix[row], _token_count(index, row))
+        for row, score in index.search_rows(query_embedding, top_k, filters)
+    ]
+
+
+def _search_pgvector(query_embedding: List[float], top_k: int, filters: Optional[dict] = None) -> List[RetrievedChunk]:
+    # cosine distance -> similarity; stored vectors only fetched when MMR needs them
+    return [
+        RetrievedChunk(
+            row[0],
+            row[1],
+            1.0 - row[2],
+            np.asarray(row[4], dtype=np.float32) if len(row) > 4 else None,
+            row[3],
+        )
+        for row in get_similar_chunks(query_embedding, top_k, with_embeddings=RAG_MMR, filters=filters)
+    ]
+
+
+def _search_vector(query_embedding: List[float], top_k: int, filters: Optional[dict] = None) -> List[RetrievedChunk]:
+    """Run the configured engine; fall back to the local index when pgvector has nothing to offer."""
+    if RAG_ENGINE == "local":
+        chunks = _search_local(query_embedding, top_k, filters)
+        if chunks:
+            return chunks
+    if not _corpus_mismatch and is_db_available():
+        chunks = _search_pgvector(query_embedding, top_k, filters)
+        if chunks:
+            return chunks
+    if RAG_ENGINE != "local" and RAG_LOCAL_FALLBACK:
+        chunks = _search_local(query_embedding, top_k, filters)
+        if chunks:
+            logger.info("RAG: served from local index fallback")
+        return chunks
+    return []
+
+
+def _retrieve(
+    query: str,
+    top_k: int,
+    filters: Optional[dict] = None,
+    embed: Callable[[str], List[float]] = generate_embedding,
+) -> List[RetrievedChunk]:
+    """
+    Vector retrieval, or in hybrid mode: BM25 first; if its top hit is decisive return the lexical
+    hits without embedding the query (fast path), otherwise fuse lexical and vector rankings (RRF).
+    filters (metadata containment) apply to both; lexical hits are filtered through the local index
+    metadata, and skipped when it has none. Returns candidates best first.
+    """
+    lexical = _lexical_index if RAG_RETRIEVAL_MODE == "hybrid" else None
+    index = _local_index
+    # BM25 doc i is row i of the local index it was built with (see _install_index).
+    same_rows = (
+        lexical is not None and index is not None
+        and index.version == lexical.version and len(index) == len(lexical)
+    )
+    allowed = None
+    if filters:
+        rows = index.filter_rows(filters) if same_rows else None
+        if rows is None or len(rows) == 0:
+            lexical = None
+        else:
+            allowed = set(rows.tolist())
+    lexical_chunks: List[RetrievedChunk] = []
+    if lexical is not None and len(lexical) > 0:
+        t0 = time.perf_counter()
+        hits = lexical.search(query, len(lexical) if allowed is not None else max(top_k, RAG_HYBRID_CANDIDATES))
+        if allowed is not None:
+            hits = [h for h in hits if h[0] in allowed][: max(top_k, RAG_HYBRID_CANDIDATES)]
+        decisive = RAG_LEXICAL_FAST_PATH and lexical.is_decisive(
+            query, hits, RAG_LEXICAL_MIN_SCORE, RAG_LEXICAL_MIN_RATIO, RAG_LEXICAL_MIN_COVERAGE
+        )
+        lexical_ms = (time.perf_counter() - t0) * 1000.0
+        metrics.observe("rag.lexical_ms", lexical_ms)
+        metrics.incr("rag.lexical_queries")
+        lexical_chunks = [
+            RetrievedChunk(lexical.ids[i], lexical.texts[i], None, index.matrix[i], _token_count(index, i))
+            if same_rows
+            else RetrievedChunk(lexical.ids[i], lexical.texts[i], None)
+            for i, _ in hits
+        ]
+        if decisive:
+            metrics.incr("rag.lexical_fast_path_hits")
+            logger.info("RAG: lexical fast path (top=%.2f, %.3f ms), embedding skipped", hits[0][1], lexical_ms)
+            if allowed is not None:
+                # Already narrowed to the filtered block: keep all of its matches.
+                return lexical_chunks[:top_k]
+            # Keep only hits that the top one does not clearly beat.
+            keep = sum(1 for _, score in hits if score * RAG_LEXICAL_MIN_RATIO >= hits[0][1])
+            return lexical_chunks[: max(1, min(keep, top_k))]
+    t0 = time.perf_counter()
+    query_embedding = embed(query)
+    metrics.observe("rag.embedding_ms", (time.perf_counter() - t0) * 1000.0)
+    if not lexical_chunks:
+        return _search_vector(query_embedding, top_k, filters)
+    vector_chunks = _search_vector(query_embedding, max(top_k, RAG_HYBRID_CANDIDATES), filters)
+    by_content = {c.content: c for c in lexical_chunks}
+    by_content.update({c.content: c for c in vector_chunks})
+    fused = reciprocal_rank_fusion(
+        [[c.content for c in vector_chunks], [c.content for c in lexical_chunks]], top_k
+    )
+    # Lexical-only hits outside the vector top-k: score them from their embedding when it is known.
+    q = np.asarray(query_embedding, dtype=np.float32)
+    out = []
+    for content in fused:
+        chunk = by_content[content]
+        if chunk.score is None and chunk.embedding is not None:
+            chunk = chunk._replace(score=float(np.dot(np.asarray(chunk.embedding, dtype=np.float32), q)))
+        out.append(chunk)
+    return out
+
+
+def select_adaptive(
+    chunks: List[RetrievedChunk],
+    min_similarity: float = RAG_MIN_SIMILARITY,
+    max_gap: float = RAG_MAX_SCORE_GAP,
+    min_k: int = RAG_MIN_K,
+    max_k: int = RAG_MAX_K,
+) -> List[RetrievedChunk]:
+    """
+    Cut a best-first candidate list to what the question needs: always keep min_k, never more
+    than max_k, and after min_k stop at the first chunk whose similarity is below min_similarity
+    or more than max_gap below the best similarity. Lexical-only chunks (score None) pass the cut-offs.
+    """
+    scored = [c.score for c in chunks if c.score is not None]
+    best = max(scored) if scored else None
+    out: List[RetrievedChunk] = []
+    for i, chunk in enumerate(chunks[: max(0, max_k)]):
+        if i >= min_k and chunk.score is not None:
+            if chunk.score < min_similarity or (best is not None and best - chunk.score > max_gap):
+                break
+        out.append(chunk)
+    return out
+
+
+def mmr_select(chunks: List[RetrievedChunk], k: int, lambda_: float = RAG_MMR_LAMBDA) -> List[RetrievedChunk]:
+    """
+    Maximal marginal relevance: greedily pick k chunks maximizing
+    lambda_ * similarity(query) - (1 - lambda_) * max similarity to the chunks already picked.
+    Falls back to the first k when any chunk lacks a score or an embedding (e.g. lexical fast path).
+    """
+    if k <= 0:
+        return []
+    if len(chunks) <= 1 or any(c.score is None or c.embedding is None for c in chunks):
+        return chunks[:k]
+    vectors = np.asarray([np.asarray(c.embedding, dtype=np.float32) for c in chunks])
+    relevance = np.asarray([c.score for c in chunks], dtype=np.float32)
+    pairwise = vectors @ vectors.T
+    picked: List[int] = []
+    redundancy = np.zeros(len(chunks), dtype=np.float32)
+    available = np.ones(len(chunks), dtype=bool)
+    for _ in range(min(k, len(chunks))):
+        gain = lambda_ * relevance - (1.0 - lambda_) * redundancy
+        gain[~available] = -np.inf
+        best = int(np.argmax(gain))
+        picked.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return [chunks[i] for i in picked]
+
+
+def _overlap_len(head: str, tail: str, min_len: int, max_len: int) -> int:
+    """Length of the longest suffix of head (min_len..max_len chars) that tail starts with; 0 if none."""
+    for n in range(min(len(head), len(tail), max_len), min_len - 1, -1):
+        if head.endswith(tail[:n]):
+            return n
+    return 0
+
+
+def dedup_chunks(texts: List[str], min_overlap: int = 20) -> List[str]:
+    """
+    Remove text repeated between chunks, keeping the first occurrence: paragraphs already emitted,
+    and the overlap ingest adds between neighbouring chunks (OVERLAP_CHARS) in either order.
+    The result is aligned with texts: a chunk left empty (or contained in an earlier one) becomes "".
+    """
+    max_overlap = 2 * OVERLAP_CHARS
+    seen_paragraphs = set()
+    out: List[str] = []
+    for original in texts:
+        text = original
+        paragraphs = [p for p in text.split("\n\n") if p.strip()]
+        kept = [p for p in paragraphs if p.strip() not in seen_paragraphs]
+        seen_paragraphs.update(p.strip() for p in paragraphs)
+        text = "\n\n".join(kept).strip()
+        for prev in out:
+            if not text:
+                break
+            n = _overlap_len(prev, text, min_overlap, max_overlap)
+            if n:
+                text = text[n:].strip()
+            n = _overlap_len(text, prev, min_overlap, max_overlap)
+            if n:
+                text = text[:-n].strip()
+        out.append(text if text and not any(text in prev for prev in out) else "")
+    return out
+
+
+def _pack_chunks(chunks: List[RetrievedChunk], texts: List[str], max_tokens: int) -> Tuple[str, int, int]:
+    """
+    Join texts (aligned with chunks, "" = dropped) within max_tokens by summing per-chunk token counts:
+    the count stored at ingest for a chunk dedup left unchanged, a fresh count otherwise. Only the
+    last chunk that does not fit whole is tokenized to cut it. Returns (text, tokens, tokens saved
+    by dedup), counting one token per "\n\n" separator.
+    """
+    counts = []  # (stored count of the retrieved chunk, count of the text after dedup)
+    for chunk, text in zip(chunks, texts):
+        stored = chunk.token_count if chunk.token_count is not None else count_tokens(chunk.content)
+        counts.append((stored, stored if text == chunk.content else count_tokens(text)))
+    raw = sum(c for c, _ in counts) + max(0, len(counts) - 1)
+    kept = [(t, n) for t, (_, n) in zip(texts, counts) if t]
+    deduped = sum(n for _, n in kept) + max(0, len(kept) - 1)
+
+    parts: List[str] = []
+    used = 0
+    for text, n in kept:
+        sep = 1 if parts else 0
+        if max_tokens > 0 and used + sep + n > max_tokens:
+            text = truncate_tokens(text, max_tokens - used - sep)
+            if text:
+                parts.append(text)
+                used = max_tokens
+            break
+        parts.append(text)
+        used += sep + n
+    return "\n\n".join(parts), used, max(0, raw - deduped)
+
+
+def _has_retrieval_source() -> bool:
+    local = _local_index is not None and len(_local_index) > 0
+    if local and (RAG_ENGINE == "local" or RAG_LOCAL_FALLBACK):
+        return True
+    if _lexical_index is not None and len(_lexical_index) > 0:
+        return True
+    return not _corpus_mismatch and is_db_available()
 
 
 def get_rag_document_count() -> int:
@@ -49,45 +542,72 @@ def get_relevant_context(
     query: str,
     top_k: int = RAG_TOP_K,
     max_tokens: int = RAG_MAX_TOKENS,
+    adaptive: bool = True,
+    prefer: Optional[dict] = None,
 ) -> str:
     """
-    Retrieve top-k most relevant chunks from PostgreSQL for the query.
-    Returns concatenated chunk text, trimmed to max_tokens. Empty string on error or empty table.
+    Retrieve the most relevant chunks for the query from the configured engine (RAG_ENGINE:
+    pgvector or local), falling back to the in-process index when PostgreSQL is unavailable.
+    RAG_RETRIEVAL_MODE=hybrid adds BM25 (lexical fast path + rank fusion), see _retrieve.
+    top_k candidates are fetched; with adaptive=True select_adaptive keeps only as many as the
+    scores justify (RAG_MIN_SIMILARITY, RAG_MAX_SCORE_GAP, RAG_MIN_K..RAG_MAX_K). With RAG_MMR the
+    kept chunks are re-selected for diversity (mmr_select); RAG_CONTEXT_DEDUP removes repeated text.
+    prefer boosts chunks whose metadata contains it, e.g. {"departments": ["ECE"]}: the filtered and the
+    unfiltered candidates are fused by rank (RRF), so the best chunks of the whole corpus stay in and a
+    corpus ingested without metadata behaves as if prefer were not given.
+    Returns concatenated chunk text, trimmed to max_tokens. Empty string on error or empty corpus.
     """
     if not (query or query.strip()):
         return ""
     query = query.strip()
-    if not is_db_available():
-        logger.warning("RAG: DB unavailable, returning empty context")
+    if not _has_retrieval_source():
+        if _corpus_mismatch:
+            logger.warning("RAG: skipped, embedding model mismatch (%s)", _corpus_mismatch)
+        else:
+            logger.warning("RAG: DB unavailable and no local index, returning empty context")
         return ""
     try:
-        query_embedding = generate_embedding(query)
-        contents = get_similar_contents(query_embedding, top_k)
-        if not contents:
+        t0 = time.perf_counter()
+        fetch_k = max(top_k, RAG_MMR_FETCH_K) if RAG_MMR else top_k
+        if prefer:
+            embed = lru_cache(maxsize=1)(generate_embedding)  # one query embedding for both searches
+            preferred = _retrieve(query, fetch_k, prefer, embed)
+            candidates = _retrieve(query, fetch_k, None, embed)
+            by_content = {c.content: c for c in candidates}
+            by_content.update({c.content: c for c in preferred})
+            fused = reciprocal_rank_fusion([[c.content for c in preferred], [c.content for c in candidates]], fetch_k)
+            candidates = [by_content[content] for content in fused]
+        else:
+            candidates = _retrieve(query, fetch_k)
+        pool = candidates
+        k = top_k
+        if adaptive:
+            pool = select_adaptive(candidates, max_k=len(candidates))
+            k = min(len(pool), top_k, RAG_MAX_K)
+        chunks = mmr_select(pool, k) if RAG_MMR else pool[:k]
+        metrics.observe("rag.retrieval_ms", (time.perf_counter() - t0) * 1000.0)
+        if not chunks:
             logger.warning("RAG: context empty (no documents for query)")
             return ""
-        combined = "\n\n".join(contents)
-        out = _trim_to_tokens(combined, max_tokens)
+        texts = [c.content for c in chunks]
+        if RAG_CONTEXT_DEDUP:
+            texts = dedup_chunks(texts)
+        out, n_tokens, saved = _pack_chunks(chunks, texts, max_tokens)
         if out:
-            logger.info("RAG: context_size=%d chars", len(out))
+            metrics.observe("rag.context_tokens", n_tokens)
+            metrics.observe("rag.context_chunks", len(chunks))
+            metrics.observe("rag.context_tokens_saved", saved)
+            logger.info(
+                "RAG: context chunks=%d/%d tokens=%d saved=%d chars=%d top_score=%s",
+                len(chunks),
+                len(candidates),
+                n_tokens,
+                saved,
+                len(out),
+                f"{chunks[0].score:.3f}" if chunks[0].score is not None else "lexical",
+            )
         return out
     except Exception as e:
         logger.warning("RAG retrieval failed: %s", e, exc_info=True)
         return ""
 
-
-def _trim_to_tokens(text: str, max_tokens: int) -> str:
-    """Trim text to at most max_tokens using tiktoken (cl100k_base)."""
-    if max_tokens <= 0 or not text:
-        return text
-    try:
-        import tiktoken
-        enc = tiktoken.get_encoding("cl100k_base")
-        tokens = enc.encode(text)
-        if len(tokens) <= max_tokens:
-            return text
-        trimmed = enc.decode(tokens[:max_tokens])
-        return trimmed
-    except Exception as e:
-        logger.debug("tiktoken trim failed, returning full text: %s", e)
-        return text
@@ -0,0 +1,282 @@
+"""
+Schema and migrations for the RAG tables (college_knowledge, college_knowledge_info) and the
+pgvector ANN index. Used by ingest and runnable on its own:
+
+    python backend/schema.py                    # apply pending migrations, storage type and index
+    python backend/schema.py --storage halfvec  # one-shot conversion of stored embeddings to float16
+    python backend/schema.py --status           # show schema version, storage type and index definition
+
+Migrations are numbered and applied in order; the applied version is stored in
+college_knowledge_info under "schema_version". Functions never raise: they log and return False.
+"""
+
+import argparse
+import logging
+import math
+import sys
+from pathlib import Path
+from typing import Optional
+
+_BACKEND_DIR = Path(__file__).resolve().parent
+if str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+from config import (
+    EMBEDDING_DIM,
+    PGVECTOR_HNSW_EF_CONSTRUCTION,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_INDEX,
+    PGVECTOR_IVFFLAT_LISTS,
+    PGVECTOR_STORAGE,
+)
+from db import get_connection, is_db_available, put_connection
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_NAME = "idx_college_embedding"
+METADATA_INDEX_NAME = "idx_college_metadata"
+# Embeddings are normalized, so cosine distance (<=>, *_cosine_ops) is the matching metric.
+VECTOR_OPCLASSES = {"vector": "vector_cosine_ops", "halfvec": "halfvec_cosine_ops"}
+
+MIGRATIONS = [
+    (1, "base tables", [
+        "CREATE EXTENSION IF NOT EXISTS vector",
+        "CREATE TABLE IF NOT EXISTS college_knowledge ("
+        f"id UUID PRIMARY KEY, content TEXT NOT NULL, embedding VECTOR({EMBEDDING_DIM}), "
+        "metadata JSONB, created_at TIMESTAMP DEFAULT NOW())",
+    ]),
+    (2, "metadata index", [
+        f"CREATE INDEX IF NOT EXISTS {METADATA_INDEX_NAME} ON college_knowledge USING GIN (metadata jsonb_path_ops)",
+    ]),
+]
+
+_INFO_DDL = (
+    "CREATE TABLE IF NOT EXISTS college_knowledge_info ("
+    "key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at TIMESTAMP DEFAULT NOW())"
+)
+
+
+def _rollback(conn) -> None:
+    try:
+        conn.rollback()
+    except Exception:
+        pass
+
+
+def apply_migrations() -> bool:
+    """Apply pending migrations, each in its own transaction. Returns True if the schema is current."""
+    if not is_db_available():
+        return False
+    conn = None
+    try:
+        conn = get_connection()
+        cur = conn.cursor()
+        cur.execute(_INFO_DDL)
+        cur.execute("SELECT value FROM college_knowledge_info WHERE key = 'schema_version'")
+        row = cur.fetchone()
+        current = int(row[0]) if row else 0
+        conn.commit()
+        for version, name, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            for stmt in statements:
+                cur.execute(stmt)
+            cur.execute(
+                "INSERT INTO college_knowledge_info (key, value, updated_at) VALUES ('schema_version', %s, NOW()) "
+                "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = NOW()",
+                (str(version),),
+            )
+            conn.commit()
+            logger.info("Schema migration %d applied: %s", version, name)
+        cur.close()
+        return True
+    except Exception as e:
+        if conn:
+            _rollback(conn)
+        logger.warning("Schema migration failed: %s", e)
+        return False
+    finally:
+        if conn:
+            put_connection(conn)
+
+
+def vector_index_sql(
+    kind: str,
+    rows: int = 0,
+    storage: str = PGVECTOR_STORAGE,
+    table: str = "college_knowledge",
+    name: str = VECTOR_INDEX_NAME,
+) -> Optional[str]:
+    """CREATE INDEX statement for an ANN index of the given kind (hnsw / ivfflat); None for "none"."""
+    opclass = VECTOR_OPCLASSES[storage]
+    if kind == "hnsw":
+        return (
+            f"CREATE INDEX {name} ON {table} USING hnsw (embedding {opclass}) "
+            f"WITH (m = {int(PGVECTOR_HNSW_M)}, ef_construction = {int(PGVECTOR_HNSW_EF_CONSTRUCTION)})"
+        )
+    if kind == "ivfflat":
+        lists = PGVECTOR_IVFFLAT_LISTS or max(1, int(math.sqrt(max(rows, 1))))
+        return f"CREATE INDEX {name} ON {table} USING ivfflat (embedding {opclass}) WITH (lists = {int(lists)})"
+    return None
+
+
+def get_vector_storage() -> Optional[str]:
+    """Return the type of college_knowledge.embedding ("vector" or "halfvec"), or None if unknown."""
+    if not is_db_available():
+        return None
+    conn = None
+    try:
+        conn = get_connection()
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = 'college_knowledge'::regclass AND attname = 'embedding' AND NOT attisdropped"
+        )
+        row = cur.fetchone()
+        cur.close()
+        return row[0].split("(", 1)[0] if row else None
+    except Exception as e:
+        if conn:
+            _rollback(conn)
+        logger.warning("Reading embedding column type failed: %s", e)
+        return None
+    finally:
+        if conn:
+            put_connection(conn)
+
+
+def ensure_vector_storage(storage: str = PGVECTOR_STORAGE) -> bool:
+    """
+    Convert college_knowledge.embedding to the configured type (vector <-> halfvec) in one transaction:
+    drop the vector index (its operator class is type-specific), rewrite the column in place, and leave
+    the index to ensure_vector_index. Returns True if the column already has, or now has, that type.
+    """
+    current = get_vector_storage()
+    if current is None:
+        return False
+    if current == storage:
+        return True
+    conn = None
+    try:
+        conn = get_connection()
+        cur = conn.cursor()
+        cur.execute(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}")
+        cur.execute(
+            f"ALTER TABLE college_knowledge ALTER COLUMN embedding TYPE {storage}({int(EMBEDDING_DIM)}) "
+            f"USING embedding::{storage}({int(EMBEDDING_DIM)})"
+        )
+        conn.commit()
+        cur.close()
+        logger.info("Embedding column converted: %s -> %s", current, storage)
+        return True
+    except Exception as e:
+        if conn:
+            _rollback(conn)
+        logger.warning("Embedding column conversion failed: %s", e)
+        return False
+    finally:
+        if conn:
+            put_connection(conn)
+
+
+def get_vector_index_def() -> Optional[str]:
+    """Return the current definition of the embedding index, or None if there is none (or on error)."""
+    if not is_db_available():
+        return None
+    conn = None
+    try:
+        conn = get_connection()
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = 'college_knowledge' AND indexname = %s",
+            (VECTOR_INDEX_NAME,),
+        )
+        row = cur.fetchone()
+        cur.close()
+        return row[0] if row else None
+    except Exception as e:
+        if conn:
+            _rollback(conn)
+        logger.warning("Reading vector index definition failed: %s", e)
+        return None
+    finally:
+        if conn:
+            put_connection(conn)
+
+
+def _index_matches(indexdef: Optional[str], kind: str, storage: str) -> bool:
+    if kind == "none":
+        return indexdef is None
+    return indexdef is not None and f"USING {kind} " in indexdef and VECTOR_OPCLASSES[storage] in indexdef
+
+
+def ensure_vector_index(kind: str = PGVECTOR_INDEX, rebuild: bool = False, storage: str = PGVECTOR_STORAGE) -> bool:
+    """
+    Make idx_college_embedding an index of the configured kind with cosine ops: drop a legacy or
+    mismatching one (e.g. the old ivfflat index that L2 queries never used) and build the new one.
+    IVFFlat lists are sized from the current row count, so build it after loading data.
+    Returns True if the index is as configured.
+    """
+    if not is_db_available():
+        return False
+    if not rebuild and _index_matches(get_vector_index_def(), kind, storage):
+        return True
+    conn = None
+    try:
+        conn = get_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM college_knowledge")
+        rows = int(cur.fetchone()[0])
+        cur.execute(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}")
+        sql = vector_index_sql(kind, rows, storage)
+        if sql:
+            cur.execute(sql)
+        conn.commit()
+        cur.close()
+        logger.info("Vector index %s: %s (%d rows)", VECTOR_INDEX_NAME, kind, rows)
+        return True
+    except Exception as e:
+        if conn:
+            _rollback(conn)
+        logger.warning("Vector index build failed: %s", e)
+        return False
+    finally:
+        if conn:
+            put_connection(conn)
+
+
+def ensure_schema() -> bool:
+    """Apply migrations, the configured storage type and vector index. Returns True on success."""
+    return apply_migrations() and ensure_vector_storage() and ensure_vector_index()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply RAG schema migrations and manage the vector index.")
+    parser.add_argument("--status", action="store_true", help="show schema version and index, change nothing")
+    parser.add_argument("--index", choices=("hnsw", "ivfflat", "none"), default=PGVECTOR_INDEX)
+    parser.add_argument("--storage", choices=("vector", "halfvec"), default=PGVECTOR_STORAGE)
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the vector index even if it matches")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    if not is_db_available():
+        print("Error: PostgreSQL not available.")
+        sys.exit(1)
+    if not args.status:
+        if (
+            not apply_migrations()
+            or not ensure_vector_storage(args.storage)
+            or not ensure_vector_index(args.index, rebuild=args.rebuild, storage=args.storage)
+        ):
+            sys.exit(1)
+        if args.storage != PGVECTOR_STORAGE:
+            print(f"Note: set PGVECTOR_STORAGE={args.storage} so the backend queries the converted column.")
+    from db import get_corpus_info
+
+    print(f"schema_version: {get_corpus_info().get('schema_version', 0)} (latest {MIGRATIONS[-1][0]})")
+    print(f"embedding storage: {get_vector_storage()} (configured {PGVECTOR_STORAGE})")
+    print(f"vector index: {get_vector_index_def() or 'none (exact scan)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,23 @@ CREATE TABLE IF NOT EXISTS college_knowledge (
     created_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Corpus metadata written by ingest (embedding_model, embedding_dim, embedding_backend).
+-- The backend compares it with its configured embedder at startup.
+CREATE TABLE IF NOT EXISTS college_knowledge_info (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- ANN index with cosine ops; queries order by cosine distance (<=>). backend/schema.py (run by ingest)
+-- rebuilds it as configured by PGVECTOR_INDEX (hnsw / ivfflat / none).
 CREATE INDEX IF NOT EXISTS idx_college_embedding
 ON college_knowledge
-USING ivfflat (embedding vector_cosine_ops)
-WITH (lists = 100);
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- Chunk metadata written by ingest (part, part_title, section, departments); serves
+-- filtered retrieval such as metadata @> '{"departments": ["ECE"]}'.
+CREATE INDEX IF NOT EXISTS idx_college_metadata
+ON college_knowledge
+USING GIN (metadata jsonb_path_ops);
@@ -1,32 +1,161 @@
-"""Sarvam ASR: WAV bytes -> transcript."""
+"""Speech to text: WAV bytes -> transcript.
+
+wav_to_transcript goes through SttRouter: STT_ENGINE first, STT_FALLBACK_ENGINE (e.g. the local Whisper
+engine in stt_engines.py) when it fails, is unhealthy or exceeds STT_LATENCY_BUDGET_MS.
+The Sarvam engine uploads one WAV, through the sarvamai SDK or, with SARVAM_STT_URL, as a direct HTTP
+multipart POST (a kept-alive httpx client; also how tools/stub_stt_server.py is used).
+Before upload the WAV is encoded as STT_UPLOAD_FORMAT (FLAC or Opus via soundfile), falling back to
+the WAV itself; encode time and upload size are recorded per request.
+SegmentedTranscriber takes pause-delimited segments from the capture loop while the user is still
+talking and transcribes them in the background, so after endpointing only the last segment is left.
+"""
 import io
 import logging
-from typing import Optional
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
 
-from config import SARVAM_API_KEY, SARVAM_LANGUAGE_CODE
+import metrics
+from config import (
+    SARVAM_API_KEY,
+    SARVAM_LANGUAGE_CODE,
+    SARVAM_STT_URL,
+    STT_ENGINE,
+    STT_FALLBACK_ENGINE,
+    STT_LATENCY_BUDGET_MS,
+    STT_TIMEOUT_SEC,
+    STT_UPLOAD_FORMAT,
+)
+from stt_engines import SttEngine, SttUnavailable, create_stt_engine, register_stt_engine
 
 logger = logging.getLogger(__name__)
 
 # Sarvam ASR model
 SARVAM_ASR_MODEL = "saaras:v3"
 
+_http_client = None
+_lock = threading.Lock()
+_segment_executor: Optional[ThreadPoolExecutor] = None
+_engine_executor: Optional[ThreadPoolExecutor] = None
+_router = None
 
-def wav_to_transcript(wav_bytes: bytes) -> Optional[str]:
-    """Send WAV (16 kHz mono preferred) to Sarvam ASR; return transcript or None."""
-    if not SARVAM_API_KEY or not wav_bytes:
-        logger.warning("STT skipped: no API key or empty WAV (len=%s)", len(wav_bytes) if wav_bytes else 0)
-        return None
-    try:
-        from sarvamai import SarvamAI
-        client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
-        kwargs = {
-            "file": io.BytesIO(wav_bytes),
-            "model": SARVAM_ASR_MODEL,
-            "mode": "transcribe",
-        }
-        if SARVAM_LANGUAGE_CODE:
-            kwargs["language_code"] = SARVAM_LANGUAGE_CODE
-        result = client.speech_to_text.transcribe(**kwargs)
+# Engine health: consecutive failures before an engine is skipped, and for how long; latency EMA weight
+_BREAKER_FAILURES = 3
+_BREAKER_COOLDOWN_SEC = 30.0
+_LATENCY_EMA = 0.3
+
+# STT_UPLOAD_FORMAT -> (soundfile format, subtype, upload file name, content type)
+_UPLOAD_FORMATS = {
+    "flac": ("FLAC", "PCM_16", "audio.flac", "audio/flac"),
+    "opus": ("OGG", "OPUS", "audio.ogg", "audio/ogg"),
+}
+_encoder_ok: Dict[str, bool] = {}
+
+
+def _encoder_available(fmt: str) -> bool:
+    """Whether soundfile/libsndfile can write fmt (checked once per format)."""
+    if fmt not in _encoder_ok:
+        try:
+            import soundfile as sf
+
+            container, subtype = _UPLOAD_FORMATS[fmt][:2]
+            _encoder_ok[fmt] = subtype in sf.available_subtypes(container)
+        except Exception as e:
+            logger.debug("soundfile unavailable: %s", e)
+            _encoder_ok[fmt] = False
+        if not _encoder_ok[fmt]:
+            logger.warning("STT upload format %s not supported here; uploading WAV", fmt)
+    return _encoder_ok[fmt]
+
+
+def encode_for_upload(wav_bytes: bytes, fmt: str = STT_UPLOAD_FORMAT) -> Tuple[bytes, str, str]:
+    """
+    (data, file name, content type) to upload: wav_bytes encoded as fmt, or the WAV itself for "wav", an
+    unsupported codec, an encoding error, or an encoding that is not smaller. Records stt.encode_ms and
+    stt.upload_bytes.
+    """
+    if fmt in _UPLOAD_FORMATS and _encoder_available(fmt):
+        container, subtype, name, content_type = _UPLOAD_FORMATS[fmt]
+        try:
+            import soundfile as sf
+
+            t0 = time.perf_counter()
+            audio, rate = sf.read(io.BytesIO(wav_bytes), dtype="int16")
+            out = io.BytesIO()
+            sf.write(out, audio, rate, format=container, subtype=subtype)
+            data = out.getvalue()
+            encode_ms = (time.perf_counter() - t0) * 1000.0
+            metrics.observe("stt.encode_ms", encode_ms)
+            if len(data) < len(wav_bytes):
+                metrics.observe("stt.upload_bytes", len(data))
+                metrics.incr("stt.upload_bytes_saved", len(wav_bytes) - len(data))
+                logger.info(
+                    "STT upload: %s %d bytes (WAV %d, %.0f%%), encoded in %.1f ms",
+                    fmt, len(data), len(wav_bytes), 100.0 * len(data) / len(wav_bytes), encode_ms,
+                )
+                return data, name, content_type
+        except Exception as e:
+            logger.warning("STT %s encoding failed (%s); uploading WAV", fmt, e)
+            metrics.incr("stt.encode_failures")
+    metrics.observe("stt.upload_bytes", len(wav_bytes))
+    return wav_bytes, "audio.wav", "audio/wav"
+
+
+def _get_http_client():
+    """Shared httpx client, so segment uploads reuse one connection (no TLS handshake per segment)."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            import httpx
+
+            _http_client = httpx.Client(timeout=STT_TIMEOUT_SEC)
+        return _http_client
+
+
+def _transcribe_http(wav_bytes: bytes):
+    """POST the (encoded) audio to SARVAM_STT_URL (Sarvam speech-to-text form fields); return the JSON body."""
+    data_bytes, name, content_type = encode_for_upload(wav_bytes)
+    data = {"model": SARVAM_ASR_MODEL, "mode": "transcribe"}
+    if SARVAM_LANGUAGE_CODE:
+        data["language_code"] = SARVAM_LANGUAGE_CODE
+    headers = {"api-subscription-key": SARVAM_API_KEY} if SARVAM_API_KEY else {}
+    response = _get_http_client().post(
+        SARVAM_STT_URL,
+        data=data,
+        files={"file": (name, data_bytes, content_type)},
+        headers=headers,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def _transcribe_sdk(wav_bytes: bytes):
+    from sarvamai import SarvamAI
+    client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
+    data, name, content_type = encode_for_upload(wav_bytes)
+    kwargs = {
+        "file": io.BytesIO(data) if data is wav_bytes else (name, io.BytesIO(data), content_type),
+        "model": SARVAM_ASR_MODEL,
+        "mode": "transcribe",
+    }
+    if SARVAM_LANGUAGE_CODE:
+        kwargs["language_code"] = SARVAM_LANGUAGE_CODE
+    return client.speech_to_text.transcribe(**kwargs)
+
+
+class SarvamEngine(SttEngine):
+    """Sarvam ASR over HTTP (SARVAM_STT_URL) or the sarvamai SDK."""
+
+    name = "sarvam"
+
+    def load(self) -> None:
+        if not (SARVAM_API_KEY or SARVAM_STT_URL):
+            raise SttUnavailable("no SARVAM_API_KEY or SARVAM_STT_URL")
+
+    def transcribe(self, wav_bytes: bytes, cancel: Optional[threading.Event] = None) -> str:
+        self.load()
+        result = _transcribe_http(wav_bytes) if SARVAM_STT_URL else _transcribe_sdk(wav_bytes)
         # Handle multiple response shapes
         text = None
         if result is not None:
@@ -36,11 +165,248 @@ def wav_to_transcript(wav_bytes: bytes) -> Optional[str]:
                 text = result
             elif isinstance(result, dict):
                 text = result.get("text") or result.get("transcript")
-        if text is not None and (text or "").strip():
-            logger.info("STT result: %r", (text or "").strip()[:200])
-            return (text or "").strip()
-        logger.warning("STT returned empty (result type=%s, repr=%r)", type(result).__name__, repr(result)[:300])
+        if not (text or "").strip():
+            logger.warning("STT returned empty (result type=%s, repr=%r)", type(result).__name__, repr(result)[:300])
+        return (text or "").strip()
+
+
+register_stt_engine(SarvamEngine.name, SarvamEngine)
+
+
+class _EngineHealth:
+    """
+    Per-engine health: _BREAKER_FAILURES consecutive failures take the engine out of rotation for
+    _BREAKER_COOLDOWN_SEC (then one request tries it again); SttUnavailable takes it out for good.
+    Keeps an EMA of successful latencies.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.failures = 0
+        self.retry_at = 0.0
+        self.unavailable = False
+        self.latency_ms: Optional[float] = None
+
+    def available(self) -> bool:
+        return not self.unavailable and time.monotonic() >= self.retry_at
+
+    def success(self, ms: float) -> None:
+        self.failures = 0
+        self.retry_at = 0.0
+        self.latency_ms = ms if self.latency_ms is None else self.latency_ms + _LATENCY_EMA * (ms - self.latency_ms)
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.failures >= _BREAKER_FAILURES:
+            self.retry_at = time.monotonic() + _BREAKER_COOLDOWN_SEC
+            metrics.incr(f"stt.engine.{self.name}.breaker_open")
+            logger.warning(
+                "STT engine %s failed %d times in a row; skipping it for %.0f s",
+                self.name, self.failures, _BREAKER_COOLDOWN_SEC,
+            )
+
+
+class SttRouter:
+    """
+    Routes one WAV to the engines in order (primary, then fallbacks). The next engine starts when the
+    current one fails, or when it has not answered within budget_ms; from then on they race and the first
+    successful transcript wins (the others are cancelled). An engine that is out of rotation is skipped,
+    and one whose recent latency exceeds the budget is raced from the start.
+    """
+
+    def __init__(self, engines: List[SttEngine], budget_ms: int = STT_LATENCY_BUDGET_MS) -> None:
+        self.engines = engines
+        self.budget_ms = budget_ms
+        self.health = {e.name: _EngineHealth(e.name) for e in engines}
+
+    def load(self) -> None:
+        """Load every engine now (model loads happen at startup, not on the first failover)."""
+        for engine in self.engines:
+            try:
+                engine.load()
+            except SttUnavailable as e:
+                self._mark_unavailable(engine, e)
+
+    def _mark_unavailable(self, engine: SttEngine, error: Exception) -> None:
+        health = self.health[engine.name]
+        if not health.unavailable:
+            health.unavailable = True
+            logger.warning("STT engine %s unavailable: %s", engine.name, error)
+
+    def _candidates(self) -> List[SttEngine]:
+        usable = [e for e in self.engines if not self.health[e.name].unavailable]
+        # All out of rotation: trying them beats certain failure.
+        return [e for e in usable if self.health[e.name].available()] or usable
+
+    def _run(self, engine: SttEngine, wav_bytes: bytes, cancel: threading.Event) -> Optional[str]:
+        """Transcript from engine, or None on failure (recorded in its health)."""
+        t0 = time.perf_counter()
+        try:
+            text = engine.transcribe(wav_bytes, cancel)
+        except SttUnavailable as e:
+            self._mark_unavailable(engine, e)
+            return None
+        except Exception as e:
+            if not cancel.is_set():
+                logger.warning("STT engine %s failed: %s", engine.name, e)
+                logger.debug("STT engine %s failure", engine.name, exc_info=True)
+                metrics.incr(f"stt.engine.{engine.name}.failures")
+                self.health[engine.name].failure()
+            return None
+        ms = (time.perf_counter() - t0) * 1000.0
+        metrics.observe(f"stt.engine.{engine.name}.ms", ms)
+        self.health[engine.name].success(ms)
+        return text
+
+    def _hedge_after(self, engine: SttEngine) -> float:
+        """Seconds to wait for engine before starting the next one."""
+        latency_ms = self.health[engine.name].latency_ms
+        if latency_ms is not None and latency_ms > self.budget_ms:
+            return 0.0
+        return self.budget_ms / 1000.0
+
+    def transcribe(self, wav_bytes: bytes) -> Optional[str]:
+        """Transcript of wav_bytes (None if no engine produced text)."""
+        waiting = self._candidates()
+        if not waiting:
+            logger.warning("STT skipped: no engine available")
+            return None
+        cancel = threading.Event()
+        executor = _get_engine_executor()
+        running: Dict[Future, SttEngine] = {}
+        deadline = time.monotonic() + STT_TIMEOUT_SEC + self.budget_ms / 1000.0
+        try:
+            while running or waiting:
+                if waiting and not running:
+                    engine = waiting.pop(0)
+                    if engine is not self.engines[0]:
+                        metrics.incr("stt.route.fallbacks")
+                    running[executor.submit(self._run, engine, wav_bytes, cancel)] = engine
+                    hedge_at = time.monotonic() + self._hedge_after(engine)
+                timeout = deadline - time.monotonic()
+                if waiting:
+                    timeout = min(timeout, hedge_at - time.monotonic())
+                done, _ = wait(list(running), timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+                if not done:
+                    if not waiting or time.monotonic() >= deadline:
+                        logger.warning("STT timed out after %.1f s", STT_TIMEOUT_SEC + self.budget_ms / 1000.0)
+                        metrics.incr("stt.route.timeouts")
+                        return None
+                    engine = waiting.pop(0)
+                    logger.info("STT: racing %s (no answer from %s yet)", engine.name, running[next(iter(running))].name)
+                    metrics.incr("stt.route.hedges")
+                    running[executor.submit(self._run, engine, wav_bytes, cancel)] = engine
+                    hedge_at = time.monotonic() + self._hedge_after(engine)
+                    continue
+                for future in done:
+                    engine = running.pop(future)
+                    text = future.result()
+                    if text is not None:
+                        metrics.incr(f"stt.route.answered.{engine.name}")
+                        if text:
+                            logger.info("STT result (%s): %r", engine.name, text[:200])
+                        return text or None
+            return None
+        finally:
+            cancel.set()
+
+
+def _get_engine_executor() -> ThreadPoolExecutor:
+    global _engine_executor
+    with _lock:
+        if _engine_executor is None:
+            # Two engines for each of the (up to two) segments in flight.
+            _engine_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="stt-engine")
+        return _engine_executor
+
+
+def get_stt_router() -> SttRouter:
+    """Router over STT_ENGINE then STT_FALLBACK_ENGINE (built on first use)."""
+    global _router
+    with _lock:
+        if _router is None:
+            names = [STT_ENGINE] + ([STT_FALLBACK_ENGINE] if STT_FALLBACK_ENGINE else [])
+            engines = []
+            for name in names:
+                try:
+                    engines.append(create_stt_engine(name))
+                except ValueError as e:
+                    logger.error("%s", e)
+            _router = SttRouter(engines)
+            logger.info("STT engines: %s (latency budget %d ms)", [e.name for e in engines], STT_LATENCY_BUDGET_MS)
+        return _router
+
+
+def preload_stt_engines() -> None:
+    """Load the configured engines (the local model, if any); call off the event loop at startup."""
+    get_stt_router().load()
+
+
+def wav_to_transcript(wav_bytes: bytes) -> Optional[str]:
+    """Send WAV (16 kHz mono preferred) to the configured STT engines; return transcript or None."""
+    if not wav_bytes:
+        logger.warning("STT skipped: empty WAV")
         return None
+    try:
+        return get_stt_router().transcribe(wav_bytes)
     except Exception as e:
-        logger.exception("Sarvam STT failed: %s", e)
+        logger.exception("STT failed: %s", e)
         return None
+
+
+def _get_segment_executor() -> ThreadPoolExecutor:
+    global _segment_executor
+    with _lock:
+        if _segment_executor is None:
+            _segment_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="stt-segment")
+        return _segment_executor
+
+
+class SegmentedTranscriber:
+    """
+    One utterance transcribed as it is captured: submit() each finished segment (a complete WAV), then
+    finish() waits for the outstanding ones and returns the transcripts joined in order. A segment that
+    yields nothing (a cough, or an STT failure) contributes nothing. Not reusable after finish/cancel.
+    """
+
+    def __init__(self, transcribe: Callable[[bytes], Optional[str]] = wav_to_transcript) -> None:
+        self._transcribe = transcribe
+        self._futures: List[Future] = []
+        self._cancelled = False
+
+    def _run(self, index: int, wav_bytes: bytes) -> Optional[str]:
+        t0 = time.perf_counter()
+        text = None if self._cancelled else self._transcribe(wav_bytes)
+        metrics.observe("stt.segment_ms", (time.perf_counter() - t0) * 1000.0)
+        logger.info("STT segment %s: %d bytes -> %r", index, len(wav_bytes), (text or "")[:80])
+        return text
+
+    def submit(self, wav_bytes: bytes) -> None:
+        """Start transcribing one segment in the background."""
+        metrics.incr("stt.stream.segments")
+        self._futures.append(_get_segment_executor().submit(self._run, len(self._futures), wav_bytes))
+
+    @property
+    def segments(self) -> int:
+        return len(self._futures)
+
+    def finish(self) -> Optional[str]:
+        """Transcript of all submitted segments (None if none produced text). Blocks until they are done."""
+        t0 = time.perf_counter()
+        texts = []
+        for future in self._futures:
+            try:
+                text = future.result(timeout=STT_TIMEOUT_SEC * 2)
+            except Exception as e:
+                logger.warning("STT segment failed: %s", e)
+                text = None
+            if text and text.strip():
+                texts.append(text.strip())
+        metrics.observe("stt.stream.finish_wait_ms", (time.perf_counter() - t0) * 1000.0)
+        return " ".join(texts) or None
+
+    def cancel(self) -> None:
+        """Drop the utterance: queued segments are skipped, running ones are ignored."""
+        self._cancelled = True
+        for future in self._futures:
+            future.cancel()
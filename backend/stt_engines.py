@@ -0,0 +1,156 @@
+"""
+Pluggable speech-to-text engines behind stt.wav_to_transcript.
+
+- "sarvam": the Sarvam API (defined in stt.py, next to the upload code).
+- "local": faster-whisper (CTranslate2) on CPU with int8 weights, the offline fallback for when Sarvam
+  is slow or unreachable. Decodes one utterance at a time (the kiosk CPU is shared with everything else).
+
+Select with STT_ENGINE / STT_FALLBACK_ENGINE in .env; stt.SttRouter decides which engine answers.
+"""
+
+import io
+import logging
+import threading
+import wave
+from typing import Dict, Optional, Type
+
+import numpy as np
+
+from config import (
+    SARVAM_LANGUAGE_CODE,
+    STT_LOCAL_BEAM_SIZE,
+    STT_LOCAL_COMPUTE_TYPE,
+    STT_LOCAL_MODEL,
+    STT_LOCAL_MODEL_DIR,
+    STT_LOCAL_THREADS,
+)
+
+logger = logging.getLogger(__name__)
+
+_WHISPER_SAMPLE_RATE = 16000
+
+
+class SttUnavailable(RuntimeError):
+    """The engine cannot run in this setup (dependency, model or credentials missing); not worth retrying."""
+
+
+class SttEngine:
+    """
+    Speech-to-text engine interface. transcribe() returns the transcript ("" when there is no speech) and
+    raises on failure; cancel, when set, means the result is no longer needed (the engine may stop early).
+    """
+
+    name = ""
+
+    def load(self) -> None:
+        """Prepare the engine (e.g. load a model). Raises SttUnavailable if it cannot run here."""
+
+    def transcribe(self, wav_bytes: bytes, cancel: Optional[threading.Event] = None) -> str:
+        raise NotImplementedError
+
+
+def wav_to_float32(wav_bytes: bytes, sample_rate: int = _WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """Mono float32 samples in [-1, 1] at sample_rate from a 16-bit PCM WAV (downmixed, resampled if needed)."""
+    with wave.open(io.BytesIO(wav_bytes), "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"need 16-bit PCM, got {8 * w.getsampwidth()}-bit")
+        rate, channels = w.getframerate(), w.getnchannels()
+        audio = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+    samples = audio.astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != sample_rate and len(samples):
+        n = int(round(len(samples) * sample_rate / rate))
+        samples = np.interp(np.arange(n) * (rate / sample_rate), np.arange(len(samples)), samples)
+        samples = samples.astype(np.float32)
+    return samples
+
+
+def _whisper_language(code: Optional[str]) -> Optional[str]:
+    """Whisper language from SARVAM_LANGUAGE_CODE ("hi-IN" -> "hi"); None = detect."""
+    if not code or code == "unknown":
+        return None
+    return code.split("-")[0]
+
+
+class LocalWhisperEngine(SttEngine):
+    """faster-whisper on CPU (greedy decoding, no timestamps: the pipeline already trimmed the silence)."""
+
+    name = "local"
+
+    def __init__(
+        self,
+        model: str = STT_LOCAL_MODEL,
+        compute_type: str = STT_LOCAL_COMPUTE_TYPE,
+        threads: int = STT_LOCAL_THREADS,
+        beam_size: int = STT_LOCAL_BEAM_SIZE,
+    ) -> None:
+        self.model_name = model
+        self.compute_type = compute_type
+        self.threads = threads
+        self.beam_size = beam_size
+        self.language = _whisper_language(SARVAM_LANGUAGE_CODE)
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._decode_lock = threading.Lock()
+
+    def load(self) -> None:
+        with self._load_lock:
+            if self._model is not None:
+                return
+            try:
+                from faster_whisper import WhisperModel
+            except ImportError as e:
+                raise SttUnavailable("faster-whisper is not installed") from e
+            logger.info(
+                "Loading local STT model=%s compute_type=%s threads=%s", self.model_name, self.compute_type, self.threads
+            )
+            try:
+                self._model = WhisperModel(
+                    self.model_name,
+                    device="cpu",
+                    compute_type=self.compute_type,
+                    cpu_threads=max(0, self.threads),
+                    download_root=STT_LOCAL_MODEL_DIR,
+                )
+            except Exception as e:
+                raise SttUnavailable(f"cannot load Whisper model {self.model_name!r}: {e}") from e
+
+    def transcribe(self, wav_bytes: bytes, cancel: Optional[threading.Event] = None) -> str:
+        audio = wav_to_float32(wav_bytes)
+        self.load()
+        texts = []
+        with self._decode_lock:
+            if cancel is not None and cancel.is_set():
+                return ""
+            segments, _info = self._model.transcribe(
+                audio,
+                language=self.language,
+                beam_size=self.beam_size,
+                condition_on_previous_text=False,
+                without_timestamps=True,
+                vad_filter=False,
+            )
+            for segment in segments:  # decoded lazily, one 30 s window at a time
+                texts.append(segment.text.strip())
+                if cancel is not None and cancel.is_set():
+                    break
+        return " ".join(t for t in texts if t)
+
+
+STT_ENGINES: Dict[str, Type[SttEngine]] = {
+    LocalWhisperEngine.name: LocalWhisperEngine,
+}
+
+
+def register_stt_engine(name: str, cls: Type[SttEngine]) -> None:
+    """Register an additional engine under name (selectable via STT_ENGINE / STT_FALLBACK_ENGINE)."""
+    STT_ENGINES[name] = cls
+
+
+def create_stt_engine(name: str) -> SttEngine:
+    """Instantiate the named engine. Raises ValueError for an unknown name."""
+    cls = STT_ENGINES.get(name)
+    if cls is None:
+        raise ValueError(f"Unknown STT engine {name!r}; choose from {sorted(STT_ENGINES)}")
+    return cls()
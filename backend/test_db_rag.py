@@ -45,6 +45,32 @@ def main():
     results = get_similar_contents(dummy_embedding, top_k=2)
     print(f"OK: get_similar_contents returned {len(results)} chunk(s)")
 
+    # Parity: in-process NumPy index vs pgvector, using stored embeddings as queries (no model needed)
+    from db import get_all_chunks, get_similar_chunks
+    from vector_index import VectorIndex
+
+    rows = get_all_chunks()
+    if rows:
+        index = VectorIndex.from_rows(rows)
+        k = min(5, len(rows))
+        for _, _, emb, _ in rows[:10]:
+            db_top = [r[1] for r in get_similar_chunks(list(emb), k, exact=True)]
+            local_top = [content for _, content, _ in index.search(emb, k)]
+            if set(db_top) != set(local_top) or db_top[:1] != local_top[:1]:
+                print("FAIL: local index top-k differs from exact pgvector search")
+                return 1
+        print(f"OK: local index matches exact pgvector search on {min(10, len(rows))} queries (k={k})")
+        filters = {"departments": ["ECE"]}
+        emb = rows[0][2]
+        db_ids = [r[0] for r in get_similar_chunks(list(emb), 5, filters=filters)]
+        local_ids = [r[0] for r in index.search(emb, 5, filters)]
+        if db_ids != local_ids:
+            print("FAIL: filtered search differs between local index and pgvector")
+            return 1
+        print(f"OK: filtered search {filters} returns the same {len(db_ids)} chunk(s) on both engines")
+    else:
+        print("SKIP: local index parity (table empty)")
+
     print("--- All checks passed ---")
     return 0
 
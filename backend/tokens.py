@@ -0,0 +1,51 @@
+"""Shared tiktoken (cl100k_base) helpers for chunking, ingest and context packing."""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_encoding = None
+_encoding_failed = False
+_lock = threading.Lock()
+
+
+def get_encoding():
+    """Return the cached cl100k_base encoding, or None if tiktoken (or its encoding file) is unavailable."""
+    global _encoding, _encoding_failed
+    if _encoding is not None or _encoding_failed:
+        return _encoding
+    with _lock:
+        if _encoding is None and not _encoding_failed:
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning("tiktoken unavailable, token counts are estimated (chars / 4): %s", e)
+                _encoding_failed = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text; chars / 4 when tiktoken is unavailable."""
+    if not text:
+        return 0
+    enc = get_encoding()
+    return len(enc.encode(text)) if enc is not None else len(text) // 4
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens (by characters when tiktoken is unavailable)."""
+    if max_tokens <= 0:
+        return ""
+    enc = get_encoding()
+    if enc is None:
+        return text[: max_tokens * 4]
+    tokens = enc.encode(text)
+    return text if len(tokens) <= max_tokens else enc.decode(tokens[:max_tokens])
+
+
+def exact_counts() -> bool:
+    """True when counts come from tiktoken rather than the chars / 4 estimate."""
+    return get_encoding() is not None
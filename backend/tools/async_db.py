@@ -0,0 +1,182 @@
+"""
+Async PostgreSQL access for retrieval (psycopg 3 AsyncConnectionPool), measured against the psycopg2 path
+in db.py by bench_async_db.py. The backend does not use it; it lives here with the benchmark until
+retrieval moves to the event loop.
+
+The event loop awaits queries directly instead of blocking a worker thread on them. The similarity query
+runs as a server-side prepared statement, and each connection is set up once when it is opened: pgvector
+types registered, autocommit on, and the ANN search settings applied for the session.
+Same contract as db.py: functions never raise; they log and return an empty result. Same reconnect policy
+too (db.ReconnectBackoff): after a failed pool open, callers get "unavailable" immediately until the next
+attempt is due, with the delay doubling from POSTGRES_RECONNECT_MIN_SEC to POSTGRES_RECONNECT_MAX_SEC.
+Needs psycopg[binary] and psycopg-pool (optional; without them is_async_db_available() is False).
+"""
+
+import asyncio
+import logging
+from typing import Any, List, Optional
+
+import metrics
+
+from config import (
+    PGVECTOR_HNSW_EF_SEARCH,
+    PGVECTOR_IVFFLAT_PROBES,
+    PGVECTOR_STORAGE,
+    POSTGRES_CONNECT_TIMEOUT_SEC,
+    POSTGRES_DB,
+    POSTGRES_HOST,
+    POSTGRES_PASSWORD,
+    POSTGRES_POOL_MAX,
+    POSTGRES_POOL_MIN,
+    POSTGRES_POOL_TIMEOUT_SEC,
+    POSTGRES_PORT,
+    POSTGRES_USER,
+)
+from db import ReconnectBackoff
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[Any] = None
+_pool_lock: Optional[asyncio.Lock] = None
+_backoff = ReconnectBackoff()
+
+# One named parameter used twice, so the prepared statement binds the query vector once.
+_SIMILAR_SQL = (
+    f"SELECT id, content, embedding <=> CAST(%(q)s AS {PGVECTOR_STORAGE}) AS distance, "
+    "(metadata->>'token_count')::int FROM college_knowledge "
+    f"ORDER BY embedding <=> CAST(%(q)s AS {PGVECTOR_STORAGE}) LIMIT %(k)s"
+)
+
+
+async def _configure(conn) -> None:
+    """Per-connection setup, run once when the pool opens the connection."""
+    from pgvector.psycopg import register_vector_async
+
+    await register_vector_async(conn)
+    await conn.execute(
+        "SELECT set_config('hnsw.ef_search', %s, false), set_config('ivfflat.probes', %s, false)",
+        (str(PGVECTOR_HNSW_EF_SEARCH), str(PGVECTOR_IVFFLAT_PROBES)),
+    )
+
+
+async def _get_pool():
+    """
+    Lazy async pool creation; never raises. Returns None without waiting while an open attempt is in
+    flight or, after a failure, until _backoff says the next attempt is due. Waiting on the open suspends
+    only the coroutine that makes the attempt, not worker threads (psycopg_pool itself replaces broken
+    connections in the background once the pool is open).
+    """
+    global _pool, _pool_lock
+    if _pool is not None:
+        return _pool
+    if not _backoff.due():
+        return None
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    if _pool_lock.locked():
+        return None
+    async with _pool_lock:
+        if _pool is not None:
+            return _pool
+        pool = None
+        try:
+            from psycopg.conninfo import make_conninfo
+            from psycopg_pool import AsyncConnectionPool
+
+            conninfo = make_conninfo(
+                host=POSTGRES_HOST,
+                port=POSTGRES_PORT,
+                dbname=POSTGRES_DB,
+                user=POSTGRES_USER,
+                password=POSTGRES_PASSWORD or None,
+                connect_timeout=POSTGRES_CONNECT_TIMEOUT_SEC,
+            )
+            pool = AsyncConnectionPool(
+                conninfo,
+                min_size=POSTGRES_POOL_MIN,
+                max_size=POSTGRES_POOL_MAX,
+                timeout=POSTGRES_POOL_TIMEOUT_SEC,
+                kwargs={"autocommit": True},
+                configure=_configure,
+                check=AsyncConnectionPool.check_connection,
+                open=False,
+            )
+            await pool.open(wait=True, timeout=POSTGRES_POOL_TIMEOUT_SEC)
+            if _backoff.attempts:
+                logger.info("PostgreSQL async pool opened after %d retry attempt(s).", _backoff.attempts)
+            _pool = pool
+            _backoff.reset()
+            return _pool
+        except Exception as e:
+            if _backoff.next_retry_at is None:
+                logger.warning("PostgreSQL async pool init failed: %s", e)
+            else:
+                _backoff.attempts += 1
+                metrics.incr("async_db.pool.reconnect_attempts")
+                logger.debug("PostgreSQL async pool attempt %d failed: %s", _backoff.attempts, e)
+            if pool is not None:
+                try:
+                    await pool.close()
+                except Exception:
+                    pass
+            _backoff.schedule()
+            return None
+
+
+async def is_async_db_available() -> bool:
+    """Return True if the async pool is initialized and usable. Triggers lazy init/retry."""
+    return await _get_pool() is not None
+
+
+async def close_async_pool() -> None:
+    """Close the async pool (application shutdown). Never raises."""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        try:
+            await pool.close()
+        except Exception as e:
+            logger.debug("Async pool close failed: %s", e)
+
+
+async def get_document_count_async() -> int:
+    """Async get_document_count: row count of college_knowledge, 0 on any error."""
+    pool = await _get_pool()
+    if pool is None:
+        return 0
+    try:
+        async with pool.connection() as conn:
+            cur = await conn.execute("SELECT COUNT(*) FROM college_knowledge")
+            row = await cur.fetchone()
+        return int(row[0]) if row else 0
+    except Exception as e:
+        logger.warning("Async DB count failed: %s", e)
+        return 0
+
+
+async def get_similar_chunks_async(embedding: List[float], top_k: int) -> List[tuple]:
+    """
+    Async get_similar_chunks (unfiltered, index-assisted): up to top_k (id, content, distance, token_count)
+    rows, nearest first, via a prepared statement. Returns empty list on any error or if DB unavailable.
+    """
+    if embedding is None or len(embedding) == 0 or top_k <= 0:
+        return []
+    pool = await _get_pool()
+    if pool is None:
+        logger.warning("Async DB vector search skipped: PostgreSQL not available")
+        return []
+    try:
+        from pgvector import Vector
+
+        async with pool.connection() as conn:
+            cur = await conn.execute(_SIMILAR_SQL, {"q": Vector(embedding), "k": top_k}, prepare=True)
+            rows = await cur.fetchall()
+        return [(str(r[0]), r[1], float(r[2]), r[3]) for r in rows if r[1] is not None]
+    except Exception as e:
+        logger.warning("Async DB vector search failed: %s", e)
+        return []
+
+
+async def get_similar_contents_async(embedding: List[float], top_k: int) -> List[str]:
+    """Async get_similar_contents: top_k content strings by cosine similarity; empty list on any error."""
+    return [row[1] for row in await get_similar_chunks_async(embedding, top_k)]
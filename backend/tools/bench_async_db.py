@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Compare the async retrieval path (async_db.py next to this script, psycopg 3 AsyncConnectionPool + prepared statement) with the
+sync path offloaded to threads (asyncio.to_thread(db.get_similar_contents)) under concurrent sessions.
+
+Each of --sessions tasks runs --queries searches back to back. A ticker task measures event loop lag
+(how late a 1 ms sleep wakes up), which is what other websocket sessions would feel.
+Needs PostgreSQL with pgvector and an ingested college_knowledge table.
+
+Usage (from repo root):
+    python backend/tools/bench_async_db.py [--sessions 1,8,32,64] [--queries 50] [--top-k 5]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+import numpy as np
+
+from async_db import close_async_pool, get_document_count_async, get_similar_contents_async
+from config import EMBEDDING_DIM
+from db import get_similar_contents, is_db_available
+
+
+async def _sync_path(vec: list, k: int) -> list:
+    return await asyncio.to_thread(get_similar_contents, vec, k)
+
+
+async def _run(search, sessions: int, queries: int, vectors: list, k: int) -> tuple:
+    latencies, lags, empty = [], [], 0
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append((time.perf_counter() - t0) * 1000.0 - 1.0)
+
+    async def session(seed: int) -> None:
+        nonlocal empty
+        rng = np.random.default_rng(seed)
+        for _ in range(queries):
+            vec = vectors[int(rng.integers(len(vectors)))]
+            t0 = time.perf_counter()
+            got = await search(vec, k)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            empty += not got
+
+    tick = asyncio.create_task(ticker())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(session(s) for s in range(sessions)))
+    wall = time.perf_counter() - t0
+    done.set()
+    await tick
+    return (
+        sessions * queries / wall,
+        float(np.percentile(latencies, 50)),
+        float(np.percentile(latencies, 95)),
+        float(np.percentile(lags, 99)) if lags else 0.0,
+        empty,
+    )
+
+
+async def main_async(args) -> None:
+    if not is_db_available() or await get_document_count_async() == 0:
+        print("Error: PostgreSQL not available (sync and async) or college_knowledge is empty.")
+        sys.exit(1)
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(20, EMBEDDING_DIM)).astype(np.float32)
+    vectors = [(v / np.linalg.norm(v)).tolist() for v in vectors]
+    # Warm both pools (connections opened, statement prepared) before timing.
+    await _run(_sync_path, 4, 5, vectors, args.top_k)
+    await _run(get_similar_contents_async, 4, 5, vectors, args.top_k)
+
+    print(f"{'path':>8} {'sessions':>9} {'q/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'lag p99':>8} {'empty':>6}")
+    for sessions in (int(s) for s in args.sessions.split(",")):
+        for name, search in (("thread", _sync_path), ("async", get_similar_contents_async)):
+            qps, p50, p95, lag, empty = await _run(search, sessions, args.queries, vectors, args.top_k)
+            print(f"{name:>8} {sessions:>9} {qps:>8.0f} {p50:>8.2f} {p95:>8.2f} {lag:>8.2f} {empty:>6}")
+    await close_async_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Async vs thread-offloaded sync pgvector retrieval.")
+    parser.add_argument("--sessions", default="1,8,32,64")
+    parser.add_argument("--queries", type=int, default=50, help="searches per session")
+    parser.add_argument("--top-k", type=int, default=5)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
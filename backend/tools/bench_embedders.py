@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Compare embedding backends on the college knowledge corpus: load time, peak RSS, per-query latency
+and recall@k of the top-k chunks against the "torch" reference backend.
+Each backend runs in its own process so memory numbers are not mixed.
+
+Usage (from repo root): python backend/tools/bench_embedders.py [--backends torch,onnx-int8] [--k 5]
+"""
+import argparse
+import multiprocessing as mp
+import resource
+import sys
+import time
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+import numpy as np
+
+from config import COLLEGE_KNOWLEDGE_PATH
+
+QUERIES = [
+    "What is the fee for CSE?",
+    "KCET cutoff for ECE",
+    "What is the NAAC grade of the college?",
+    "Who is the principal?",
+    "Tell me about placements",
+    "Is hostel available?",
+    "MBA admission eligibility",
+    "Where is the college located?",
+    "Which companies visit for placements?",
+    "Data science department intake",
+]
+
+
+def _load_corpus() -> tuple[list[str], list[str]]:
+    from chunking import load_knowledge_chunks
+
+    chunks = load_knowledge_chunks(COLLEGE_KNOWLEDGE_PATH)
+    # One extra query per chunk: its first few words (a paraphrase-free lookup).
+    queries = QUERIES + [" ".join(c.split()[:8]) for c in chunks]
+    return chunks, queries
+
+
+def _measure(backend: str, chunks: list[str], queries: list[str], out: "mp.Queue") -> None:
+    from embedders import create_embedder
+
+    t0 = time.perf_counter()
+    embedder = create_embedder(backend)
+    embedder.encode(["warmup"])
+    load_s = time.perf_counter() - t0
+
+    corpus = embedder.encode(chunks)
+    latencies = []
+    qvecs = []
+    for q in queries:
+        t = time.perf_counter()
+        qvecs.append(embedder.encode([q])[0])
+        latencies.append((time.perf_counter() - t) * 1000.0)
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    out.put({
+        "backend": backend,
+        "load_s": load_s,
+        "rss_mb": rss_mb,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "corpus": np.asarray(corpus, dtype=np.float32),
+        "queries": np.asarray(qvecs, dtype=np.float32),
+    })
+
+
+def _topk(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends.")
+    parser.add_argument("--backends", default="torch,onnx-int8")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    chunks, queries = _load_corpus()
+    print(f"corpus={len(chunks)} chunks, queries={len(queries)}, k={args.k}")
+    ctx = mp.get_context("spawn")
+    results = {}
+    for backend in args.backends.split(","):
+        q = ctx.Queue()
+        proc = ctx.Process(target=_measure, args=(backend, chunks, queries, q))
+        proc.start()
+        try:
+            results[backend] = q.get(timeout=1800)
+        except Exception as e:
+            print(f"{backend}: failed ({e})")
+        proc.join()
+
+    ref = results.get("torch")
+    ref_top = _topk(ref["corpus"], ref["queries"], args.k) if ref else None
+    print(f"{'backend':>10} {'load s':>8} {'RSS MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9}")
+    for backend, r in results.items():
+        recall = "n/a"
+        if ref_top is not None:
+            top = _topk(r["corpus"], r["queries"], args.k)
+            hits = sum(len(set(a) & set(b)) for a, b in zip(top, ref_top))
+            recall = f"{hits / (len(queries) * args.k):.3f}"
+        print(f"{backend:>10} {r['load_s']:>8.2f} {r['rss_mb']:>8.0f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {recall:>9}")
+
+
+if __name__ == "__main__":
+    main()
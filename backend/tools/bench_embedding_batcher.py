@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Load benchmark: embedding throughput vs. number of concurrent callers, global encode lock vs. micro-batcher.
+
+Usage (from repo root):
+  python backend/tools/bench_embedding_batcher.py                 # real BAAI/bge-base-en model
+  python backend/tools/bench_embedding_batcher.py --fake-ms 20,1  # synthetic model: 20 ms per call + 1 ms per text
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+import numpy as np
+
+from config import EMBEDDING_BATCH_MAX_SIZE, EMBEDDING_BATCH_MAX_WAIT_MS
+from embedding_batcher import EmbeddingBatcher
+
+QUERIES = [
+    "What is the fee for CSE?",
+    "KCET cutoff for ECE",
+    "What is the NAAC grade of the college?",
+    "Who is the principal?",
+    "Tell me about placements",
+    "Is hostel available?",
+    "MBA admission eligibility",
+    "Where is the college located?",
+]
+
+
+def _make_encode_fn(fake_ms: str | None):
+    """Return encode_fn(list[str]) -> ndarray. Fake model sleeps base + per_item ms per call."""
+    if fake_ms:
+        base_ms, per_item_ms = (float(x) for x in fake_ms.split(","))
+
+        def fake_encode(texts):
+            time.sleep((base_ms + per_item_ms * len(texts)) / 1000.0)
+            return np.zeros((len(texts), 768), dtype=np.float32)
+
+        return fake_encode
+
+    from rag import _get_embedding_model
+
+    model = _get_embedding_model()
+    model.encode(["warmup"], normalize_embeddings=True)
+
+    def real_encode(texts):
+        return model.encode(texts, normalize_embeddings=True, batch_size=len(texts))
+
+    return real_encode
+
+
+def _run_load(call, concurrency: int, per_worker: int) -> float:
+    """Run `concurrency` threads each issuing `per_worker` calls; return queries/second."""
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(wid: int) -> None:
+        barrier.wait()
+        for i in range(per_worker):
+            call(QUERIES[(wid + i) % len(QUERIES)])
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(concurrency)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return (concurrency * per_worker) / elapsed if elapsed > 0 else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32", help="comma-separated caller counts")
+    parser.add_argument("--per-worker", type=int, default=20, help="queries per caller")
+    parser.add_argument("--max-batch", type=int, default=EMBEDDING_BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=EMBEDDING_BATCH_MAX_WAIT_MS)
+    parser.add_argument("--fake-ms", default=None, help="synthetic model cost 'base,per_item' in ms")
+    args = parser.parse_args()
+
+    encode_fn = _make_encode_fn(args.fake_ms)
+    lock = threading.Lock()
+
+    def locked_call(text: str):
+        with lock:
+            return encode_fn([text])[0]
+
+    print(f"max_batch={args.max_batch} max_wait_ms={args.max_wait_ms} per_worker={args.per_worker}")
+    print(f"{'callers':>8} {'lock q/s':>10} {'batch q/s':>10} {'speedup':>8} {'avg batch':>10}")
+    for c in (int(x) for x in args.concurrency.split(",")):
+        lock_qps = _run_load(locked_call, c, args.per_worker)
+        batcher = EmbeddingBatcher(encode_fn, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+        batcher.start()
+        batch_qps = _run_load(batcher.encode, c, args.per_worker)
+        avg_batch = batcher.stats()["avg_batch"]
+        batcher.stop()
+        speedup = batch_qps / lock_qps if lock_qps else 0.0
+        print(f"{c:>8} {lock_qps:>10.1f} {batch_qps:>10.1f} {speedup:>7.2f}x {avg_batch:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Post-speech latency of the record modes on recorded WAVs: how long capture keeps running after the user
+stopped talking, for "fixed" (AUDIO_FIXED_RECORD_SECONDS), "vad" (AUDIO_SILENCE_STOP_MS) and "adaptive".
+
+Each WAV (16-bit PCM at AUDIO_SAMPLE_RATE, any channel count; downmixed) should be one utterance with
+some silence before and after it, recorded on the kiosk mic. The end of speech is taken from a pass
+over the whole file (last webrtcvad speech run of at least 60 ms above the noise floor); each
+endpointer then sees the frames one by one, as during capture. The first --calib-ms of the file stand
+in for the ring-buffer history used to calibrate the noise floor. "cut" marks an endpoint before the
+end of speech (the user would have been cut off).
+
+Usage (from repo root):
+  python backend/tools/bench_endpointing.py recordings/*.wav
+  python backend/tools/bench_endpointing.py --aggressiveness 3 --tail-ms 3000 short_answer.wav
+"""
+import argparse
+import sys
+import wave
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+import numpy as np
+import webrtcvad
+
+from config import AUDIO_FIXED_RECORD_SECONDS, AUDIO_SAMPLE_RATE, AUDIO_VAD_AGGRESSIVENESS, AUDIO_VAD_FRAME_MS
+from core.endpointing import AdaptiveEndpointer, FixedSilenceEndpointer, energy_db, noise_floor_db
+
+_FRAME_MS = 10 if AUDIO_VAD_FRAME_MS <= 10 else (20 if AUDIO_VAD_FRAME_MS <= 20 else 30)
+_FRAME = AUDIO_SAMPLE_RATE * _FRAME_MS // 1000
+_MIN_RUN_FRAMES = max(1, 60 // _FRAME_MS)
+_SPEECH_MARGIN_DB = 6.0
+
+
+def _load(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2 or w.getframerate() != AUDIO_SAMPLE_RATE:
+            raise SystemExit(f"{path}: need 16-bit PCM at {AUDIO_SAMPLE_RATE} Hz")
+        audio = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        channels = w.getnchannels()
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return audio
+
+
+def _speech_end_s(flags, energies, floor_db) -> float:
+    """End of the last speech run (>= 60 ms, above the floor) in the whole file; 0 if none."""
+    end, run = 0, 0
+    for i, (speech, db) in enumerate(zip(flags, energies)):
+        run = run + 1 if speech and (floor_db is None or db >= floor_db + _SPEECH_MARGIN_DB) else 0
+        if run >= _MIN_RUN_FRAMES:
+            end = i + 1
+    return end * _FRAME_MS / 1000.0
+
+
+def _endpoint_s(endpointer, flags, energies) -> float:
+    """Time at which endpointer stops capture (end of file if it never does)."""
+    for i, (speech, db) in enumerate(zip(flags, energies)):
+        if endpointer.update(speech, db):
+            return (i + 1) * _FRAME_MS / 1000.0
+    return len(flags) * _FRAME_MS / 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wavs", nargs="+", help="utterance recordings (16-bit PCM)")
+    parser.add_argument("--aggressiveness", type=int, default=AUDIO_VAD_AGGRESSIVENESS, help="webrtcvad 0-3")
+    parser.add_argument("--calib-ms", type=int, default=300, help="leading audio used as noise-floor history")
+    parser.add_argument("--tail-ms", type=int, default=0, help="append this much of the leading noise (short files)")
+    args = parser.parse_args()
+
+    vad = webrtcvad.Vad(args.aggressiveness)
+    calib_frames = max(1, args.calib_ms // _FRAME_MS)
+    print(f"aggressiveness={args.aggressiveness} frame={_FRAME_MS} ms fixed={AUDIO_FIXED_RECORD_SECONDS:.1f} s")
+    print(f"{'file':32} {'speech end':>10} {'fixed':>8} {'vad':>8} {'adaptive':>9}   (latency after speech, s)")
+    totals = {"fixed": [], "vad": [], "adaptive": []}
+    for path in args.wavs:
+        audio = _load(path)
+        if args.tail_ms:
+            noise = audio[: calib_frames * _FRAME]
+            reps = args.tail_ms * AUDIO_SAMPLE_RATE // 1000 // max(1, len(noise)) + 1
+            audio = np.concatenate([audio, np.tile(noise, reps)[: args.tail_ms * AUDIO_SAMPLE_RATE // 1000]])
+        n = len(audio) // _FRAME
+        frames = audio[: n * _FRAME].reshape(n, _FRAME)
+        flags = [vad.is_speech(f.tobytes(), AUDIO_SAMPLE_RATE) for f in frames]
+        energies = [energy_db(ms) for ms in (frames.astype(np.float64) ** 2).mean(axis=1)]
+        floor_db = noise_floor_db(energies[:calib_frames])
+        speech_end = _speech_end_s(flags, energies, floor_db)
+        if speech_end == 0:
+            print(f"{Path(path).name[:32]:32} {'no speech':>10}")
+            continue
+
+        ends = {
+            "fixed": AUDIO_FIXED_RECORD_SECONDS,
+            "vad": _endpoint_s(FixedSilenceEndpointer(_FRAME_MS), flags, energies),
+            "adaptive": _endpoint_s(AdaptiveEndpointer(_FRAME_MS, floor_db), flags, energies),
+        }
+        cells = []
+        for mode, end in ends.items():
+            latency = end - speech_end
+            totals[mode].append(latency)
+            cells.append(f"{latency:+.2f}" + ("cut" if latency < 0 else "   "))
+        print(f"{Path(path).name[:32]:32} {speech_end:10.2f} {cells[0]:>8} {cells[1]:>8} {cells[2]:>9}")
+
+    if any(totals.values()):
+        print("mean" + " " * 39 + "  ".join(f"{np.mean(v):+6.2f}" for v in totals.values() if v))
+        cut = sum(1 for v in totals["adaptive"] if v < 0)
+        print(f"adaptive cut {cut} of {len(totals['adaptive'])} utterance(s) short")
+
+
+if __name__ == "__main__":
+    main()
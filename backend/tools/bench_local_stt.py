@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Real-time factor and memory of the local STT engine (faster-whisper, stt_engines.LocalWhisperEngine) on
+recorded utterances. Run it on the kiosk (N100) to size STT_LOCAL_MODEL / STT_LOCAL_COMPUTE_TYPE /
+STT_LOCAL_THREADS: the fallback is only useful if RTF stays well below 1 and the model fits next to the
+embedder in RAM.
+
+RTF = decode time / audio duration (best of --repeat runs; the first run of the session is a warm-up and
+not counted). RSS is the process resident set after loading the model and its peak over the run. The first
+run downloads the model into STT_LOCAL_MODEL_DIR if it is a model name.
+
+Usage (from repo root):
+  python backend/tools/bench_local_stt.py recordings/*.wav
+  python backend/tools/bench_local_stt.py --model base --threads 4 --compute-type int8 question.wav
+"""
+import argparse
+import io
+import resource
+import sys
+import time
+import wave
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+from config import STT_LOCAL_BEAM_SIZE, STT_LOCAL_COMPUTE_TYPE, STT_LOCAL_MODEL, STT_LOCAL_THREADS
+from stt_engines import LocalWhisperEngine, SttUnavailable
+
+
+def _rss_mb() -> float:
+    """Current resident set size (Linux); falls back to the peak elsewhere."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return _peak_rss_mb()
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _audio_seconds(wav_bytes: bytes) -> float:
+    with wave.open(io.BytesIO(wav_bytes), "rb") as w:
+        return w.getnframes() / float(w.getframerate())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wavs", nargs="+", help="utterance recordings (16-bit PCM WAV)")
+    parser.add_argument("--model", default=STT_LOCAL_MODEL, help="Whisper model name or CTranslate2 model dir")
+    parser.add_argument("--compute-type", default=STT_LOCAL_COMPUTE_TYPE, help="int8, int8_float32, float32, ...")
+    parser.add_argument("--threads", type=int, default=STT_LOCAL_THREADS, help="CPU threads (0 = library default)")
+    parser.add_argument("--beam-size", type=int, default=STT_LOCAL_BEAM_SIZE)
+    parser.add_argument("--repeat", type=int, default=2, help="decodes per file (best is kept)")
+    args = parser.parse_args()
+
+    base_rss = _rss_mb()
+    engine = LocalWhisperEngine(args.model, args.compute_type, args.threads, args.beam_size)
+    t0 = time.perf_counter()
+    try:
+        engine.load()
+    except SttUnavailable as e:
+        raise SystemExit(f"local STT unavailable: {e}")
+    load_s = time.perf_counter() - t0
+    model_rss = _rss_mb()
+    print(
+        f"model={args.model} compute_type={args.compute_type} threads={args.threads} beam={args.beam_size} "
+        f"load {load_s:.2f} s, RSS {base_rss:.0f} -> {model_rss:.0f} MB"
+    )
+
+    clips = [(path, Path(path).read_bytes()) for path in args.wavs]
+    engine.transcribe(clips[0][1])  # warm-up
+
+    print(f"{'file':28} {'audio s':>7} {'decode s':>8} {'RTF':>6}")
+    total_audio = total_decode = 0.0
+    for path, wav_bytes in clips:
+        seconds = _audio_seconds(wav_bytes)
+        best, text = float("inf"), ""
+        for _ in range(max(1, args.repeat)):
+            t0 = time.perf_counter()
+            text = engine.transcribe(wav_bytes)
+            best = min(best, time.perf_counter() - t0)
+        total_audio += seconds
+        total_decode += best
+        print(f"{Path(path).name[:28]:28} {seconds:7.2f} {best:8.2f} {best / max(seconds, 1e-9):6.2f}  {text[:60]!r}")
+
+    print(
+        f"overall RTF {total_decode / max(total_audio, 1e-9):.2f} over {total_audio:.1f} s of audio; "
+        f"RSS {_rss_mb():.0f} MB (model +{model_rss - base_rss:.0f} MB), peak {_peak_rss_mb():.0f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
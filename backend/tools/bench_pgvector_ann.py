@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark pgvector ANN indexes against exact search on synthetic corpora: build time, query
+latency (p50/p95), recall@k and table/index size for HNSW ef_search and IVFFlat probes sweeps.
+--storage vector,halfvec repeats every run on a float16 (halfvec) copy of the same rows; recall is
+always measured against exact float32 search, so it shows what half precision costs.
+
+Each size gets its own scratch table (bench_ann_<n>), filled server-side with random clustered unit
+vectors (so no data crosses the wire) and dropped afterwards unless --keep.
+Needs PostgreSQL with pgvector (uses the POSTGRES_* settings).
+
+Usage (from repo root):
+    python backend/tools/bench_pgvector_ann.py --sizes 1000,10000,100000 [--dim 768] [--queries 50]
+    python backend/tools/bench_pgvector_ann.py --sizes 1000000 --dim 128 --index hnsw
+    python backend/tools/bench_pgvector_ann.py --sizes 100000 --storage vector,halfvec
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+import numpy as np
+
+from config import PGVECTOR_HNSW_EF_CONSTRUCTION, PGVECTOR_HNSW_M
+from db import get_connection, is_db_available, put_connection
+
+
+def _fill(cur, table: str, n: int, dim: int, clusters: int) -> None:
+    # Cluster centres plus per-row noise: closer to real embeddings than uniform noise, where
+    # every point is nearly equidistant and ANN recall is meaningless.
+    cur.execute(f"DROP TABLE IF EXISTS {table}")
+    cur.execute(f"CREATE TABLE {table} (id BIGINT PRIMARY KEY, embedding VECTOR({dim}))")
+    cur.execute(
+        f"CREATE TEMP TABLE bench_centres AS SELECT c, ARRAY(SELECT random() - 0.5 FROM generate_series(1, {dim}) g "
+        f"WHERE c > 0) AS v FROM generate_series(1, {clusters}) c"
+    )
+    cur.execute(
+        f"INSERT INTO {table} "
+        f"SELECT i, l2_normalize(ARRAY(SELECT bc.v[g] + 0.15 * (random() - 0.5) FROM generate_series(1, {dim}) g "
+        f"WHERE i > 0)::vector) "
+        f"FROM generate_series(1, %s) i JOIN bench_centres bc ON bc.c = 1 + (i %% {clusters})",
+        (n,),
+    )
+    cur.execute("DROP TABLE bench_centres")
+    cur.execute(f"ANALYZE {table}")
+
+
+def _queries(cur, table: str, n: int, count: int) -> list:
+    """Perturbed copies of random rows, so each query has true near neighbours."""
+    rng = np.random.default_rng(0)
+    ids = rng.integers(1, n + 1, size=count)
+    out = []
+    for i in ids:
+        cur.execute(f"SELECT embedding FROM {table} WHERE id = %s", (int(i),))
+        v = np.asarray(cur.fetchone()[0], dtype=np.float32)
+        v = v + rng.normal(scale=0.02, size=v.shape).astype(np.float32)
+        out.append(v / np.linalg.norm(v))
+    return out
+
+
+def _search(cur, table: str, q, k: int, settings: dict, storage: str = "vector") -> tuple[list, float]:
+    from pgvector import Vector
+
+    for name, value in settings.items():
+        cur.execute("SELECT set_config(%s, %s, true)", (name, str(value)))
+    vec = Vector(q)
+    t0 = time.perf_counter()
+    cur.execute(f"SELECT id FROM {table} ORDER BY embedding <=> CAST(%s AS {storage}) LIMIT %s", (vec, k))
+    ids = [r[0] for r in cur.fetchall()]
+    ms = (time.perf_counter() - t0) * 1000.0
+    cur.connection.commit()
+    return ids, ms
+
+
+def _run(cur, table: str, queries: list, k: int, settings: dict, truth: list, storage: str) -> tuple[float, float, float]:
+    latencies, hits = [], 0
+    for q, exact in zip(queries, truth):
+        ids, ms = _search(cur, table, q, k, settings, storage)
+        latencies.append(ms)
+        hits += len(set(ids) & set(exact))
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95)), hits / (len(queries) * k)
+
+
+def _size_mb(cur, relation: str) -> float:
+    cur.execute("SELECT pg_total_relation_size(%s)", (relation,))
+    return cur.fetchone()[0] / (1024.0 * 1024.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pgvector HNSW/IVFFlat vs exact search.")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--index", default="hnsw,ivfflat", help="comma list of hnsw, ivfflat")
+    parser.add_argument("--ef-search", default="10,40,100")
+    parser.add_argument("--probes", default="1,10,40")
+    parser.add_argument("--storage", default="vector", help="comma list of vector, halfvec")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch tables")
+    args = parser.parse_args()
+
+    if not is_db_available():
+        print("Error: PostgreSQL not available.")
+        sys.exit(1)
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        print(
+            f"{'rows':>9} {'storage':>8} {'index':>8} {'param':>12} {'build s':>8} {'MB':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9}"
+        )
+        for n in (int(s) for s in args.sizes.split(",")):
+            table = f"bench_ann_{n}"
+            t0 = time.perf_counter()
+            _fill(cur, table, n, args.dim, args.clusters)
+            conn.commit()
+            fill_s = time.perf_counter() - t0
+            queries = _queries(cur, table, n, args.queries)
+            exact = {"enable_indexscan": "off"}
+            truth = [_search(cur, table, q, args.k, exact)[0] for q in queries]
+
+            for storage in args.storage.split(","):
+                tbl = table if storage == "vector" else f"{table}_half"
+                if storage == "halfvec":
+                    cur.execute(f"DROP TABLE IF EXISTS {tbl}")
+                    cur.execute(
+                        f"CREATE TABLE {tbl} AS SELECT id, embedding::halfvec({args.dim}) AS embedding FROM {table}"
+                    )
+                    cur.execute(f"ANALYZE {tbl}")
+                    conn.commit()
+                p50, p95, recall = _run(cur, tbl, queries, args.k, exact, truth, storage)
+                print(
+                    f"{n:>9} {storage:>8} {'exact':>8} {'-':>12} {fill_s:>8.1f} {_size_mb(cur, tbl):>8.1f} "
+                    f"{p50:>8.2f} {p95:>8.2f} {recall:>9.3f}"
+                )
+                opclass = f"{storage}_cosine_ops"
+                for kind in args.index.split(","):
+                    cur.execute(f"DROP INDEX IF EXISTS {tbl}_ann")
+                    if kind == "hnsw":
+                        sql = (
+                            f"CREATE INDEX {tbl}_ann ON {tbl} USING hnsw (embedding {opclass}) "
+                            f"WITH (m = {PGVECTOR_HNSW_M}, ef_construction = {PGVECTOR_HNSW_EF_CONSTRUCTION})"
+                        )
+                        sweep = [("hnsw.ef_search", int(v)) for v in args.ef_search.split(",")]
+                    else:
+                        lists = max(1, int(np.sqrt(n)))
+                        sql = f"CREATE INDEX {tbl}_ann ON {tbl} USING ivfflat (embedding {opclass}) WITH (lists = {lists})"
+                        sweep = [("ivfflat.probes", int(v)) for v in args.probes.split(",")]
+                    t0 = time.perf_counter()
+                    cur.execute(sql)
+                    conn.commit()
+                    build_s = time.perf_counter() - t0
+                    index_mb = _size_mb(cur, f"{tbl}_ann")
+                    for name, value in sweep:
+                        p50, p95, recall = _run(cur, tbl, queries, args.k, {name: value}, truth, storage)
+                        param = f"{name.split('.')[1]}={value}"
+                        print(
+                            f"{n:>9} {storage:>8} {kind:>8} {param:>12} {build_s:>8.1f} {index_mb:>8.1f} "
+                            f"{p50:>8.2f} {p95:>8.2f} {recall:>9.3f}"
+                        )
+                if storage == "halfvec" and not args.keep:
+                    cur.execute(f"DROP TABLE IF EXISTS {tbl}")
+                    conn.commit()
+            if not args.keep:
+                cur.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.commit()
+        cur.close()
+    finally:
+        put_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Speech-to-text latency after endpointing: one upload of the whole recording vs. streaming segments
+(SegmentedTranscriber fed by the capture loop while the user is still talking).
+
+Each WAV (16-bit PCM at AUDIO_SAMPLE_RATE; downmixed) is replayed in real time through the record loop
+(--mode, default AUDIO_RECORD_MODE), then transcribed both ways. "after end" is the time from the end
+of capture to the final transcript, i.e. what the user waits for on top of speaking. Use it against
+tools/stub_stt_server.py (or the real API with SARVAM_API_KEY and no --url).
+
+Usage (from repo root):
+  python backend/tools/stub_stt_server.py &
+  python backend/tools/bench_streaming_stt.py --url http://127.0.0.1:8765/speech-to-text recordings/*.wav
+  python backend/tools/bench_streaming_stt.py --speed 4 --mode vad long_question.wav
+"""
+import argparse
+import os
+import sys
+import time
+import wave
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wavs", nargs="+", help="utterance recordings (16-bit PCM)")
+    parser.add_argument("--url", default="", help="STT endpoint (sets SARVAM_STT_URL), e.g. the stub server")
+    parser.add_argument("--mode", choices=("fixed", "vad", "adaptive"), default=None, help="record mode")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (1 = real time)")
+    return parser.parse_args()
+
+
+ARGS = _parse_args()
+if ARGS.url:
+    os.environ["SARVAM_STT_URL"] = ARGS.url  # before config is imported
+
+import numpy as np
+
+from config import AUDIO_RECORD_MODE, AUDIO_SAMPLE_RATE
+from core.audio_pipeline import _record_fixed_duration, _record_vad
+from stt import SegmentedTranscriber, wav_to_transcript
+
+
+class _ReplaySession:
+    """Stands in for CaptureSession: serves a mono recording at (speed x) real time, no history."""
+
+    def __init__(self, audio: np.ndarray, speed: float) -> None:
+        self.audio = audio.reshape(-1, 1)
+        self.channels = 1
+        self.speed = speed
+        self.pos = 0
+        self.t0 = time.perf_counter()
+
+    def history(self, frames: int) -> np.ndarray:
+        return self.audio[:0]
+
+    def read_into(self, out: np.ndarray, timeout: float = 2.0) -> bool:
+        out = out.reshape(-1, 1)
+        end = self.pos + len(out)
+        if end > len(self.audio):
+            return False
+        delay = self.t0 + end / AUDIO_SAMPLE_RATE / self.speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        out[:] = self.audio[self.pos : end]
+        self.pos = end
+        return True
+
+
+def _load(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2 or w.getframerate() != AUDIO_SAMPLE_RATE:
+            raise SystemExit(f"{path}: need 16-bit PCM at {AUDIO_SAMPLE_RATE} Hz")
+        audio = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        channels = w.getnchannels()
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return audio
+
+
+def _record(audio: np.ndarray, mode: str, stt=None):
+    session = _ReplaySession(audio, ARGS.speed)
+    if mode == "fixed":
+        return _record_fixed_duration(session, 1, stt)
+    return _record_vad(session, 1, mode == "adaptive", stt)
+
+
+def main() -> None:
+    mode = ARGS.mode or AUDIO_RECORD_MODE
+    print(f"mode={mode} speed={ARGS.speed}x endpoint={os.environ.get('SARVAM_STT_URL') or 'sarvamai SDK'}")
+    print(f"{'file':28} {'audio s':>7} {'one-shot after end':>19} {'streamed after end':>19} {'segments':>8}")
+    for path in ARGS.wavs:
+        audio = _load(path)
+        wav = _record(audio, mode)
+        if not wav:
+            print(f"{Path(path).name[:28]:28} {'no speech':>7}")
+            continue
+        t0 = time.perf_counter()
+        one_shot = wav_to_transcript(wav)
+        one_shot_s = time.perf_counter() - t0
+
+        stt = SegmentedTranscriber()
+        wav = _record(audio, mode, stt)
+        t0 = time.perf_counter()
+        streamed = stt.finish()
+        streamed_s = time.perf_counter() - t0
+        print(
+            f"{Path(path).name[:28]:28} {(len(wav) - 44) / 2 / AUDIO_SAMPLE_RATE:7.2f} "
+            f"{one_shot_s:18.2f}s {streamed_s:18.2f}s {stt.segments:8d}"
+        )
+        print(f"    one-shot: {one_shot!r}\n    streamed: {streamed!r}")
+
+
+if __name__ == "__main__":
+    main()
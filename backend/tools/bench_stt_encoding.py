@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Upload size and encode cost of the STT_UPLOAD_FORMAT choices (wav, flac, opus) on recorded utterances.
+
+Each WAV goes through stt.encode_for_upload per format (the same path as a real request, including the
+fallback to WAV). Prints encode ms, bytes, ratio to the WAV, and the estimated upload time at
+--uplink-kbps (encode + transfer, ignoring request overhead), which is what the format saves per turn
+on a slow kiosk uplink.
+
+Usage (from repo root):
+  python backend/tools/bench_stt_encoding.py recordings/*.wav
+  python backend/tools/bench_stt_encoding.py --uplink-kbps 256 --repeat 5 long_question.wav
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+from stt import encode_for_upload
+
+_FORMATS = ("wav", "flac", "opus")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wavs", nargs="+", help="utterance recordings (WAV)")
+    parser.add_argument("--uplink-kbps", type=float, default=1000.0, help="uplink bandwidth for the estimate")
+    parser.add_argument("--repeat", type=int, default=3, help="encodes per file and format (best is kept)")
+    args = parser.parse_args()
+
+    print(f"uplink={args.uplink_kbps:.0f} kbit/s")
+    print(f"{'file':28} {'format':>6} {'encode ms':>9} {'bytes':>9} {'ratio':>6} {'upload ms':>9}")
+    for path in args.wavs:
+        wav = Path(path).read_bytes()
+        for fmt in _FORMATS:
+            best_ms, data, name = float("inf"), wav, "audio.wav"
+            for _ in range(max(1, args.repeat)):
+                t0 = time.perf_counter()
+                data, name, _content_type = encode_for_upload(wav, fmt)
+                best_ms = min(best_ms, (time.perf_counter() - t0) * 1000.0)
+            upload_ms = best_ms + len(data) * 8 / args.uplink_kbps
+            label = fmt if fmt == "wav" or not name.endswith(".wav") else f"{fmt}!"
+            print(
+                f"{Path(path).name[:28]:28} {label:>6} {best_ms:9.1f} {len(data):9d} "
+                f"{len(data) / len(wav):6.2f} {upload_ms:9.0f}"
+            )
+    print("(a trailing ! means that format fell back to WAV)")
+
+
+if __name__ == "__main__":
+    main()
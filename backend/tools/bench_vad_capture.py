@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+CPU and memory cost of the VAD capture loop: the old bytes/list loop vs. CaptureBuffer.
+
+Both loops process the same synthetic multi-channel recording (speech-like bursts in noise), frame by
+frame, with webrtcvad and the silence-RMS check, and build the WAV. Frames come from memory, not the
+mic, so only the capture-side work is measured: CPU time (time.process_time) and peak Python
+allocation for one recording (tracemalloc). Run it on the kiosk (N100).
+
+Usage (from repo root):
+  python backend/tools/bench_vad_capture.py                      # 6 channels (ReSpeaker), 10 s, 20 runs
+  python backend/tools/bench_vad_capture.py --channels 1 --seconds 30 --channel 0
+"""
+import argparse
+import io
+import struct
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+import numpy as np
+import webrtcvad
+
+from config import AUDIO_SAMPLE_RATE
+from core.audio_pipeline import BYTES_PER_FRAME, SAMPLES_PER_FRAME, CaptureBuffer, _vad_accepts_memoryview
+
+
+class _ArraySession:
+    """Stands in for CaptureSession: serves frames from an in-memory (samples, channels) recording."""
+
+    def __init__(self, audio: np.ndarray) -> None:
+        self.audio = audio
+        self.pos = 0
+        self.channels = audio.shape[1]
+
+    def read(self, frames: int, timeout: float = 2.0):
+        if self.pos + frames > len(self.audio):
+            return None
+        block = self.audio[self.pos : self.pos + frames].copy()
+        self.pos += frames
+        return block
+
+    def read_into(self, out: np.ndarray, timeout: float = 2.0) -> bool:
+        if out.ndim == 1:
+            out = out.reshape(-1, 1)
+        if self.pos + len(out) > len(self.audio):
+            return False
+        out[:] = self.audio[self.pos : self.pos + len(out)]
+        self.pos += len(out)
+        return True
+
+
+def _synth(seconds: float, channels: int, seed: int = 0) -> np.ndarray:
+    """Noise with 1 s tone bursts every 2 s (enough for webrtcvad to flip between speech and silence)."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * AUDIO_SAMPLE_RATE)
+    t = np.arange(n) / AUDIO_SAMPLE_RATE
+    voiced = (t % 2.0) < 1.0
+    mono = rng.normal(0, 200, n) + voiced * 6000 * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    audio = np.repeat(mono[:, None], channels, axis=1) + rng.normal(0, 50, (n, channels))
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+
+def _legacy(session: _ArraySession, vad) -> bytes:
+    """The previous loop: per-frame bytes, list of chunks, joined twice at the end."""
+    accumulated = []
+    while True:
+        frame = session.read(SAMPLES_PER_FRAME)
+        if frame is None:
+            break
+        if session.channels > 1:
+            raw_mono = frame.mean(axis=1).astype(np.int16).tobytes()
+        else:
+            raw_mono = frame.tobytes()
+        for off in range(0, len(raw_mono) - BYTES_PER_FRAME + 1, BYTES_PER_FRAME):
+            vad.is_speech(raw_mono[off : off + BYTES_PER_FRAME], AUDIO_SAMPLE_RATE)
+        accumulated.append(raw_mono)
+    mono = b"".join(accumulated)
+    buf = io.BytesIO()
+    buf.write(b"RIFF")
+    buf.write(struct.pack("<I", 36 + len(mono)))
+    buf.write(b"WAVEfmt ")
+    buf.write(struct.pack("<IHHIIHH", 16, 1, 1, AUDIO_SAMPLE_RATE, AUDIO_SAMPLE_RATE * 2, 2, 16))
+    buf.write(b"data")
+    buf.write(struct.pack("<I", len(mono)))
+    buf.write(mono)
+    arr = np.frombuffer(b"".join(accumulated), dtype=np.int16)
+    float(np.sqrt(np.mean(arr.astype(np.float64) ** 2)) / 32768.0)
+    return buf.getvalue()
+
+
+def _buffered(session: _ArraySession, vad, channel: int) -> bytes:
+    """The CaptureBuffer loop used by record_audio."""
+    buf = CaptureBuffer(len(session.audio), session.channels, channel=channel)
+    while buf.append_frame(session):
+        vad.is_speech(buf.last_frame(), AUDIO_SAMPLE_RATE)
+    buf.rms()
+    return buf.wav()
+
+
+def _cpu_ms_per_audio_s(fn, audio: np.ndarray, runs: int) -> float:
+    seconds = len(audio) / AUDIO_SAMPLE_RATE
+    vad = webrtcvad.Vad(2)
+    fn(_ArraySession(audio), vad)  # warm-up
+    t0 = time.process_time()
+    for _ in range(runs):
+        fn(_ArraySession(audio), vad)
+    return (time.process_time() - t0) * 1000.0 / (runs * seconds)
+
+
+def _peak_alloc_kb(fn, audio: np.ndarray) -> float:
+    vad = webrtcvad.Vad(2)
+    session = _ArraySession(audio)
+    tracemalloc.start()
+    fn(session, vad)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=6, help="input channels (ReSpeaker 6-ch firmware: 6)")
+    parser.add_argument("--channel", type=int, default=-1, help="CaptureBuffer channel select (-1 = mean)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of the synthetic recording")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    audio = _synth(args.seconds, args.channels)
+    print(f"webrtcvad takes memoryview: {_vad_accepts_memoryview(webrtcvad.Vad(2))}")
+    print(f"{args.seconds:.0f} s, {args.channels} ch, {args.runs} runs")
+    print(f"  {'':24} {'CPU ms / audio s':>16} {'peak alloc KiB':>15}")
+    buffered_fn = lambda s, v: _buffered(s, v, args.channel)  # noqa: E731
+    for name, fn in (("legacy bytes/list loop", _legacy), ("CaptureBuffer", buffered_fn)):
+        cpu = _cpu_ms_per_audio_s(fn, audio, args.runs)
+        print(f"  {name:24} {cpu:16.3f} {_peak_alloc_kb(fn, audio):15.0f}")
+    print(f"  (WAV size: {len(audio) * 2 / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
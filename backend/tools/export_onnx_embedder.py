@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Export the configured sentence-transformers model to ONNX and quantize it to int8 for
+EMBEDDING_BACKEND=onnx-int8. Needs torch + sentence-transformers + onnxruntime (build machine only;
+the kiosk only needs onnxruntime + tokenizers at runtime).
+
+Usage (from repo root): python backend/tools/export_onnx_embedder.py [--out DIR] [--keep-fp32]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+from config import EMBEDDING_DIM, EMBEDDING_MODEL_NAME, EMBEDDING_ONNX_DIR
+from embedders import ONNX_MANIFEST_FILE, ONNX_MODEL_FILE
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export + int8-quantize the embedding model to ONNX.")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--out", default=EMBEDDING_ONNX_DIR)
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--keep-fp32", action="store_true", help="keep the unquantized model.onnx")
+    args = parser.parse_args()
+
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    st_model = SentenceTransformer(args.model, device="cpu")
+    transformer = st_model[0].auto_model
+    transformer.config.return_dict = False
+    transformer.eval()
+    tokenizer = st_model.tokenizer
+    pooling = "cls" if getattr(st_model[1], "pooling_mode_cls_token", False) else "mean"
+    dim = st_model.get_sentence_embedding_dimension()
+    if dim != EMBEDDING_DIM:
+        print(f"Warning: model dim {dim} != EMBEDDING_DIM {EMBEDDING_DIM}; update .env before ingest.")
+
+    sample = tokenizer(["Sai Vidya Institute of Technology"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic_axes = {n: {0: "batch", 1: "seq"} for n in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+
+    fp32_path = out / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[n] for n in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state", "pooler_output"],
+            dynamic_axes=dynamic_axes,
+            opset_version=args.opset,
+        )
+    print(f"Exported {fp32_path} ({fp32_path.stat().st_size / 1e6:.1f} MB)")
+
+    int8_path = out / ONNX_MODEL_FILE
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    print(f"Quantized {int8_path} ({int8_path.stat().st_size / 1e6:.1f} MB)")
+    if not args.keep_fp32:
+        fp32_path.unlink()
+
+    tokenizer.save_pretrained(str(out))
+    manifest = {
+        "model_name": args.model,
+        "dim": dim,
+        "pooling": pooling,
+        "max_length": st_model.max_seq_length,
+        "model_file": ONNX_MODEL_FILE,
+    }
+    (out / ONNX_MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    print(f"Wrote {out / ONNX_MANIFEST_FILE}: {manifest}")
+
+
+if __name__ == "__main__":
+    main()
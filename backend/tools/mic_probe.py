@@ -18,7 +18,7 @@ from config import (
     AUDIO_SAMPLE_RATE,
     AUDIO_CHANNELS,
 )
-from core.audio_pipeline import _resolve_input_device
+from core.audio_capture import resolve_input_device
 
 
 def main() -> None:
@@ -37,7 +37,7 @@ def main() -> None:
     print(f"Default input index: {sd.default.device[0]}")
     print(f"Default output index: {sd.default.device[1]}")
 
-    device_id = _resolve_input_device()
+    device_id, _ = resolve_input_device()
     dev = devices[device_id] if device_id < len(devices) else {}
     dev_name = dev.get("name", "?")
     print(f"Using device {device_id}: {dev_name}")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Stress the PostgreSQL connection pool: many threads calling db.get_similar_contents at once.
+
+1. Checkout overhead: get_connection/put_connection round trips as the pool does them (pgvector types
+   registered once per connection) vs the old behaviour of calling register_vector on every checkout.
+2. Concurrency: --threads workers each run --queries searches with random query vectors. Every result is
+   compared with the serial result for the same vector, so a connection shared between threads (wrong or
+   interleaved rows, protocol errors) shows up as a mismatch; empty results count as failures.
+
+Needs PostgreSQL with pgvector and an ingested college_knowledge table (uses the POSTGRES_* and
+POSTGRES_POOL_* settings).
+
+Usage (from repo root):
+    python backend/tools/stress_db_pool.py [--threads 32] [--queries 50] [--vectors 20] [--top-k 5]
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+import numpy as np
+
+from config import EMBEDDING_DIM, POSTGRES_POOL_MAX, POSTGRES_POOL_MIN
+from db import get_connection, get_document_count, get_similar_contents, is_db_available, put_connection
+
+
+def _checkout_ms(rounds: int, register_each: bool) -> float:
+    from pgvector.psycopg2 import register_vector
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        conn = get_connection()
+        try:
+            if register_each:
+                register_vector(conn)
+                conn.rollback()
+        finally:
+            put_connection(conn)
+    return (time.perf_counter() - t0) * 1000.0 / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent get_similar_contents stress test for the DB pool.")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=50, help="searches per thread")
+    parser.add_argument("--vectors", type=int, default=20, help="distinct query vectors")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--checkouts", type=int, default=500, help="rounds for the checkout overhead test")
+    args = parser.parse_args()
+
+    if not is_db_available():
+        print("Error: PostgreSQL not available.")
+        sys.exit(1)
+    if get_document_count() == 0:
+        print("Error: college_knowledge is empty; run ingest first.")
+        sys.exit(1)
+
+    print(f"pool: min={POSTGRES_POOL_MIN} max={POSTGRES_POOL_MAX}")
+    pooled = _checkout_ms(args.checkouts, register_each=False)
+    legacy = _checkout_ms(args.checkouts, register_each=True)
+    print(f"checkout: {pooled:.3f} ms pooled, {legacy:.3f} ms with register_vector per checkout")
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(args.vectors, EMBEDDING_DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = [get_similar_contents(v.tolist(), args.top_k) for v in vectors]
+
+    latencies = []
+    failures = {"empty": 0, "mismatch": 0, "error": 0}
+    lock = threading.Lock()
+
+    def worker(seed: int) -> None:
+        local_rng = np.random.default_rng(seed)
+        times, errs = [], {"empty": 0, "mismatch": 0, "error": 0}
+        for _ in range(args.queries):
+            i = int(local_rng.integers(len(vectors)))
+            t0 = time.perf_counter()
+            try:
+                got = get_similar_contents(vectors[i].tolist(), args.top_k)
+            except Exception:
+                errs["error"] += 1
+                continue
+            times.append((time.perf_counter() - t0) * 1000.0)
+            if not got:
+                errs["empty"] += 1
+            elif got != expected[i]:
+                errs["mismatch"] += 1
+        with lock:
+            latencies.extend(times)
+            for k, v in errs.items():
+                failures[k] += v
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(args.threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    total = args.threads * args.queries
+    print(
+        f"{args.threads} threads x {args.queries} queries: {total / wall:.0f} q/s, "
+        f"p50 {np.percentile(latencies, 50):.2f} ms, p95 {np.percentile(latencies, 95):.2f} ms"
+        if latencies
+        else "no successful queries"
+    )
+    print(f"failures: {failures}")
+    sys.exit(1 if any(failures.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
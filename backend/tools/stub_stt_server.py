@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Sarvam speech-to-text endpoint, for testing streaming STT without the network.
+
+Accepts the same multipart POST as Sarvam (a "file" part plus form fields), waits a simulated recognition
+time (--base-ms plus --per-audio-sec-ms per second of audio), and answers {"transcript": ...} describing
+the audio it received (duration, size, format: WAV, or FLAC / Ogg Opus as sent with STT_UPLOAD_FORMAT).
+Requests are handled concurrently, like the real API.
+
+Usage (from repo root):
+  python backend/tools/stub_stt_server.py --port 8765 --base-ms 400 --per-audio-sec-ms 150
+  SARVAM_STT_URL=http://127.0.0.1:8765/speech-to-text python backend/main.py
+"""
+import argparse
+import io
+import json
+import time
+import wave
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _audio_seconds(data: bytes) -> float:
+    """Duration of a WAV upload (FLAC/Ogg too if soundfile is installed); 0 for formats it cannot parse."""
+    try:
+        with wave.open(io.BytesIO(data), "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except Exception:
+        pass
+    try:
+        import soundfile as sf
+
+        return sf.info(io.BytesIO(data)).duration
+    except Exception:
+        return 0.0
+
+
+def _parse_multipart(content_type: str, body: bytes) -> dict:
+    """{field name: bytes} of a multipart/form-data body."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+    )
+    parts = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            parts[name] = part.get_payload(decode=True) or b""
+    return parts
+
+
+class _Handler(BaseHTTPRequestHandler):
+    base_ms = 400.0
+    per_audio_sec_ms = 150.0
+    requests = 0
+
+    def do_POST(self) -> None:
+        t0 = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            parts = _parse_multipart(self.headers.get("Content-Type", ""), body)
+        except Exception as e:
+            self._reply(400, {"error": f"bad multipart body: {e}"})
+            return
+        audio = parts.get("file", b"")
+        if not audio:
+            self._reply(400, {"error": "missing file"})
+            return
+        type(self).requests += 1
+        n = type(self).requests
+        seconds = _audio_seconds(audio)
+        time.sleep((self.base_ms + self.per_audio_sec_ms * seconds) / 1000.0)
+        fmt = audio[:4].decode("latin-1") if audio[:4].isascii() else "?"
+        self._reply(200, {
+            "request_id": f"stub-{n}",
+            "transcript": f"segment {n} ({seconds:.2f} s, {len(audio)} bytes, {fmt})",
+            "language_code": (parts.get("language_code") or b"").decode() or None,
+        })
+        print(f"#{n}: {len(audio)} bytes, {seconds:.2f} s audio, {(time.perf_counter() - t0) * 1000:.0f} ms", flush=True)
+
+    def _reply(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--base-ms", type=float, default=400.0, help="fixed latency per request")
+    parser.add_argument("--per-audio-sec-ms", type=float, default=150.0, help="extra latency per second of audio")
+    args = parser.parse_args()
+
+    _Handler.base_ms = args.base_ms
+    _Handler.per_audio_sec_ms = args.per_audio_sec_ms
+    server = ThreadingHTTPServer((args.host, args.port), _Handler)
+    print(f"Stub STT listening on http://{args.host}:{args.port}/speech-to-text", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
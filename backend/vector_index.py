@@ -0,0 +1,122 @@
+"""In-process exact vector index over the college knowledge chunks (NumPy, cosine similarity)."""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def matches_filters(metadata: Optional[dict], filters: Optional[dict]) -> bool:
+    """
+    JSONB containment (metadata @> filters) for chunk metadata: every filter key must match;
+    a list filter value matches when all its items are in the metadata list.
+    """
+    if not filters:
+        return True
+    if not metadata:
+        return False
+    for key, want in filters.items():
+        have = metadata.get(key)
+        if isinstance(want, list):
+            if not isinstance(have, list) or any(w not in have for w in want):
+                return False
+        elif have != want:
+            return False
+    return True
+
+
+class VectorIndex:
+    """
+    Normalized float32 matrix (one row per chunk; float16 if memory-mapped from a half-precision
+    artifact) plus chunk ids and texts.
+    search() is one matrix-vector product and an argpartition: exact cosine top-k, no network.
+    version identifies the corpus build the index was loaded from (see rag.refresh_local_index).
+    With normalized=True the matrix, ids and texts are used as given (no copy), e.g. memory-mapped
+    arrays from corpus_artifact.load_artifact. metadata (one dict per chunk, see
+    chunking.chunk_metadata) enables filtered search.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        matrix: np.ndarray,
+        version: str = "",
+        normalized: bool = False,
+        metadata: Optional[Sequence[Optional[dict]]] = None,
+    ) -> None:
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids) or len(ids) != len(texts):
+            raise ValueError(f"index shape mismatch: matrix={matrix.shape} ids={len(ids)} texts={len(texts)}")
+        if normalized:
+            self.matrix = matrix
+            self.ids = ids
+            self.texts = texts
+        else:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.matrix = np.ascontiguousarray(matrix / norms, dtype=np.float32)
+            self.ids = list(ids)
+            self.texts = list(texts)
+        if metadata is not None and len(metadata) != len(self.ids):
+            raise ValueError(f"metadata length {len(metadata)} != {len(self.ids)} chunks")
+        self.metadata = list(metadata) if metadata is not None else None
+        self.version = version
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple], version: str = "") -> "VectorIndex":
+        """Build from (id, content, embedding[, metadata]) rows, e.g. db.get_all_chunks()."""
+        ids = [str(r[0]) for r in rows]
+        texts = [r[1] for r in rows]
+        matrix = np.asarray([np.asarray(r[2], dtype=np.float32) for r in rows], dtype=np.float32)
+        if not rows:
+            matrix = matrix.reshape(0, 0)
+        metadata = [r[3] if len(r) > 3 else None for r in rows] if rows and len(rows[0]) > 3 else None
+        return cls(ids, texts, matrix, version, metadata=metadata)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0
+
+    def filter_rows(self, filters: Optional[dict]) -> Optional[np.ndarray]:
+        """Rows whose metadata matches filters (see matches_filters); None means all rows."""
+        if not filters:
+            return None
+        if self.metadata is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.asarray(
+            [i for i, meta in enumerate(self.metadata) if matches_filters(meta, filters)], dtype=np.int64
+        )
+
+    def search_rows(
+        self, query: Sequence[float], top_k: int, filters: Optional[dict] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Return up to top_k (row, cosine similarity), best first, optionally only rows matching filters.
+        Empty on empty index, bad query or no matching rows.
+        """
+        rows = self.filter_rows(filters)
+        n = len(self.ids) if rows is None else len(rows)
+        if n == 0 or top_k <= 0:
+            return []
+        q = np.asarray(query, dtype=np.float32).ravel()
+        if q.shape[0] != self.dim:
+            return []
+        norm = float(np.linalg.norm(q))
+        if norm == 0.0:
+            return []
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        scores = matrix @ (q / norm)
+        k = min(top_k, n)
+        idx = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        if rows is None:
+            return [(int(i), float(scores[i])) for i in idx]
+        return [(int(rows[i]), float(scores[i])) for i in idx]
+
+    def search(
+        self, query: Sequence[float], top_k: int, filters: Optional[dict] = None
+    ) -> List[Tuple[str, str, float]]:
+        """Return up to top_k (id, content, cosine similarity), best first. Empty on empty index or bad query."""
+        return [(str(self.ids[i]), self.texts[i], score) for i, score in self.search_rows(query, top_k, filters)]